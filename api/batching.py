@@ -0,0 +1,194 @@
+"""
+Micro-batching request coalescer for online inference.
+
+Single-listing requests that arrive within a short window are grouped and scored with a
+single vectorized PricePredictor.predict_batch call, then the results are scattered back
+to the waiting callers. This amortizes the fixed per-call cost of ColumnTransformer.transform
+and model.predict over the whole batch.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor
+
+
+class BatcherMetrics:
+    """
+    Counters for batch sizes and queue wait times of a MicroBatcher.
+    """
+
+    # Upper bounds of the batch-size histogram buckets (last bucket is open-ended)
+    BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.max_batch_size = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.batch_size_histogram = [0] * (len(self.BATCH_SIZE_BUCKETS) + 1)
+
+    def record_batch(self, size: int, queue_waits: list):
+        self.batches += 1
+        self.requests += size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.total_queue_wait += sum(queue_waits)
+        self.max_queue_wait = max(self.max_queue_wait, max(queue_waits))
+
+        for i, bound in enumerate(self.BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self.batch_size_histogram[i] += 1
+                break
+        else:
+            self.batch_size_histogram[-1] += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}" for b in self.BATCH_SIZE_BUCKETS] + [f">{self.BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "mean_queue_wait_ms": 1000 * self.total_queue_wait / self.requests if self.requests else 0.0,
+            "max_queue_wait_ms": 1000 * self.max_queue_wait,
+            "batch_size_histogram": dict(zip(labels, self.batch_size_histogram)),
+        }
+
+
+class MicroBatcher:
+    """
+    Collects single-listing requests and scores them in vectorized batches.
+
+    A batch is flushed as soon as it holds max_batch_size listings or max_wait_ms has
+    elapsed since its first listing arrived, whichever comes first.
+
+    Attributes:
+      predictor (PricePredictor): Predictor exposing predict_batch().
+      max_batch_size (int): Maximum number of listings scored per call.
+      max_wait_ms (float): Maximum time the first listing of a batch waits for company.
+      executor (Executor, optional): Pool running the CPU-bound predict_batch calls.
+      metrics (BatcherMetrics): Batch-size and queue-wait statistics.
+    """
+
+    def __init__(self, predictor, max_batch_size: int = 64, max_wait_ms: float = 3.0,
+                 executor: Executor = None, max_concurrent_batches: int = 1):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be a positive integer.")
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self.metrics = BatcherMetrics()
+        self._max_concurrent_batches = max_concurrent_batches
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._pending = set()
+        self._closed = False
+
+    def start(self):
+        """
+        Starts the background collector on the running event loop.
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self._max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        """
+        Stops collecting, scores the listings already queued and waits for in-flight
+        batches to finish. Listings sent to a stopped batcher are scored one by one.
+        """
+        self._closed = True
+        if self._worker is not None:
+            # The collector flushes the listings queued before the marker, then exits
+            self._queue.put_nowait(None)
+            await self._worker
+            self._worker = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def predict(self, features: dict) -> float:
+        """
+        Queues one listing and waits for its predicted price.
+        """
+        loop = asyncio.get_running_loop()
+        if self._closed:
+            predictions = await loop.run_in_executor(self.executor, self.predictor.predict_batch, [features])
+            return float(predictions[0])
+        self.start()
+        future = loop.create_future()
+        self._queue.put_nowait((features, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._slots.acquire()
+            task = loop.create_task(self._run_batch(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _run_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        listings = [features for features, _, _ in batch]
+        futures = [future for _, future, _ in batch]
+
+        try:
+            self.metrics.record_batch(len(batch), [started - queued for _, _, queued in batch])
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predictor.predict_batch, listings)
+                results = [(float(p), None) for p in predictions]
+            except Exception:
+                self.metrics.failed_batches += 1
+                if len(listings) == 1:
+                    raise
+                # One bad listing must not fail its neighbours: fall back to scoring one by one
+                results = []
+                for listing in listings:
+                    try:
+                        prediction = await loop.run_in_executor(self.executor, self.predictor.predict_batch, [listing])
+                        results.append((float(prediction[0]), None))
+                    except Exception as error:
+                        results.append((None, error))
+
+            for future, (value, error) in zip(futures, results):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(value)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+            self._slots.release()
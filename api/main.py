@@ -1 +1,351 @@
-# Placeholder file - to be implemented
+"""
+FastAPI prediction service.
+
+Loads every artifact found under MODEL_DIR at startup, then serves single and batch
+predictions. CPU-bound preprocessing and model.predict calls run in a bounded thread
+pool so the event loop never blocks.
+
+Run locally from the repository root:
+  PYTHONPATH=. uvicorn api.main:app --host 0.0.0.0 --port 8000 --workers 4
+
+Environment variables:
+  MODEL_DIR          Root folder with one sub-folder per model type (default: local_models)
+  PREDICT_WORKERS    Size of the inference thread pool per process (default: 4)
+  MICROBATCH_WAIT_MS Window used to coalesce concurrent /predict calls, 0 disables it (default: 3)
+  MICROBATCH_SIZE    Maximum number of listings per coalesced batch (default: 64)
+  PREDICT_BACKEND    "native" or "compiled" (tree ensembles as flat node arrays, default: native)
+  PREDICTION_CACHE_SIZE  Entries of the prediction cache, 0 disables it (default: 0)
+  PREDICTION_CACHE_TTL   Seconds a cached prediction stays valid, 0 for no expiry (default: 3600)
+  PREDICTION_CACHE_PATH  SQLite file shared by all workers; in-process LRU cache if unset
+  METRICS_ENABLED    1 records request counters and latency histograms, served on /metrics (default: off)
+  INSTRUMENTATION    1 logs a structured timing span for every prediction call (default: off)
+  DRIFT_MONITORING   1 profiles the scored listings against the training profile, served on /drift (default: off)
+  DRIFT_DIR          Folder where every worker saves its listings profile, so /drift covers all running workers
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+
+from api.batching import MicroBatcher
+from scripts.predict_price import ModelRegistry
+from utils.constants import PROFILE_DIR
+from utils.logger import METRICS
+from utils.prediction_cache import DiskCache, MemoryCache
+from utils.profiling import DatasetProfile, DriftMonitor, drift_report
+
+
+MODEL_DIR = os.getenv("MODEL_DIR", "local_models")
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "4"))
+MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", "3"))
+MICROBATCH_SIZE = int(os.getenv("MICROBATCH_SIZE", "64"))
+PREDICT_BACKEND = os.getenv("PREDICT_BACKEND", "native")
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+PREDICTION_CACHE_PATH = os.getenv("PREDICTION_CACHE_PATH")
+DRIFT_MONITORING = os.getenv("DRIFT_MONITORING", "0") == "1"
+DRIFT_DIR = os.getenv("DRIFT_DIR")
+
+# No-ops unless METRICS_ENABLED is set (see utils.logger.MetricsRegistry)
+REQUESTS = METRICS.counter("api_requests_total", "HTTP requests by route and status code", ("route", "status"))
+REQUEST_LATENCY = METRICS.histogram("api_request_duration_seconds", "HTTP request latency", ("route",))
+PREDICTIONS = METRICS.counter("api_predictions_total", "Listings scored", ("dataset", "model_type"))
+PREDICT_LATENCY = METRICS.histogram(
+    "api_predict_duration_seconds", "Time to score one request, queueing included", ("dataset", "model_type")
+)
+
+
+class PredictRequest(BaseModel):
+    dataset: str = Field(..., examples=["immovlan_real_estate"])
+    model_type: str = Field(..., examples=["rf"])
+    features: Dict[str, Any]
+
+
+class BatchPredictRequest(BaseModel):
+    dataset: str = Field(..., examples=["immovlan_real_estate"])
+    model_type: str = Field(..., examples=["rf"])
+    listings: List[Dict[str, Any]]
+
+
+class PredictResponse(BaseModel):
+    dataset: str
+    model_type: str
+    predicted_price: float
+
+
+class BatchPredictResponse(BaseModel):
+    dataset: str
+    model_type: str
+    predictions: List[float]
+
+
+def _build_prediction_cache():
+    """
+    Returns the prediction cache configured by the environment, or None when disabled.
+    """
+    if PREDICTION_CACHE_SIZE <= 0:
+        return None
+    ttl = PREDICTION_CACHE_TTL or None
+    if PREDICTION_CACHE_PATH:
+        return DiskCache(PREDICTION_CACHE_PATH, max_size=PREDICTION_CACHE_SIZE, ttl=ttl)
+    return MemoryCache(max_size=PREDICTION_CACHE_SIZE, ttl=ttl)
+
+
+def _warm_up(registry: ModelRegistry) -> list:
+    """
+    Loads every discovered artifact into the registry cache.
+    """
+    loaded = []
+    for dataset, model_type in registry.list_models():
+        try:
+            registry.get(dataset, model_type)
+            loaded.append(f"{dataset}_{model_type}")
+        except Exception as e:
+            print(f"[ERROR] Failed to load {dataset}_{model_type}: {e}")
+    return loaded
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry = ModelRegistry(
+        base_path=MODEL_DIR, backend=PREDICT_BACKEND, prediction_cache=_build_prediction_cache()
+    )
+    # Keep every artifact warm: the cache must be able to hold all of them
+    registry.max_size = max(registry.max_size, len(registry.discover()))
+
+    app.state.registry = registry
+    app.state.executor = ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="predict")
+    app.state.ready = False
+    app.state.loaded_models = []
+    app.state.batchers = {}
+    app.state.drift_monitors = {}
+    app.state.drift_tasks = set()
+
+    loop = asyncio.get_running_loop()
+    app.state.loaded_models = await loop.run_in_executor(app.state.executor, _warm_up, registry)
+    app.state.ready = True
+    print(f"[OK] Warm-up finished: {len(app.state.loaded_models)} model(s) loaded from {MODEL_DIR}")
+
+    yield
+
+    for batcher in app.state.batchers.values():
+        await batcher.stop()
+    if app.state.drift_tasks:
+        await asyncio.gather(*app.state.drift_tasks, return_exceptions=True)
+    for monitor in app.state.drift_monitors.values():
+        if monitor is not None:
+            await loop.run_in_executor(app.state.executor, monitor.flush)
+    app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="Real Estate Price Predictor", lifespan=lifespan)
+
+
+if METRICS.enabled:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        # The route template keeps the label set bounded (unknown paths share one label)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUESTS.inc(route=route, status=response.status_code)
+        REQUEST_LATENCY.observe(time.perf_counter() - start, route=route)
+        return response
+
+
+def _get_predictor(dataset: str, model_type: str):
+    try:
+        return app.state.registry.get(dataset, model_type)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+async def _get_batcher(dataset: str, model_type: str) -> MicroBatcher:
+    """
+    Returns the micro-batcher of a model, rebuilding it if the registry reloaded the model.
+    The batcher of the previous model is stopped once its queued listings are scored.
+    """
+    predictor = _get_predictor(dataset, model_type)
+    old = app.state.batchers.get((dataset, model_type))
+    if old is not None and old.predictor is predictor:
+        return old
+
+    # Swap before awaiting, so concurrent requests see the new batcher and build no other
+    batcher = MicroBatcher(
+        predictor,
+        max_batch_size=MICROBATCH_SIZE,
+        max_wait_ms=MICROBATCH_WAIT_MS,
+        executor=app.state.executor,
+    )
+    app.state.batchers[(dataset, model_type)] = batcher
+    if old is not None:
+        await old.stop()
+    return batcher
+
+
+def _get_drift_monitor(dataset: str):
+    """
+    Returns the drift monitor of a dataset, or None if it has no training profile.
+    """
+    monitors = app.state.drift_monitors
+    if dataset not in monitors:
+        profile_path = os.path.join(MODEL_DIR, PROFILE_DIR, f"{dataset}.json")
+        monitors[dataset] = None
+        if os.path.exists(profile_path):
+            directory = os.path.join(DRIFT_DIR, dataset) if DRIFT_DIR else None
+            monitors[dataset] = DriftMonitor(DatasetProfile.load(profile_path), dataset, directory=directory)
+    return monitors[dataset]
+
+
+def _observe(dataset: str, listings: list):
+    """
+    Records scored listings in the drift monitor of the dataset (DRIFT_MONITORING=1).
+
+    Profiling (and saving the profile with DRIFT_DIR) runs in the inference pool and the
+    request does not wait for it.
+    """
+    if DRIFT_MONITORING:
+        monitor = _get_drift_monitor(dataset)
+        if monitor is not None:
+            future = asyncio.get_running_loop().run_in_executor(app.state.executor, monitor.observe, listings)
+            app.state.drift_tasks.add(future)
+            future.add_done_callback(_observed)
+
+
+def _observed(future: asyncio.Future):
+    app.state.drift_tasks.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        print(f"[ERROR] Drift monitoring failed: {future.exception()}")
+
+
+async def _run_prediction(dataset: str, model_type: str, listings: list):
+    """
+    Resolves the predictor and scores the listings in the inference pool.
+    """
+    predictor = _get_predictor(dataset, model_type)
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        predictions = await loop.run_in_executor(app.state.executor, predictor.predict_batch, listings)
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Prediction failed: {e}")
+    PREDICT_LATENCY.observe(time.perf_counter() - start, dataset=dataset, model_type=model_type)
+    PREDICTIONS.inc(len(listings), dataset=dataset, model_type=model_type)
+    _observe(dataset, listings)
+    return predictions
+
+
+@app.get("/health")
+async def health():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: returns 200 once warm-up has finished, 503 before.
+    """
+    is_ready = getattr(app.state, "ready", False)
+    body = {"ready": is_ready, "models": getattr(app.state, "loaded_models", [])}
+    return JSONResponse(status_code=200 if is_ready else 503, content=body)
+
+
+@app.get("/models")
+async def models():
+    """
+    Lists the available (dataset, model_type) pairs.
+    """
+    return [{"dataset": d, "model_type": m} for d, m in app.state.registry.list_models()]
+
+
+@app.get("/metrics/batching")
+async def batching_metrics():
+    """
+    Batch-size and queue-wait statistics of each model's micro-batcher.
+    """
+    return {f"{d}_{m}": b.metrics.snapshot() for (d, m), b in app.state.batchers.items()}
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    """
+    Hit/miss statistics and size of the prediction cache (PREDICTION_CACHE_SIZE > 0).
+    """
+    cache = app.state.registry.prediction_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "backend": type(cache).__name__, "size": len(cache), **cache.stats.snapshot()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Request counters and latency histograms in the Prometheus text format (METRICS_ENABLED=1).
+    """
+    if not METRICS.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled, set METRICS_ENABLED=1")
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/drift/{dataset}")
+async def drift(dataset: str):
+    """
+    Drift of the listings scored so far against the training data (DRIFT_MONITORING=1):
+    PSI, KS statistic and null rates per column (see utils.profiling.drift_report).
+    """
+    if not DRIFT_MONITORING:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled, set DRIFT_MONITORING=1")
+    monitor = _get_drift_monitor(dataset)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail=f"No training profile for dataset '{dataset}'")
+
+    loop = asyncio.get_running_loop()
+    current = await loop.run_in_executor(app.state.executor, monitor.current)
+    report = await loop.run_in_executor(app.state.executor, drift_report, monitor.reference, current)
+    return {"dataset": dataset, "rows": current.rows, "reference_rows": monitor.reference.rows, "columns": report}
+
+
+@app.post("/predict", response_model=PredictResponse)
+async def predict(request: PredictRequest):
+    if MICROBATCH_WAIT_MS > 0:
+        batcher = await _get_batcher(request.dataset, request.model_type)
+        start = time.perf_counter()
+        try:
+            predicted_price = await batcher.predict(request.features)
+        except (ValueError, TypeError, KeyError) as e:
+            raise HTTPException(status_code=422, detail=f"Prediction failed: {e}")
+        PREDICT_LATENCY.observe(time.perf_counter() - start, dataset=request.dataset, model_type=request.model_type)
+        PREDICTIONS.inc(dataset=request.dataset, model_type=request.model_type)
+        _observe(request.dataset, [request.features])
+    else:
+        predictions = await _run_prediction(request.dataset, request.model_type, [request.features])
+        predicted_price = float(predictions[0])
+
+    return PredictResponse(
+        dataset=request.dataset,
+        model_type=request.model_type,
+        predicted_price=predicted_price,
+    )
+
+
+@app.post("/predict/batch", response_model=BatchPredictResponse)
+async def predict_batch(request: BatchPredictRequest):
+    if not request.listings:
+        return BatchPredictResponse(dataset=request.dataset, model_type=request.model_type, predictions=[])
+    predictions = await _run_prediction(request.dataset, request.model_type, request.listings)
+    return BatchPredictResponse(
+        dataset=request.dataset,
+        model_type=request.model_type,
+        predictions=predictions.tolist(),
+    )
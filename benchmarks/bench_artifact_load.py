@@ -0,0 +1,100 @@
+"""
+Benchmark: load time and memory of model artifacts per format and model type.
+
+Formats:
+  pickle      plain joblib.dump of the fitted estimator (previous format)
+  mmap        save_artifact(), arrays memory-mapped on load (default format)
+  flat        save_artifact(compile_trees=True), tree ensembles as memory-mapped FlatForest
+              node arrays (rf and dgbm only)
+  compressed  save_artifact(compress=3), cold-storage variant
+
+Each load runs in a fresh process, followed by one predict call so every page the model
+needs is touched. Private memory (RssAnon) is paid by every worker process; file-backed
+memory (RssFile) is the page cache of the artifact, shared by all processes mapping it.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_artifact_load.py
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+
+from ml_models.artifacts import save_artifact
+from ml_models.tree_engine import is_compilable
+
+
+CHILD = """
+import json, sys, time
+import numpy as np
+import lightgbm, sklearn.ensemble, sklearn.linear_model
+from ml_models.artifacts import load_artifact
+
+def status_kb():
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return {k: int(fields[k].split()[0]) for k in ("RssAnon", "RssFile")}
+
+path, n_features, mmap_mode = sys.argv[1], int(sys.argv[2]), sys.argv[3] or None
+X = np.random.default_rng(0).normal(size=(1000, n_features))
+before = status_kb()
+start = time.perf_counter()
+model = load_artifact(path, mmap_mode=mmap_mode)
+load_ms = (time.perf_counter() - start) * 1000
+model.predict(X)
+after = status_kb()
+print(json.dumps({"load_ms": load_ms, **{k: (after[k] - before[k]) / 1024 for k in after}}))
+"""
+
+
+def measure(path: str, n_features: int, mmap_mode: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, path, str(n_features), mmap_mode],
+            capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    # Median run by load time
+    return sorted(runs, key=lambda r: r["load_ms"])[len(runs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load time and RSS of model artifacts per format.")
+    parser.add_argument("--model-dir", default="local_models")
+    parser.add_argument("--dataset", default="immovlan_real_estate")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'model':<6} {'format':<11} {'size KB':>9} {'load ms':>8} {'anon MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for model_type in ["rf", "lr", "dgbm"]:
+            source = os.path.join(args.model_dir, model_type, f"{args.dataset}_{model_type}.pkl")
+            if not os.path.exists(source):
+                print(f"[SKIPPED] {source} not found")
+                continue
+            model = joblib.load(source)
+
+            formats = ["pickle", "mmap", "flat", "compressed"] if is_compilable(model) else \
+                ["pickle", "mmap", "compressed"]
+            paths = {fmt: os.path.join(tmp, f"{model_type}_{fmt}.pkl") for fmt in formats}
+            joblib.dump(model, paths["pickle"])
+            save_artifact(model, paths["mmap"])
+            if "flat" in paths:
+                save_artifact(model, paths["flat"], compile_trees=True)
+            save_artifact(model, paths["compressed"], compress=3)
+
+            for fmt, path in paths.items():
+                # The previous format was read with a plain joblib.load
+                res = measure(path, model.n_features_in_, "" if fmt == "pickle" else "r", args.repeat)
+                print(f"{model_type:<6} {fmt:<11} {os.path.getsize(path) / 1024:9.1f} {res['load_ms']:8.2f} "
+                      f"{res['RssAnon']:8.2f} {res['RssFile']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
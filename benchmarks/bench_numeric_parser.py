@@ -0,0 +1,79 @@
+"""
+Benchmark: numeric text parsing in clean_dataframe.
+
+Compares the original chained str.replace implementation with
+utils.preprocessing.parse_numeric_text on the numeric text columns of a dataset
+replicated to --rows rows, and checks that both produce the same values.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_numeric_parser.py --rows 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.column_mapper import load_column_mapping, standardize_columns
+from utils.preprocessing import NUMERIC_TEXT_COLUMNS, parse_numeric_text
+
+
+def legacy_parse(series: pd.Series) -> pd.Series:
+    """
+    The implementation parse_numeric_text replaced (DatasetTrainer.clean_dataframe before).
+    """
+    cleaned = (
+        series
+        .astype(str)
+        .str.replace("€", "", regex=False)
+        .str.replace("m²", "", regex=False)
+        .str.replace("%", "", regex=False)
+        .str.replace("\u202f", "", regex=False)
+        .str.replace("\xa0", "", regex=False)
+        .str.replace(",", ".", regex=False)
+        .str.replace(r"[^\d.]", "", regex=True)
+    )
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark numeric text parsing.")
+    parser.add_argument("--data", default="data/immovlan_real_estate.csv")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = standardize_columns(pd.read_csv(args.data), load_column_mapping())
+    df = df.sample(n=args.rows, replace=True, random_state=42).reset_index(drop=True)
+    columns = [col for col in ["price"] + NUMERIC_TEXT_COLUMNS if col in df.columns]
+
+    print(f">>> {args.rows:,} rows, best of {args.repeat}")
+    print(f"{'column':<20}{'legacy (s)':>12}{'parser (s)':>12}{'speed-up':>10}")
+    total_legacy = total_new = 0.0
+    for col in columns:
+        expected = legacy_parse(df[col]).to_numpy(dtype=np.float64)
+        actual = parse_numeric_text(df[col])
+        if not np.array_equal(expected, actual, equal_nan=True):
+            raise AssertionError(f"Parsed values differ for column '{col}'")
+
+        t_legacy = best_of(lambda: legacy_parse(df[col]), args.repeat)
+        t_new = best_of(lambda: parse_numeric_text(df[col]), args.repeat)
+        total_legacy += t_legacy
+        total_new += t_new
+        print(f"{col:<20}{t_legacy:>12.4f}{t_new:>12.4f}{t_legacy / t_new:>9.1f}x")
+
+    print(f"{'total':<20}{total_legacy:>12.4f}{total_new:>12.4f}{total_legacy / total_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
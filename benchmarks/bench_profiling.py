@@ -0,0 +1,76 @@
+"""
+Benchmark: cost and accuracy of the data profiles of utils.profiling.
+
+The dataset is replicated to --rows rows and cleaned in chunks of --chunk-size rows, as
+in streaming training. Reports the time to clean the chunks and the extra time to
+profile them, the time to merge the chunk profiles, the size of the saved profile and
+the relative error of the sketched quantiles against the exact ones.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_profiling.py --rows 1000000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.column_mapper import load_column_mapping, standardize_columns
+from utils.preprocessing import clean_dataframe
+from utils.profiling import DatasetProfile
+
+QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data profiles.")
+    parser.add_argument("--data", default="data/immovlan_real_estate.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = standardize_columns(pd.read_csv(args.data), load_column_mapping())
+    df = df.sample(n=args.rows, replace=True, random_state=42).reset_index(drop=True)
+    chunks = [df.iloc[start:start + args.chunk_size].copy() for start in range(0, len(df), args.chunk_size)]
+
+    clean_time = profile_time = 0.0
+    profiles, cleaned = [], []
+    for chunk in chunks:
+        start = time.perf_counter()
+        chunk = clean_dataframe(chunk, "price")
+        clean_time += time.perf_counter() - start
+        start = time.perf_counter()
+        profiles.append(DatasetProfile.from_frame(chunk))
+        profile_time += time.perf_counter() - start
+        cleaned.append(chunk)
+
+    start = time.perf_counter()
+    merged = profiles[0]
+    for profile in profiles[1:]:
+        merged.merge(profile)
+    merge_time = time.perf_counter() - start
+    size_kb = len(json.dumps(merged.to_dict())) / 1024
+
+    print(f">>> {args.rows:,} rows in {len(chunks)} chunk(s), {len(merged.columns)} column(s)")
+    print(f"[INFO] Cleaning:  {clean_time:.2f}s")
+    print(f"[INFO] Profiling: {profile_time:.2f}s ({profile_time / clean_time:.0%} of cleaning, "
+          f"{args.rows / profile_time:,.0f} rows/s)")
+    print(f"[INFO] Merging {len(profiles)} profile(s): {merge_time * 1000:.1f}ms, saved profile {size_kb:.0f} KB")
+
+    full = pd.concat(cleaned)
+    print(f"{'column':<20}{'mode':>8}{'max rel. error':>16}")
+    for col, profile in merged.columns.items():
+        if profile.kind != "numeric" or profile.count == 0:
+            continue
+        values = full[col].dropna().to_numpy(dtype=np.float64)
+        exact = np.quantile(values, QUANTILES, method="lower")
+        sketched = profile.sketch.quantiles(QUANTILES)
+        error = np.max(np.abs(sketched - exact) / np.maximum(np.abs(exact), 1e-12))
+        mode = "exact" if profile.sketch.exact is not None else "buckets"
+        print(f"{col:<20}{mode:>8}{error:>16.4f}")
+
+
+if __name__ == "__main__":
+    main()
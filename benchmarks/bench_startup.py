@@ -0,0 +1,123 @@
+"""
+Benchmark: cold start time of the training and prediction entry points.
+
+Each entry point runs in a fresh interpreter under python -X importtime. The import time
+is the sum of the cumulative times of the top-level imports reported by -X importtime;
+the wall time also counts interpreter startup and, for the "first prediction" entries,
+loading one model of local_models/ and scoring one listing. The estimator backends
+imported by each entry are listed, so a prediction process pulling in a backend it does
+not use shows up.
+
+Every entry has a budget on its median import time; --check exits with status 1 when
+one is over budget.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_startup.py
+  PYTHONPATH=. python benchmarks/bench_startup.py --repeat 10 --check
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Modules whose import is deferred until a model needs them (see ml_models.backends)
+BACKENDS = ("lightgbm", "sklearn.ensemble", "sklearn.linear_model", "sklearn.tree")
+
+FIRST_PREDICTION = """
+import pandas as pd
+from scripts.predict_price import ModelRegistry
+predictor = ModelRegistry("local_models").get("immovlan_real_estate", "{model_type}")
+columns = predictor.preprocessor.feature_names_in_
+predictor.predict_batch(pd.DataFrame([dict.fromkeys(columns, 1.0)]))
+"""
+
+# name: (code run in the fresh interpreter, import time budget in ms)
+ENTRY_POINTS = {
+    "import scripts.predict_price": ("import scripts.predict_price", 500),
+    "import api.main": ("import api.main", 700),
+    "import scripts.score_listings": ("import scripts.score_listings", 1100),
+    "import scripts.train_all_datasets": ("import scripts.train_all_datasets", 1100),
+    "first prediction (lr)": (FIRST_PREDICTION.format(model_type="lr"), 1100),
+    "first prediction (rf)": (FIRST_PREDICTION.format(model_type="rf"), 1100),
+    "first prediction (dgbm)": (FIRST_PREDICTION.format(model_type="dgbm"), 1100),
+}
+
+REPORT = "\nimport json, sys\nprint(json.dumps([m for m in {backends!r} if m in sys.modules]))\n"
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """
+    Parses the -X importtime report.
+
+    Returns:
+      tuple: (total import time in ms, {top-level package: cumulative ms}).
+    """
+    total_us, packages = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0:
+            total_us += int(cumulative)
+        if "." not in name and not name.startswith("_"):
+            packages[name] = max(packages.get(name, 0), int(cumulative) / 1000)
+    return total_us / 1000, packages
+
+
+def measure(code: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code + REPORT.format(backends=BACKENDS)],
+            capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        import_ms, packages = parse_importtime(result.stderr)
+        backends = json.loads(result.stdout.strip().splitlines()[-1])
+        runs.append({"import_ms": import_ms, "wall_ms": wall_ms, "packages": packages, "backends": backends})
+    # Median run by import time
+    runs.sort(key=lambda run: run["import_ms"])
+    median = dict(runs[len(runs) // 2])
+    median["wall_ms"] = statistics.median(run["wall_ms"] for run in runs)
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the entry points.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if an entry is over budget")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first run does not pay for compilation
+    subprocess.run([sys.executable, "-c", "import scripts.score_listings, scripts.train_all_datasets, api.main"],
+                   check=True, env={**os.environ, "PYTHONPATH": os.getcwd()})
+
+    print(f">>> Cold start, median of {args.repeat} fresh interpreter(s)")
+    over_budget = []
+    for name, (code, budget_ms) in ENTRY_POINTS.items():
+        result = measure(code, args.repeat)
+        heaviest = sorted(result["packages"].items(), key=lambda item: -item[1])[:3]
+        status = "OK" if result["import_ms"] <= budget_ms else "ERROR"
+        if status == "ERROR":
+            over_budget.append(name)
+        print(f"[{status}] {name:<34} imports {result['import_ms']:6.0f}ms (budget {budget_ms}ms), "
+              f"wall {result['wall_ms']:6.0f}ms")
+        print(f"       heaviest: {', '.join(f'{pkg} {ms:.0f}ms' for pkg, ms in heaviest)}; "
+              f"backends: {', '.join(result['backends']) or 'none'}")
+
+    if over_budget:
+        print(f"[WARNING] Over budget: {', '.join(over_budget)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Benchmark suite: training stages and inference hot paths on synthetic listings.
+
+Synthetic datasets follow the schema of data/immovlan_real_estate.csv: every column is
+sampled from the value distribution of the template CSV, and the missing values of each
+row copy the pattern of a random template row (so the share of complete rows matches).
+Near-unique columns (url, address) get a row suffix to stay near-unique. Prices are not
+tied to the features, so the R² of the trained models is meaningless.
+
+For every size, the stages of DatasetTrainer.train_all are timed one by one:
+  read_csv, standardize_columns, clean_dataframe, split_features,
+  preprocess_fit and preprocess_save (per encoding), fit and save (per model type)
+then, for every trained model and PricePredictor backend:
+  load (fresh ModelRegistry.get) and predict_batch latency per batch size.
+
+Results are written as JSON (one record per measurement, with the git commit and library
+versions), and --compare prints the ratio against a previous results file, flagging
+measurements slower by more than --threshold.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_suite.py --output bench_results.json
+  PYTHONPATH=. python benchmarks/bench_suite.py --sizes 10000 --compare bench_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import lightgbm
+import numpy as np
+import pandas as pd
+import sklearn
+
+from ml_models.model_factory import ModelFactory
+from scripts.predict_price import PricePredictor, ModelRegistry
+from scripts.train_all_datasets import DatasetTrainer
+from utils.column_mapper import standardize_columns
+
+
+DATASET = "synthetic_immovlan"
+
+
+def synthetic_listings(template: pd.DataFrame, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generates n_rows listings with the columns, value formats and missing values of template.
+
+    Args:
+      template (pd.DataFrame): Raw listings to imitate (e.g. data/immovlan_real_estate.csv).
+      n_rows (int): Number of rows to generate.
+      seed (int): Random seed.
+
+    Returns:
+      pd.DataFrame: The synthetic listings, raw (not standardized or cleaned).
+    """
+    rng = np.random.default_rng(seed)
+    missing = template.isna().to_numpy()[rng.integers(0, len(template), size=n_rows)]
+    row_ids = pd.Series(np.arange(n_rows)).astype(str)
+
+    columns = {}
+    for j, col in enumerate(template.columns):
+        counts = template[col].value_counts(normalize=True)
+        values = pd.Series(rng.choice(counts.index.to_numpy(), size=n_rows, p=counts.to_numpy()))
+        if counts.size > 0.5 * template[col].notna().sum() and values.dtype == object:
+            values = values + "-" + row_ids
+        values[missing[:, j]] = None
+        columns[col] = values
+    return pd.DataFrame(columns)
+
+
+def timed(fn, *args, **kwargs):
+    """
+    Calls fn and returns (result, elapsed seconds).
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def median_latency(fn, budget_s: float = 0.5, max_repeat: int = 50) -> float:
+    """
+    Median duration in seconds over as many calls as fit in the time budget (after a warm-up).
+    """
+    fn()
+    times = []
+    deadline = time.perf_counter() + budget_s
+    while len(times) < max_repeat and (not times or time.perf_counter() < deadline):
+        times.append(timed(fn)[1])
+    return float(np.median(times))
+
+
+def bench_training(trainer: DatasetTrainer, csv_path: str, n_rows: int, record):
+    """
+    Runs the train_all pipeline on one CSV stage by stage.
+
+    Returns:
+      pd.DataFrame: The encoded features (inputs of PricePredictor).
+    """
+    df, seconds = timed(pd.read_csv, csv_path)
+    record("read_csv", seconds)
+    df, seconds = timed(standardize_columns, df, trainer.mapping_dict)
+    record("standardize_columns", seconds)
+    df, seconds = timed(DatasetTrainer.clean_dataframe, df, trainer.target)
+    record("clean_dataframe", seconds)
+    (X, y), seconds = timed(trainer._split_features, df)
+    record("split_features", seconds, complete_rows=len(X))
+    print(f"[INFO] {n_rows:,} rows, {len(X):,} complete")
+
+    feature_sets = {}
+    for encoding in sorted({trainer._encoding_for(model_type) for model_type in trainer.model_types}):
+        start = time.perf_counter()
+        preprocessor, categorical_feature = trainer._build_preprocessor(X, encoding=encoding)
+        X_preprocessed = preprocessor.fit_transform(X, y)
+        record("preprocess_fit", time.perf_counter() - start, encoding=encoding)
+        preprocessor_ref, seconds = timed(trainer._save_preprocessor, preprocessor)
+        record("preprocess_save", seconds, encoding=encoding)
+        feature_sets[encoding] = (X_preprocessed, preprocessor_ref, categorical_feature)
+
+    for model_type in trainer.model_types:
+        X_preprocessed, preprocessor_ref, categorical_feature = feature_sets[trainer._encoding_for(model_type)]
+        model = ModelFactory.create(model_type)
+        fit_kwargs = {"categorical_feature": categorical_feature} if categorical_feature else {}
+        _, seconds = timed(model.fit, X_preprocessed, y, **fit_kwargs)
+        record("fit", seconds, model_type=model_type)
+        _, seconds = timed(trainer._save_model, DATASET, model_type, model, preprocessor_ref, X_check=X_preprocessed)
+        record("save", seconds, model_type=model_type)
+    return X
+
+
+def bench_inference(model_dir: str, model_types: list, X: pd.DataFrame, batch_sizes: list, record):
+    """
+    Times cold loads through ModelRegistry and predict_batch latency per backend.
+    """
+    rng = np.random.default_rng(0)
+    for model_type in model_types:
+        for backend in PricePredictor.BACKENDS:
+            # A fresh registry per load: nothing is cached between measurements
+            load_s = median_latency(
+                lambda: ModelRegistry(model_dir, backend=backend).get(DATASET, model_type), max_repeat=10
+            )
+            record("load", load_s, model_type=model_type, backend=backend)
+            predictor = ModelRegistry(model_dir, backend=backend).get(DATASET, model_type)
+
+            for batch_size in batch_sizes:
+                batch = X.iloc[rng.integers(0, len(X), size=batch_size)]
+                seconds = median_latency(lambda: predictor.predict_batch(batch))
+                record("predict", seconds, model_type=model_type, backend=backend, batch_size=batch_size)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "lightgbm": lightgbm.__version__,
+    }
+
+
+# Fields identifying a measurement, in display order
+LABELS = ("rows", "stage", "model_type", "encoding", "backend", "batch_size")
+
+
+def result_key(result: dict) -> tuple:
+    return tuple(result.get(k) for k in LABELS)
+
+
+def result_label(result: dict) -> str:
+    return " ".join(str(result[k]) for k in LABELS[1:] if k in result)
+
+
+def compare(results: list, baseline_path: str, threshold: float = 1.25):
+    """
+    Prints every measurement next to the same measurement in a previous results file.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    previous = {result_key(r): r["seconds"] for r in baseline["results"]}
+
+    print(f"\n>>> Compared with {baseline_path} (commit {baseline['environment'].get('commit')})")
+    print(f"{'rows':>9} {'measurement':<36} {'before':>11} {'after':>11} {'ratio':>7}")
+    for result in results:
+        key = result_key(result)
+        if key not in previous:
+            continue
+        before, after = previous[key], result["seconds"]
+        ratio = after / before if before > 0 else float("inf")
+        flag = "  <-- slower" if ratio > threshold else ""
+        print(f"{result['rows']:>9,} {result_label(result):<36} "
+              f"{before * 1000:9.2f}ms {after * 1000:9.2f}ms {ratio:6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training stages and prediction latency.")
+    parser.add_argument("--template", default="data/immovlan_real_estate.csv",
+                        help="CSV whose schema and value distributions are imitated")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--model-types", nargs="+", default=["rf", "lr", "dgbm"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024, 10_000])
+    parser.add_argument("--memory-efficient", action="store_true")
+    parser.add_argument("--output", default=None, help="JSON results file (default: print only)")
+    parser.add_argument("--compare", default=None, help="Previous JSON results file to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio flagged by --compare (default: 1.25)")
+    args = parser.parse_args()
+
+    template = pd.read_csv(args.template)
+    results = []
+
+    for n_rows in args.sizes:
+        print(f"\n>>> {n_rows:,} synthetic rows")
+
+        def record(stage, seconds, **labels):
+            results.append({"rows": n_rows, "stage": stage, **labels, "seconds": seconds})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir, model_dir = os.path.join(tmp, "data"), os.path.join(tmp, "models")
+            os.makedirs(data_dir)
+            csv_path = os.path.join(data_dir, f"{DATASET}.csv")
+            synthetic_listings(template, n_rows).to_csv(csv_path, index=False)
+
+            trainer = DatasetTrainer(data_dir=data_dir, model_dir=model_dir, cache_dir=None,
+                                     model_types=args.model_types, memory_efficient=args.memory_efficient)
+            X = bench_training(trainer, csv_path, n_rows, record)
+            bench_inference(model_dir, args.model_types, X, args.batch_sizes, record)
+
+        for result in results:
+            if result["rows"] == n_rows:
+                print(f"  {result_label(result):<36} {result['seconds'] * 1000:10.2f} ms")
+
+    report = {"environment": environment(), "config": vars(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[OK] Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: peak RSS of DatasetTrainer.train_all in default vs. memory_efficient mode.
+
+Each mode runs in a fresh Python process so the peaks do not mix. The import-only
+baseline is reported too, since it makes up most of the peak on small datasets.
+With --rows the input CSV is resampled (with replacement) to that many rows.
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_training_memory.py --data data/immovlan_real_estate.csv
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+
+CHILD = """
+import json, resource, sys
+from scripts.train_all_datasets import DatasetTrainer
+cfg = json.loads(sys.argv[1])
+if cfg["mode"] != "imports":
+    trainer = DatasetTrainer(data_dir=cfg["data_dir"], model_dir=cfg["model_dir"], cache_dir=None,
+                             memory_efficient=cfg["mode"] == "memory_efficient")
+    trainer.train_all()
+print("PEAK_RSS_KB", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def peak_rss_mb(mode: str, data_dir: str, model_dir: str) -> float:
+    cfg = json.dumps({"mode": mode, "data_dir": data_dir, "model_dir": model_dir})
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, cfg],
+        capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+    ).stdout
+    line = next(line for line in out.splitlines() if line.startswith("PEAK_RSS_KB"))
+    return int(line.split()[1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of training in default vs. memory_efficient mode.")
+    parser.add_argument("--data", default="data/immovlan_real_estate.csv")
+    parser.add_argument("--rows", type=int, default=None, help="Resample the CSV to this many rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        os.makedirs(data_dir)
+        target_csv = os.path.join(data_dir, os.path.basename(args.data))
+        df = pd.read_csv(args.data)
+        if args.rows:
+            df = df.sample(n=args.rows, replace=True, random_state=42)
+        df.to_csv(target_csv, index=False)
+
+        print(f">>> {args.data}: {len(df):,} rows")
+        results = {}
+        for mode in ["imports", "default", "memory_efficient"]:
+            results[mode] = peak_rss_mb(mode, data_dir, os.path.join(tmp, f"models_{mode}"))
+            print(f"{mode:<18} peak RSS {results[mode]:8.1f} MB")
+
+        for mode in ["default", "memory_efficient"]:
+            print(f"{mode:<18} above imports {results[mode] - results['imports']:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
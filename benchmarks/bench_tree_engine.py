@@ -0,0 +1,75 @@
+"""
+Benchmark: predict latency of tree ensembles, original model vs. compiled FlatForest.
+
+Columns:
+  original  model.predict of the fitted RandomForestRegressor / LGBMRegressor
+  numpy     FlatForest NumPy engine
+  native    FlatForest native kernel (rebuilt scikit-learn trees / LightGBM Booster)
+  auto      FlatForest.predict default (NumPy below native_min_rows, native above)
+
+Run from the repository root:
+  PYTHONPATH=. python benchmarks/bench_tree_engine.py
+  PYTHONPATH=. python benchmarks/bench_tree_engine.py --batch-sizes 1 8 16 32 64 128 256
+"""
+
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+
+from ml_models.tree_engine import check_compiled, compile_trees
+
+
+def best_of(fn, X, budget_s: float = 0.5, max_repeat: int = 200) -> float:
+    """
+    Median latency in ms over as many calls as fit in the time budget.
+    """
+    fn(X)
+    times = []
+    deadline = time.perf_counter() + budget_s
+    while len(times) < max_repeat and (not times or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict latency: original vs. compiled tree ensembles.")
+    parser.add_argument("--model-dir", default="local_models")
+    parser.add_argument("--dataset", default="immovlan_real_estate")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024, 100_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for model_type in ["rf", "dgbm"]:
+        path = os.path.join(args.model_dir, model_type, f"{args.dataset}_{model_type}.pkl")
+        if not os.path.exists(path):
+            print(f"[SKIPPED] {path} not found")
+            continue
+        model = joblib.load(path)
+        compiled = compile_trees(model)
+
+        # Standardized-looking inputs with some missing values
+        sample = rng.normal(size=(10_000, compiled.n_features_in_))
+        sample[rng.random(sample.shape) < 0.02] = np.nan
+        max_diff = check_compiled(model, compiled, sample)
+
+        print(f"\n>>> {model_type}: {compiled.n_trees} trees, {compiled.n_nodes:,} nodes, max depth "
+              f"{compiled.max_depth}, native from {compiled.native_min_rows} rows, max abs diff {max_diff:.2g}")
+        print(f"{'rows':>8} {'original':>10} {'numpy':>10} {'native':>10} {'auto':>10}   (ms)")
+        for n_rows in args.batch_sizes:
+            X = rng.normal(size=(n_rows, compiled.n_features_in_))
+            timings = [
+                best_of(model.predict, X),
+                best_of(lambda X: compiled.predict(X, engine="numpy"), X),
+                best_of(lambda X: compiled.predict(X, engine="native"), X),
+                best_of(compiled.predict, X),
+            ]
+            print(f"{n_rows:>8,} " + " ".join(f"{t:10.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compact model artifacts whose numeric arrays can be memory-mapped.
+
+Artifacts are regular joblib files. Uncompressed, joblib writes every NumPy array raw
+(and aligned) in the pickle stream, and load_artifact() maps them with mmap_mode="r"
+instead of reading them: pages are loaded on first access and shared by every process
+mapping the same file, e.g. the API workers.
+
+This only pays off for objects that keep their arrays as NumPy arrays once unpickled
+(LinearRegression coefficients, StandardScaler statistics, ...). scikit-learn trees copy
+their nodes into native buffers and LightGBM keeps a text model, so with compile_trees=True
+save_artifact() stores forests and boosters as a FlatForest of plain node arrays instead
+(see ml_models.tree_engine). Flattening is opt-in: callers check the compiled model
+against the fitted one first (check_compiled), as DatasetTrainer does.
+
+A compressed variant (compress > 0) is meant for cold storage: it is read fully into
+memory on load. Both variants keep the .pkl name; the loader detects compression.
+"""
+
+import os
+
+import joblib
+
+from ml_models.backends import is_instance
+from ml_models.tree_engine import compile_trees, is_compilable
+
+
+# Pickle streams (protocol >= 2) start with the PROTO opcode, compressed files do not
+_PICKLE_MAGIC = b"\x80"
+
+
+def pack_model(model, compile_all: bool = False):
+    """
+    Returns the object save_artifact() stores: with compile_all=True, scikit-learn forests
+    and trees and LightGBM models (also as the steps of a Pipeline) become FlatForest.
+    Anything else is returned unchanged.
+    """
+    if not compile_all:
+        return model
+    if is_compilable(model):
+        return compile_trees(model)
+    if is_instance(model, "sklearn.pipeline", "Pipeline"):
+        from sklearn.pipeline import Pipeline
+        return Pipeline([(name, pack_model(step, compile_all)) for name, step in model.steps])
+    return model
+
+
+def save_artifact(model, filepath: str, compress: int = 0, compile_trees: bool = False):
+    """
+    Saves a model (or preprocessor) in the compact artifact format.
+
+    Args:
+      model: Fitted estimator, Pipeline or preprocessor.
+      filepath (str): Destination .pkl file. Written to a temporary file then renamed,
+        so readers never see a partial artifact.
+      compress (int): 0 (default) stores arrays raw so they can be memory-mapped,
+        1-9 writes the zlib-compressed cold-storage variant.
+      compile_trees (bool): Store tree ensembles as a FlatForest (see pack_model).
+    """
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(pack_model(model, compile_trees), tmp_path, compress=compress)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_compressed(filepath: str) -> bool:
+    """
+    Tells whether a joblib file was written with compression.
+    """
+    with open(filepath, "rb") as f:
+        return f.read(1) != _PICKLE_MAGIC
+
+
+def load_artifact(filepath: str, mmap_mode: str = "r"):
+    """
+    Loads an artifact written by save_artifact() or a plain joblib.dump.
+
+    Arrays of uncompressed files are memory-mapped (read-only with the default "r");
+    compressed files are read into memory. Pass mmap_mode=None to always read.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"No artifact found at: {filepath}")
+    if mmap_mode is None or is_compressed(filepath):
+        return joblib.load(filepath)
+    return joblib.load(filepath, mmap_mode=mmap_mode)
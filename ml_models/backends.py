@@ -0,0 +1,41 @@
+"""
+Estimator backends (scikit-learn estimator modules, LightGBM) imported on first use.
+
+Importing them costs tens to hundreds of milliseconds each, most of it wasted in a
+process that scores a single model type or only parses its command line. The ml_models
+modules therefore refer to estimator classes by (module, class name): load_class()
+imports the module when an estimator is built, and is_instance() tests the type of an
+object without importing anything, since an object of a class can only exist once the
+module defining it has been imported.
+"""
+
+import importlib
+import sys
+
+
+# Estimator of each model type returned by ModelFactory.create
+ESTIMATORS = {
+    "rf": ("sklearn.ensemble", "RandomForestRegressor"),
+    "lr": ("sklearn.linear_model", "LinearRegression"),
+    "dgbm": ("lightgbm", "LGBMRegressor"),
+}
+
+
+def load_class(module_name: str, class_name: str) -> type:
+    """
+    Imports module_name (once) and returns its class_name attribute.
+    """
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def is_instance(obj, module_name: str, *class_names: str) -> bool:
+    """
+    isinstance(obj, module.class_name for each class_name), False while the module is not imported.
+    Class names the installed version of the module does not define are skipped (e.g.
+    scipy.sparse.sparray before scipy 1.8).
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        return False
+    classes = tuple(cls for cls in (getattr(module, name, None) for name in class_names) if cls is not None)
+    return isinstance(obj, classes)
@@ -1,17 +1,35 @@
 from abc import ABC, abstractmethod
 from sklearn.pipeline import Pipeline
-import joblib
 import os
 
+from ml_models.artifacts import load_artifact, save_artifact
+
 class BaseModel(ABC):
     """
     Abstract base class for all real estate price prediction models.
+
+    Hyperparameters of the estimator start from DEFAULT_PARAMS and are overridden by the
+    params passed to __init__. SEARCH_SPACE lists the values tried by ml_models.tuning.
     """
 
-    def __init__(self, name: str = "model"):
+    DEFAULT_PARAMS = {}
+    SEARCH_SPACE = {}
+    # True for estimators accepting a validation set for early stopping (see ml_models.tuning)
+    EARLY_STOPPING = False
+
+    def __init__(self, name: str = "model", params: dict = None):
         self.name = name
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
         self.pipeline = None  # Will be defined in build_pipeline()
 
+    @classmethod
+    @abstractmethod
+    def make_estimator(cls, **params):
+        """
+        Returns the unfitted estimator of this model type with the given hyperparameters.
+        """
+        pass
+
     @abstractmethod
     def build_pipeline(self):
         """
@@ -35,12 +53,12 @@ class BaseModel(ABC):
             raise ValueError("Pipeline is not built. Call train() first.")
         return self.pipeline.predict(X)
 
-    def export(self, filepath: str):
+    def export(self, filepath: str, compress: int = 0):
         """
-        Export the pipeline to a .pkl file.
+        Export the pipeline to a .pkl file in the compact artifact format
+        (compress=1-9 for the compressed cold-storage variant).
         """
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        joblib.dump(self.pipeline, filepath)
+        save_artifact(self.pipeline, filepath, compress=compress)
         print(f">>> Model exported to: {filepath}")
 
     def load(self, filepath: str):
@@ -49,5 +67,5 @@ class BaseModel(ABC):
         """
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"No model found at: {filepath}")
-        self.pipeline = joblib.load(filepath)
+        self.pipeline = load_artifact(filepath)
         print(f">>> Model loaded from: {filepath}")
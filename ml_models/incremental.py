@@ -0,0 +1,132 @@
+"""
+Chunk-wise (out-of-core) fitting of the estimators returned by ModelFactory.
+
+Training data is given as a list of .npy files holding the preprocessed feature chunks
+plus the matching list of target arrays. Feature chunks are opened with mmap_mode="r",
+so only the rows being processed are paged into memory.
+"""
+
+import math
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+
+class IncrementalLinearRegression:
+    """
+    Ordinary least squares fitted chunk by chunk through the normal equations.
+
+    Only X'X and X'y are kept between chunks (memory is O(n_features²)), and the solution
+    is the same as LinearRegression on the full data. to_estimator() returns a fitted
+    sklearn LinearRegression, so the saved artifact is identical in kind to the batch one.
+    """
+
+    def __init__(self):
+        self._xtx = None
+        self._xty = None
+        self.n_samples_seen_ = 0
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        # Append a constant column for the intercept
+        Xa = np.hstack([X, np.ones((X.shape[0], 1))])
+        if self._xtx is None:
+            self._xtx = np.zeros((Xa.shape[1], Xa.shape[1]))
+            self._xty = np.zeros(Xa.shape[1])
+        self._xtx += Xa.T @ Xa
+        self._xty += Xa.T @ y
+        self.n_samples_seen_ += X.shape[0]
+        return self
+
+    def to_estimator(self) -> LinearRegression:
+        if self._xtx is None:
+            raise ValueError("IncrementalLinearRegression has not seen any data.")
+        # lstsq picks the minimum-norm solution when X'X is singular, like LinearRegression
+        solution, _, rank, singular = np.linalg.lstsq(self._xtx, self._xty, rcond=None)
+
+        model = LinearRegression()
+        model.coef_ = solution[:-1]
+        model.intercept_ = float(solution[-1])
+        model.n_features_in_ = len(solution) - 1
+        model.rank_ = int(rank)
+        model.singular_ = singular
+        return model
+
+
+class NpyChunkSequence(lgb.Sequence):
+    """
+    LightGBM Sequence over one memory-mapped .npy feature chunk.
+
+    LightGBM samples rows for bin construction through random access and then pushes
+    the data in batch_size slices, so the chunk is never fully loaded.
+    """
+
+    def __init__(self, path: str, batch_size: int = 4096):
+        self.path = path
+        self.batch_size = batch_size
+        self._data = np.load(path, mmap_mode="r")
+
+    def __getitem__(self, idx):
+        # int, slice or list of row indices; LightGBM samples rows as float64
+        return np.asarray(self._data[idx], dtype=np.float64)
+
+    def __len__(self):
+        return self._data.shape[0]
+
+
+def _lgbm_params(model: lgb.LGBMModel) -> dict:
+    """
+    Converts the sklearn-wrapper parameters into lgb.train parameters.
+    """
+    params = {
+        k: v for k, v in model.get_params().items()
+        if v is not None and k not in ("n_estimators", "class_weight", "importance_type")
+    }
+    params.setdefault("objective", "regression")
+    return params
+
+
+def fit_from_chunks(model, chunk_paths: list, y_chunks: list):
+    """
+    Fits an estimator on preprocessed chunks without materializing the full matrix.
+
+    - Estimators with partial_fit are updated chunk by chunk.
+    - LinearRegression is solved exactly from accumulated normal equations.
+    - LightGBM builds its binned Dataset from the chunks (returns an lgb.Booster).
+    - RandomForestRegressor grows its trees chunk by chunk with warm_start, each chunk
+      adding an equal share of n_estimators (each tree sees a single chunk).
+
+    Returns:
+      The fitted estimator (a new object for LinearRegression and LightGBM).
+    """
+    if hasattr(model, "partial_fit"):
+        for path, y in zip(chunk_paths, y_chunks):
+            model.partial_fit(np.load(path, mmap_mode="r"), y)
+        return model
+
+    if isinstance(model, LinearRegression):
+        incremental = IncrementalLinearRegression()
+        for path, y in zip(chunk_paths, y_chunks):
+            incremental.partial_fit(np.load(path, mmap_mode="r"), y)
+        return incremental.to_estimator()
+
+    if isinstance(model, lgb.LGBMModel):
+        dataset = lgb.Dataset(
+            [NpyChunkSequence(path) for path in chunk_paths],
+            label=np.concatenate(y_chunks),
+            params={"verbose": -1},
+        )
+        return lgb.train(_lgbm_params(model), dataset, num_boost_round=model.n_estimators)
+
+    if isinstance(model, RandomForestRegressor):
+        trees_per_chunk = max(1, math.ceil(model.n_estimators / len(chunk_paths)))
+        model.set_params(warm_start=True, n_estimators=0)
+        for path, y in zip(chunk_paths, y_chunks):
+            model.set_params(n_estimators=model.n_estimators + trees_per_chunk)
+            model.fit(np.load(path), y)
+        return model
+
+    raise ValueError(f"{type(model).__name__} does not support streaming training")
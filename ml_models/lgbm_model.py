@@ -1,6 +1,5 @@
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from lightgbm import LGBMRegressor
 from ml_models.base_model import BaseModel
 
 class LGBMModel(BaseModel):
@@ -8,11 +7,29 @@ class LGBMModel(BaseModel):
     LightGBM model for real estate price prediction.
     """
 
+    DEFAULT_PARAMS = {"n_estimators": 100, "random_state": 42}
+    # n_estimators is found by early stopping during tuning
+    SEARCH_SPACE = {
+        "learning_rate": [0.02, 0.05, 0.1],
+        "num_leaves": [7, 15, 31, 63],
+        "min_child_samples": [5, 10, 20, 40],
+        "subsample": [0.7, 0.85, 1.0],
+        "subsample_freq": [1],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+        "reg_lambda": [0.0, 1.0, 10.0],
+    }
+    EARLY_STOPPING = True
+
+    @classmethod
+    def make_estimator(cls, **params):
+        from lightgbm import LGBMRegressor
+        return LGBMRegressor(verbose=-1, **params)
+
     def build_pipeline(self):
         """
         Build a pipeline with optional preprocessing and the LightGBM model.
         """
         self.pipeline = Pipeline([
             ("scaler", StandardScaler()),
-            ("model", LGBMRegressor(n_estimators=100, random_state=42))
+            ("model", self.make_estimator(**self.params))
         ])
@@ -0,0 +1,209 @@
+"""
+Compiled fast path for linear models behind a StandardScaler / OneHotEncoder (or
+CategoricalEncoder, PostalCodeEncoder) preprocessor.
+
+A LinearRegression fed by the ColumnTransformer of utils.preprocessing.build_preprocessor
+is affine in the raw numeric values plus one additive term per categorical value:
+
+  price = intercept + sum_j w_j * (x_j - mean_j) / scale_j + sum_c w_(c, x_c)
+
+LinearFastPath folds the scaler into the coefficients and turns every one-hot block (or
+block of integer codes) into a {category: weight} table, so a listing is scored with one
+dot product and a dict lookup per categorical column, without building a DataFrame.
+The per-postal-code features of a PostalCodeEncoder depend on the code only, so they
+fold into one {postal code: weight} table as well.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+from utils.preprocessing import CategoricalEncoder, PostalCodeEncoder, category_text, strip_text_columns
+
+
+# Key standing for NaN in the category tables (NaN != NaN, so it cannot be looked up).
+# None is a regular key: like OneHotEncoder, None and NaN are different categories.
+_NAN = object()
+
+
+def _key(value):
+    return _NAN if isinstance(value, float) and value != value else value
+
+
+class LinearFastPath:
+    """
+    A fitted linear model and its preprocessor folded into plain coefficients.
+
+    Attributes:
+      numeric_cols (list): Raw numeric input columns, in the order of weights.
+      weights (np.ndarray): float64 coefficient per numeric column, scaler included.
+      intercept (float): Intercept, scaler offsets included.
+      category_tables (dict): {column: {category: additive weight}}; unknown categories add 0.
+      text_cols (set): Columns whose values are looked up after category_text(), like the
+        CategoricalEncoder (or strip_text_columns step) they come from normalizes them.
+    """
+
+    def __init__(self, numeric_cols: list, weights, intercept: float, category_tables: dict, text_cols=()):
+        self.numeric_cols = list(numeric_cols)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.category_tables = category_tables
+        self.text_cols = set(text_cols)
+
+    @property
+    def columns(self) -> list:
+        """
+        Input columns read by predict(): the numeric ones, then the categorical ones.
+        """
+        return self.numeric_cols + list(self.category_tables)
+
+    def _lookup_key(self, column, value):
+        return category_text(value) if column in self.text_cols else _key(value)
+
+    @staticmethod
+    def supports(model, preprocessor) -> bool:
+        """
+        Tells whether from_pipeline() can compile this model / preprocessor pair.
+        """
+        try:
+            LinearFastPath._blocks(model, preprocessor)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    @classmethod
+    def from_pipeline(cls, model, preprocessor) -> "LinearFastPath":
+        """
+        Compiles a fitted LinearRegression and the fitted ColumnTransformer in front of it.
+
+        Raises:
+          TypeError: If the model or a transformer is not supported.
+          ValueError: If the preprocessor output does not match the model coefficients.
+        """
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        intercept = float(np.ravel(model.intercept_)[0])
+        numeric_cols, weights, category_tables, text_cols = [], [], {}, []
+
+        for transformer, columns, out, strips_text in cls._blocks(model, preprocessor):
+            block_coef = coef[out]
+            if strips_text:
+                text_cols.extend(columns)
+            if isinstance(transformer, StandardScaler):
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                folded = block_coef / np.asarray(scale, dtype=np.float64)
+                numeric_cols.extend(columns)
+                weights.extend(folded)
+                intercept -= float(np.dot(folded, np.asarray(mean, dtype=np.float64)))
+            elif isinstance(transformer, CategoricalEncoder):
+                # w * code: unknown values contribute w * unknown_value, moved to the
+                # intercept so unknown categories still add 0 to the total
+                text_cols.extend(columns)
+                for column, vocabulary, w in zip(columns, transformer.vocabularies_, block_coef):
+                    w = float(w)
+                    intercept += w * transformer.unknown_value
+                    category_tables[column] = {
+                        _key(category): w * (code - transformer.unknown_value)
+                        for code, category in enumerate(vocabulary)
+                    }
+            elif isinstance(transformer, PostalCodeEncoder):
+                # Weighted feature row of each code; unknown codes get the fallback row,
+                # moved to the intercept so they add 0 to the total
+                fallback = float(np.dot(transformer.fallback_, block_coef))
+                intercept += fallback
+                weighted = transformer.table_.astype(np.float64) @ block_coef - fallback
+                category_tables[columns[0]] = {
+                    float(transformer.offset_ + i): float(w) for i, w in enumerate(weighted)
+                }
+            else:
+                position = 0
+                for column, categories in zip(columns, transformer.categories_):
+                    table = {}
+                    for category in categories:
+                        table[_key(category)] = float(block_coef[position])
+                        position += 1
+                    category_tables[column] = table
+
+        return cls(numeric_cols, weights, intercept, category_tables, text_cols)
+
+    @staticmethod
+    def _blocks(model, preprocessor):
+        """
+        Returns (fitted transformer, input columns, output slice, strips text) for each
+        non-empty block, the last telling whether a strip_text_columns step precedes it.
+        """
+        if not isinstance(model, LinearRegression) or np.ndim(model.coef_) != 1:
+            raise TypeError("Only single-output LinearRegression models can be compiled.")
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise TypeError("The preprocessor must be a fitted ColumnTransformer.")
+
+        blocks, width = [], 0
+        for name, transformer, columns in preprocessor.transformers_:
+            out = preprocessor.output_indices_[name]
+            if out.stop == out.start:
+                continue
+            strips_text = False
+            if isinstance(transformer, Pipeline):
+                # build_preprocessor: dtype cast before the scaler (memory_efficient=True),
+                # strip_text_columns before the OneHotEncoder
+                steps, transformer = [step for _, step in transformer.steps[:-1]], transformer.steps[-1][1]
+                allowed = strip_text_columns if isinstance(transformer, OneHotEncoder) else np.asarray
+                if not all(isinstance(step, FunctionTransformer) and step.func is allowed for step in steps):
+                    raise TypeError("Only dtype casts may precede the scaler, and text stripping the one-hot encoder.")
+                strips_text = allowed is strip_text_columns and bool(steps)
+            if isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise TypeError("OneHotEncoder with drop or infrequent categories is not supported.")
+                if transformer.handle_unknown != "ignore":
+                    raise TypeError("OneHotEncoder must use handle_unknown='ignore'.")
+            elif not isinstance(transformer, (StandardScaler, CategoricalEncoder, PostalCodeEncoder)):
+                raise TypeError(f"Unsupported transformer: {type(transformer).__name__}")
+
+            blocks.append((transformer, list(columns), out, strips_text))
+            width = max(width, out.stop)
+
+        if width != len(model.coef_):
+            raise ValueError(f"Preprocessor outputs {width} features, the model expects {len(model.coef_)}.")
+        return blocks
+
+    def predict_one(self, listing: dict) -> float:
+        """
+        Predicts the price of one listing given as a dict of raw feature values.
+
+        Raises:
+          KeyError: If an input column is missing from the listing.
+          ValueError: If a numeric value is missing or not a number.
+        """
+        x = np.array([listing[col] for col in self.numeric_cols], dtype=np.float64)
+        if np.isnan(x).any():
+            raise ValueError("Input contains NaN.")
+        total = self.intercept + float(np.dot(self.weights, x))
+        for column, table in self.category_tables.items():
+            total += table.get(self._lookup_key(column, listing[column]), 0.0)
+        return total
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predicts many listings: a list of dicts, a DataFrame or a columnar dict of arrays.
+        """
+        if isinstance(X, (list, tuple)):
+            return np.array([self.predict_one(listing) for listing in X], dtype=np.float64)
+        if isinstance(X, dict) and not all(isinstance(v, (list, tuple, np.ndarray, pd.Series)) for v in X.values()):
+            return np.array([self.predict_one(X)], dtype=np.float64)
+
+        columns = X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+        numeric = np.empty((len(columns), len(self.numeric_cols)), dtype=np.float64)
+        for j, col in enumerate(self.numeric_cols):
+            numeric[:, j] = np.asarray(columns[col], dtype=np.float64)
+        if np.isnan(numeric).any():
+            raise ValueError("Input contains NaN.")
+        total = self.intercept + numeric @ self.weights
+        for column, table in self.category_tables.items():
+            total += np.array(
+                [table.get(self._lookup_key(column, value), 0.0) for value in columns[column]],
+                dtype=np.float64,
+            )
+        return total
@@ -1,7 +1,6 @@
 
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
 from ml_models.base_model import BaseModel
 
 class LRModel(BaseModel):
@@ -9,11 +8,18 @@ class LRModel(BaseModel):
     Linear Regression model for real estate price prediction.
     """
 
+    SEARCH_SPACE = {"fit_intercept": [True, False], "positive": [False, True]}
+
+    @classmethod
+    def make_estimator(cls, **params):
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression(**params)
+
     def build_pipeline(self):
         """
         Build a pipeline with preprocessing and Linear Regression.
         """
         self.pipeline = Pipeline([
             ("scaler", StandardScaler()),
-            ("model", LinearRegression())
+            ("model", self.make_estimator(**self.params))
         ])
@@ -1,49 +1,54 @@
-from ml_models.rf_model import RFModel
-from ml_models.lgbm_model import LGBMModel
-from ml_models.lr_model import LRModel
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-import lightgbm as lgb
 import sys
 import os
 
+from ml_models.backends import ESTIMATORS, load_class
 
 
 class ModelFactory:
     """
     Factory class to retrieve model instances by type.
+
+    Model classes and estimators are imported on first use (see ml_models.backends), so
+    importing the factory does not load scikit-learn's estimators or LightGBM.
     """
 
+    # Model classes by type, as (module, class name)
     model_map = {
-        "rf": RFModel,
-        "lgbm": LGBMModel,
-        "lr": LRModel
+        "rf": ("ml_models.rf_model", "RFModel"),
+        "lgbm": ("ml_models.lgbm_model", "LGBMModel"),
+        "lr": ("ml_models.lr_model", "LRModel")
     }
 
     @staticmethod
-    def create(model_type):
-        if model_type == "rf":
-            
-            return RandomForestRegressor()
-        elif model_type == "lr":
-            
-            return LinearRegression()
-        elif model_type == "dgbm":
-            
+    def get_model_class(model_type):
+        """
+        Returns the BaseModel subclass of a model type.
+        """
+        if model_type not in ModelFactory.model_map:
+            raise ValueError(f"Unknown model type: {model_type}")
+        return load_class(*ModelFactory.model_map[model_type])
 
+    @staticmethod
+    def create(model_type, **params):
+        """
+        Returns an unfitted estimator; params override its default hyperparameters
+        (e.g. the best_params found by ml_models.tuning).
+        """
+        if model_type not in ESTIMATORS:
+            raise ValueError(f"Unknown model type: {model_type}")
+        estimator_class = load_class(*ESTIMATORS[model_type])
 
-            # Redirect LightGBM stdout/stderr to null
-            sys.stdout = open(os.devnull, "w")
-            sys.stderr = open(os.devnull, "w")
+        if model_type != "dgbm":
+            return estimator_class(**params)
 
-            model = lgb.LGBMRegressor(verbose=-1)
+        # Redirect LightGBM stdout/stderr to null
+        sys.stdout = open(os.devnull, "w")
+        sys.stderr = open(os.devnull, "w")
 
-            # Restore stdout/stderr
-            sys.stdout = sys.__stdout__
-            sys.stderr = sys.__stderr__        
+        model = estimator_class(**{"verbose": -1, **params})
 
-            return model
-        
+        # Restore stdout/stderr
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
 
-        else:
-            raise ValueError(f"Unknown model type: {model_type}")
+        return model
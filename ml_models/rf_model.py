@@ -1,25 +1,40 @@
-from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
 from ml_models.base_model import BaseModel
+from utils.preprocessing import build_preprocessor
 
 class RFModel(BaseModel):
     """
     Random Forest model for real estate price prediction.
     """
 
+    DEFAULT_PARAMS = {"n_estimators": 100, "random_state": 42}
+    SEARCH_SPACE = {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 8, 16],
+        "min_samples_leaf": [1, 2, 5],
+        "max_features": [1.0, 0.5, "sqrt"],
+    }
+
+    def __init__(self, name: str = "model", memory_efficient: bool = False, params: dict = None):
+        super().__init__(name, params)
+        # float32 numerics and sparse one-hot blocks (RandomForest accepts sparse input)
+        self.memory_efficient = memory_efficient
+
+    @classmethod
+    def make_estimator(cls, **params):
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**params)
+
     def build_pipeline(self):
         numeric_features = ["surface", "bedrooms", "bathrooms", "toilets", "postal_code"]
         categorical_features = ["property_type", "town", "condition"]
 
-        preprocessor = ColumnTransformer(transformers=[
-            ("num", StandardScaler(), numeric_features),
-            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features)
-        ])
+        preprocessor = build_preprocessor(
+            numeric_features, categorical_features, memory_efficient=self.memory_efficient
+        )
 
         self.pipeline = Pipeline([
             ("preprocessor", preprocessor),
-            ("model", RandomForestRegressor(n_estimators=100, random_state=42))
+            ("model", self.make_estimator(**self.params))
         ])
 # Placeholder file - to be implemented
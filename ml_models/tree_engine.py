@@ -0,0 +1,456 @@
+"""
+Tree ensembles compiled to flat NumPy node arrays, and the batch engine scoring them.
+
+compile_trees() converts a fitted scikit-learn regression forest / tree, an
+LGBMRegressor or an lgb.Booster into a FlatForest. FlatForest.predict() walks every
+tree of the ensemble at once: each step gathers one node per (row, tree) pair, so a
+batch costs max_depth vectorized steps instead of one Python-level call per tree.
+
+The NumPy engine wins on small batches of scikit-learn forests, where the per-call
+overhead of RandomForestRegressor.predict dominates. From native_min_rows rows on, a
+native kernel rebuilt lazily from the same artifact (scikit-learn Tree objects, or the
+LightGBM model text) takes over, since a compiled loop beats any sequence of NumPy
+passes on large batches. For LightGBM the raw Booster is always faster, so compiled
+LightGBM models score through it and skip the scikit-learn wrapper.
+
+check_compiled() compares a compiled model with the original before it is trusted.
+"""
+
+import numpy as np
+
+from ml_models.backends import is_instance
+
+
+# Supported estimators as (module, class names), tested without importing the module
+# (scikit-learn and LightGBM are only imported to rebuild a native kernel)
+SKLEARN_FORESTS = ("sklearn.ensemble", "RandomForestRegressor", "ExtraTreesRegressor")
+SKLEARN_TREES = ("sklearn.tree", "DecisionTreeRegressor", "ExtraTreeRegressor")
+LIGHTGBM_MODELS = ("lightgbm", "LGBMModel", "Booster")
+
+# How a node treats missing values (LightGBM semantics; scikit-learn trees use MISSING_NAN)
+MISSING_NONE = 0  # NaN is read as 0.0
+MISSING_ZERO = 1  # NaN and 0.0 follow missing_left
+MISSING_NAN = 2   # NaN follows missing_left
+
+_LGBM_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+
+# LightGBM treats |x| <= kZeroThreshold as zero
+_ZERO_THRESHOLD = 1e-35
+
+# Regression objectives whose raw score goes through exp()
+_EXP_OBJECTIVES = ("poisson", "gamma", "tweedie")
+
+# Upper bound on (rows x trees) node indices held at once by the NumPy engine
+_MAX_BLOCK_CELLS = 1 << 16
+
+# Batch sizes from which the native kernels are faster (see benchmarks/bench_tree_engine.py)
+SKLEARN_NATIVE_MIN_ROWS = 32
+# A raw Booster beats the NumPy engine at any batch size; the gain over LGBMRegressor
+# comes from skipping the scikit-learn wrapper
+LIGHTGBM_NATIVE_MIN_ROWS = 1
+
+
+class FlatForest:
+    """
+    Regression tree ensemble stored as flat node arrays.
+
+    The nodes of all trees are concatenated; node i splits on feature[i] and goes to
+    left[i] when x <= threshold[i], to right[i] otherwise. Missing values follow
+    missing_left[i] according to missing_type[i]. Categorical nodes (cat_index[i] >= 0)
+    go left when the integer category is set in cat_table[cat_index[i]]. Leaves point to
+    themselves, so a traversal can run a fixed number of steps (max_depth). The
+    prediction is scale * sum(leaf values) + base_score, passed through exp() when
+    output_transform is "exp".
+
+    Attributes:
+      feature (np.ndarray): int32 split feature per node (0 for leaves).
+      threshold (np.ndarray): float64 split threshold per node.
+      children (np.ndarray): intp (n_nodes, 2) child node indices as [right, left], so
+        the outcome of x <= threshold indexes it directly (see left / right). Kept as
+        intp because NumPy gathers are several times slower with int32 indices.
+      missing_left (np.ndarray): bool, where missing values go.
+      value (np.ndarray): float64 leaf value per node.
+      roots (np.ndarray): int32 root node of each tree.
+      max_depth (int): Depth of the deepest tree.
+      n_features_in_ (int): Number of input features.
+      scale (float): Factor applied to the sum of leaf values (1 / n_trees for a forest).
+      base_score (float): Constant added to every prediction.
+      input_dtype (np.dtype): Precision inputs are rounded to before the comparisons
+        (scikit-learn trees compare float32 inputs).
+      missing_type (np.ndarray, optional): int8 MISSING_* per node (MISSING_NAN if None).
+      cat_index (np.ndarray, optional): int32 row of cat_table per node, -1 for numeric splits.
+      cat_table (np.ndarray, optional): bool (n_categorical_nodes, n_categories) membership table.
+      output_transform (str): "identity" or "exp".
+      native_model (np.ndarray, optional): LightGBM model text (uint8), used by the native kernel.
+      native_min_rows (int, optional): Batches of at least this many rows use the native
+        kernel; None always uses the NumPy engine.
+    """
+
+    # Defaults for the optional parts
+    missing_type = None
+    cat_index = None
+    cat_table = None
+    output_transform = "identity"
+    native_model = None
+    native_min_rows = None
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots,
+                 max_depth: int, n_features_in: int, scale: float = 1.0, base_score: float = 0.0,
+                 input_dtype=np.float64, missing_type=None, cat_index=None, cat_table=None,
+                 output_transform: str = "identity", native_model: str = None, native_min_rows: int = None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.children = np.ascontiguousarray(np.column_stack([right, left]), dtype=np.intp)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in)
+        self.scale = float(scale)
+        self.base_score = float(base_score)
+        self.input_dtype = np.dtype(input_dtype)
+
+        # Only kept when they change the result, so the engine can skip them
+        missing_type = None if missing_type is None else np.asarray(missing_type, dtype=np.int8)
+        if missing_type is not None and not (missing_type == MISSING_NAN).all():
+            self.missing_type = missing_type
+        if cat_table is not None and len(cat_table):
+            self.cat_index = np.ascontiguousarray(cat_index, dtype=np.int32)
+            self.cat_table = np.ascontiguousarray(cat_table, dtype=bool)
+        if output_transform not in ("identity", "exp"):
+            raise ValueError(f"Unknown output_transform: {output_transform}")
+        self.output_transform = output_transform
+
+        if native_model is not None:
+            # Stored as an array so it is memory-mapped like the node arrays
+            self.native_model = np.frombuffer(native_model.encode("utf-8"), dtype=np.uint8)
+        self.native_min_rows = native_min_rows
+        self._kernel = None
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        """
+        Converts a fitted scikit-learn regression forest or single regression tree.
+        """
+        if is_instance(model, *SKLEARN_FORESTS):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+        elif is_instance(model, *SKLEARN_TREES):
+            trees = [model.tree_]
+        else:
+            raise TypeError(f"Cannot flatten {type(model).__name__}")
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("Only single-output regression trees can be flattened.")
+
+        parts = {"feature": [], "threshold": [], "left": [], "right": [], "missing_left": [], "value": []}
+        roots = []
+        offset = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            own = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == -1
+            nodes = tree.__getstate__()["nodes"]
+
+            parts["feature"].append(np.where(is_leaf, 0, tree.feature))
+            parts["threshold"].append(np.where(is_leaf, 0.0, tree.threshold))
+            parts["left"].append(np.where(is_leaf, own, tree.children_left + offset))
+            parts["right"].append(np.where(is_leaf, own, tree.children_right + offset))
+            if "missing_go_to_left" in nodes.dtype.names:
+                parts["missing_left"].append(nodes["missing_go_to_left"].astype(bool))
+            else:
+                parts["missing_left"].append(np.zeros(n_nodes, dtype=bool))
+            parts["value"].append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            roots=roots,
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in=model.n_features_in_,
+            scale=1.0 / len(trees),
+            input_dtype=np.float32,
+            native_min_rows=SKLEARN_NATIVE_MIN_ROWS,
+            **{name: np.concatenate(arrays) for name, arrays in parts.items()},
+        )
+
+    @classmethod
+    def from_lightgbm(cls, model) -> "FlatForest":
+        """
+        Converts a fitted LGBMRegressor or a regression lgb.Booster.
+        """
+        booster = model.booster_ if is_instance(model, "lightgbm", "LGBMModel") else model
+        if not is_instance(booster, "lightgbm", "Booster"):
+            raise TypeError(f"Cannot flatten {type(model).__name__}")
+        dump = booster.dump_model()
+        if dump["num_tree_per_iteration"] != 1:
+            raise ValueError("Only single-output LightGBM models can be flattened.")
+
+        objective = str(dump.get("objective", "regression")).split()[0]
+        if objective.startswith(("binary", "multiclass", "cross_entropy", "lambdarank", "rank_xendcg")):
+            raise ValueError(f"Unsupported LightGBM objective: {objective}")
+
+        nodes = {"feature": [], "threshold": [], "left": [], "right": [], "missing_left": [], "value": [],
+                 "missing_type": [], "cat_index": []}
+        cat_sets = []
+
+        def add_node(spec, depth):
+            index = len(nodes["feature"])
+            for name, default in [("feature", 0), ("threshold", 0.0), ("left", index), ("right", index),
+                                  ("missing_left", False), ("value", 0.0), ("missing_type", MISSING_NAN),
+                                  ("cat_index", -1)]:
+                nodes[name].append(default)
+            if "split_index" not in spec:
+                nodes["value"][index] = spec["leaf_value"]
+                return index, depth
+
+            nodes["feature"][index] = spec["split_feature"]
+            nodes["missing_left"][index] = spec["default_left"]
+            nodes["missing_type"][index] = _LGBM_MISSING_TYPES[spec["missing_type"]]
+            if spec["decision_type"] == "==":
+                nodes["cat_index"][index] = len(cat_sets)
+                cat_sets.append([int(c) for c in str(spec["threshold"]).split("||")])
+            else:
+                nodes["threshold"][index] = spec["threshold"]
+            nodes["left"][index], left_depth = add_node(spec["left_child"], depth + 1)
+            nodes["right"][index], right_depth = add_node(spec["right_child"], depth + 1)
+            return index, max(left_depth, right_depth)
+
+        roots, max_depth = [], 0
+        for tree in dump["tree_info"]:
+            root, depth = add_node(tree["tree_structure"], 0)
+            roots.append(root)
+            max_depth = max(max_depth, depth)
+
+        cat_table = None
+        if cat_sets:
+            cat_table = np.zeros((len(cat_sets), max(max(s) for s in cat_sets) + 1), dtype=bool)
+            for row, categories in enumerate(cat_sets):
+                cat_table[row, categories] = True
+
+        return cls(
+            roots=roots,
+            max_depth=max_depth,
+            n_features_in=dump["max_feature_idx"] + 1,
+            scale=1.0 / len(roots) if dump.get("average_output") else 1.0,
+            cat_table=cat_table,
+            output_transform="exp" if objective in _EXP_OBJECTIVES else "identity",
+            native_model=booster.model_to_string(),
+            native_min_rows=LIGHTGBM_NATIVE_MIN_ROWS,
+            **nodes,
+        )
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.children[:, 1]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.children[:, 0]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def predict(self, X, engine: str = "auto") -> np.ndarray:
+        """
+        Predicts one value per row of X (dense array, DataFrame or sparse matrix).
+
+        Args:
+          X: Input rows, n_features_in_ columns.
+          engine (str): "numpy", "native", or "auto" (native from native_min_rows rows on).
+
+        Returns:
+          np.ndarray: float64 predictions.
+        """
+        X = self._as_matrix(X)
+        if engine == "auto":
+            use_native = self.native_min_rows is not None and X.shape[0] >= self.native_min_rows
+        elif engine in ("numpy", "native"):
+            use_native = engine == "native"
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+        if use_native:
+            return self._predict_native(X)
+
+        raw = np.empty(X.shape[0], dtype=np.float64)
+        # Rows are scored in blocks so the (rows x trees) working set stays in cache
+        block = max(1, _MAX_BLOCK_CELLS // max(1, self.n_trees))
+        for start in range(0, X.shape[0], block):
+            raw[start:start + block] = self._raw_score(X[start:start + block])
+
+        raw = raw * self.scale + self.base_score
+        return np.exp(raw) if self.output_transform == "exp" else raw
+
+    def _raw_score(self, X: np.ndarray) -> np.ndarray:
+        """
+        Sum of the leaf values reached by each row of X in every tree.
+        """
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        flat_children = self.children.ravel()
+        has_nan = np.isnan(flat_x).any()
+
+        # node[r, t] is the current node of row r in tree t
+        node = np.broadcast_to(self.roots.astype(np.intp), (n_rows, self.n_trees))
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+
+        for _ in range(self.max_depth):
+            x = flat_x[row_offset + self.feature[node]]
+            go_left = x <= self.threshold[node]
+
+            if has_nan or self.missing_type is not None:
+                go_left = self._apply_missing(node, x, go_left)
+            if self.cat_index is not None:
+                self._apply_categorical(node, x, go_left)
+
+            node = flat_children[2 * node + go_left]
+
+        return self.value[node].sum(axis=1)
+
+    def _apply_missing(self, node, x, go_left):
+        nan = np.isnan(x)
+        if self.missing_type is None:
+            return np.where(nan, self.missing_left[node], go_left)
+
+        missing_type = self.missing_type[node]
+        if nan.any():
+            # MISSING_NONE / MISSING_ZERO nodes read NaN as 0.0
+            x = np.where(nan & (missing_type != MISSING_NAN), 0.0, x)
+            go_left = np.where(nan, x <= self.threshold[node], go_left)
+        missing = (nan & (missing_type == MISSING_NAN)) | (
+            (missing_type == MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD)
+        )
+        return np.where(missing, self.missing_left[node], go_left)
+
+    def _apply_categorical(self, node, x, go_left):
+        cat_index = self.cat_index[node]
+        is_cat = cat_index >= 0
+        if not is_cat.any():
+            return
+        values = x[is_cat]
+        # NaN, negative and unseen categories go right
+        valid = (values >= 0) & (values < self.cat_table.shape[1])
+        codes = np.where(valid, values, 0).astype(np.intp)
+        go_left[is_cat] = valid & self.cat_table[cat_index[is_cat], codes]
+
+    def _predict_native(self, X: np.ndarray) -> np.ndarray:
+        if self._kernel is None:
+            self._kernel = self._build_kernel()
+        if is_instance(self._kernel, "lightgbm", "Booster"):
+            return np.asarray(self._kernel.predict(X), dtype=np.float64)
+
+        # scikit-learn trees: leaf index per row, then our own leaf values
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        raw = np.zeros(X.shape[0], dtype=np.float64)
+        for root, tree in zip(self.roots, self._kernel):
+            raw += self.value[root + tree.apply(X32)]
+        return raw * self.scale + self.base_score
+
+    def _build_kernel(self):
+        """
+        Rebuilds the native model: a Booster from the stored LightGBM text, or one
+        scikit-learn Tree per tree for forests compiled from scikit-learn.
+        """
+        if self.native_model is not None:
+            import lightgbm as lgb
+            return lgb.Booster(model_str=self.native_model.tobytes().decode("utf-8"))
+        if self.input_dtype != np.float32 or self.missing_type is not None or self.cat_index is not None:
+            raise ValueError("This FlatForest has no native kernel.")
+
+        # NODE_DTYPE and Tree.__setstate__ are private scikit-learn API; this layout is
+        # the one of the scikit-learn==1.4.2 pin in requirements.txt (checked by
+        # tests/test_tree_engine.py::test_sklearn_node_layout_is_the_pinned_one).
+        from sklearn.tree._tree import NODE_DTYPE, Tree
+
+        trees = []
+        bounds = list(self.roots) + [self.n_nodes]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            own = np.arange(start, stop)
+            is_leaf = self.left[start:stop] == own
+            nodes = np.zeros(stop - start, dtype=NODE_DTYPE)
+            nodes["left_child"] = np.where(is_leaf, -1, self.left[start:stop] - start)
+            nodes["right_child"] = np.where(is_leaf, -1, self.right[start:stop] - start)
+            nodes["feature"] = np.where(is_leaf, -2, self.feature[start:stop])
+            nodes["threshold"] = np.where(is_leaf, -2.0, self.threshold[start:stop])
+            nodes["missing_go_to_left"] = self.missing_left[start:stop]
+
+            tree = Tree(self.n_features_in_, np.array([1], dtype=np.intp), 1)
+            tree.__setstate__({
+                "max_depth": self.max_depth,
+                "node_count": stop - start,
+                "nodes": nodes,
+                "values": np.array(self.value[start:stop]).reshape(-1, 1, 1),
+            })
+            trees.append(tree)
+        return trees
+
+    def _as_matrix(self, X) -> np.ndarray:
+        if is_instance(X, "scipy.sparse", "spmatrix", "sparray"):
+            X = X.toarray()
+        X = np.asarray(X, dtype=self.input_dtype).astype(np.float64, copy=False)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, expected (n_rows, {self.n_features_in_}).")
+        return np.ascontiguousarray(X)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The native kernel is rebuilt on demand, never stored
+        state["_kernel"] = None
+        return state
+
+
+def is_compilable(model) -> bool:
+    """
+    Tells whether compile_trees() supports the model.
+    """
+    return is_sklearn_trees(model) or is_instance(model, *LIGHTGBM_MODELS)
+
+
+def is_sklearn_trees(model) -> bool:
+    """
+    Tells whether the model is a scikit-learn regression forest or tree.
+    """
+    return is_instance(model, *SKLEARN_FORESTS) or is_instance(model, *SKLEARN_TREES)
+
+
+def compile_trees(model) -> FlatForest:
+    """
+    Converts a fitted tree ensemble to a FlatForest (returned as is if already compiled).
+
+    Raises:
+      TypeError: If the model is not a supported tree ensemble.
+    """
+    if isinstance(model, FlatForest):
+        return model
+    if is_sklearn_trees(model):
+        return FlatForest.from_sklearn(model)
+    if is_instance(model, *LIGHTGBM_MODELS):
+        return FlatForest.from_lightgbm(model)
+    raise TypeError(f"{type(model).__name__} is not a supported tree ensemble")
+
+
+def check_compiled(model, compiled: FlatForest, X, rtol: float = 1e-6, atol: float = 1e-6) -> float:
+    """
+    Checks that a compiled model predicts like the original on X, with both engines.
+
+    Returns:
+      float: The largest absolute difference.
+
+    Raises:
+      ValueError: If any prediction differs by more than atol + rtol * |expected|.
+    """
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    max_diff = 0.0
+    engines = ["numpy", "native"] if compiled.native_min_rows is not None else ["numpy"]
+    for engine in engines:
+        actual = compiled.predict(X, engine=engine)
+        diff = float(np.max(np.abs(actual - expected))) if len(expected) else 0.0
+        if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+            raise ValueError(
+                f"Compiled model ({engine} engine) differs from {type(model).__name__} (max abs diff {diff:.6g})"
+            )
+        max_diff = max(max_diff, diff)
+    return max_diff
@@ -0,0 +1,294 @@
+"""
+Cross-validated hyperparameter search with successive halving.
+
+The rows of a dataset are split once into a development set and a held-out test set. The
+development set is cut into K folds; each fold's preprocessor is fitted on its training
+part and the transformed matrices are kept in a FoldCache, so every candidate and every
+model type sharing an encoding reuses them instead of preprocessing again.
+
+Candidates (the default configuration plus samples of the model class SEARCH_SPACE) are
+raced with successive halving over folds: every candidate is scored on min_folds folds, the best 1/eta are promoted and
+scored on eta times as many folds, and so on until the survivors have been scored on all K
+folds. Scores already computed are kept when a candidate is promoted, so it is only fitted
+on the folds it has not seen. The (candidate, fold) fits of a rung run in parallel.
+
+Models with EARLY_STOPPING (LightGBM) are fitted with up to max_boost_rounds trees and
+stop once an inner split held out from the fold's training part (early_stopping_fraction of
+its rows) has not improved for early_stopping_rounds rounds. The validation fold is never
+seen while fitting, so their CV score compares fairly with the other model types; the best
+config keeps the mean best iteration as n_estimators.
+
+The winner is refitted on the whole development set and scored on the held-out set.
+"""
+
+import itertools
+import math
+import time
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, train_test_split
+from threadpoolctl import threadpool_limits
+
+
+class FoldCache:
+    """
+    K-fold splits of a development set and their preprocessed matrices, built once per encoding.
+
+    Attributes:
+      X (pd.DataFrame): Development features.
+      y (np.ndarray): Development target.
+      splits (list): (train_index, validation_index) pairs, fixed for every encoding.
+      build_preprocessor (callable): build_preprocessor(X, encoding) returns an unfitted
+        preprocessor and the categorical feature indices (None for one-hot).
+    """
+
+    def __init__(self, X, y, build_preprocessor, n_splits: int = 5, random_state: int = 42):
+        self.X = X
+        self.y = np.asarray(y, dtype=np.float64)
+        self.build_preprocessor = build_preprocessor
+        self.splits = list(KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X))
+        self._folds = {}
+
+    @property
+    def n_splits(self) -> int:
+        return len(self.splits)
+
+    def folds(self, encoding: str) -> list:
+        """
+        Returns one dict per fold: X_train, y_train, X_val, y_val and categorical_feature.
+        """
+        if encoding not in self._folds:
+            folds = []
+            for train_index, val_index in self.splits:
+                X_train, X_val = self.X.iloc[train_index], self.X.iloc[val_index]
+                preprocessor, categorical_feature = self.build_preprocessor(X_train, encoding)
+                folds.append({
+                    "X_train": preprocessor.fit_transform(X_train, self.y[train_index]),
+                    "y_train": self.y[train_index],
+                    "X_val": preprocessor.transform(X_val),
+                    "y_val": self.y[val_index],
+                    "categorical_feature": categorical_feature,
+                })
+            self._folds[encoding] = folds
+        return self._folds[encoding]
+
+
+def sample_candidates(search_space: dict, n_candidates: int, random_state: int = 42) -> list:
+    """
+    Draws up to n_candidates distinct configurations from a {param: [values]} space
+    (the whole grid when it is smaller).
+    """
+    names = sorted(search_space)
+    grid_size = math.prod(len(search_space[name]) for name in names)
+    if grid_size <= n_candidates:
+        return [dict(zip(names, values)) for values in itertools.product(*(search_space[n] for n in names))]
+
+    rng = np.random.default_rng(random_state)
+    seen, candidates = set(), []
+    while len(candidates) < n_candidates:
+        picks = tuple(int(rng.integers(len(search_space[name]))) for name in names)
+        if picks not in seen:
+            seen.add(picks)
+            candidates.append({name: search_space[name][i] for name, i in zip(names, picks)})
+    return candidates
+
+
+def _fit_estimator(model_class, params: dict, X_train, y_train, X_val=None, y_val=None,
+                   categorical_feature=None, early_stopping_rounds: int = None):
+    """
+    Fits one estimator, with early stopping on (X_val, y_val) when early_stopping_rounds is set.
+    """
+    estimator = model_class.make_estimator(**params)
+    fit_kwargs = {"categorical_feature": categorical_feature} if categorical_feature else {}
+    if early_stopping_rounds:
+        fit_kwargs["eval_set"] = [(X_val, y_val)]
+        fit_kwargs["callbacks"] = [lgb.early_stopping(early_stopping_rounds, verbose=False)]
+    estimator.fit(X_train, y_train, **fit_kwargs)
+    return estimator
+
+
+def _score_fold(model_class, params: dict, fold: dict, early_stopping_rounds: int = None, n_threads: int = 1,
+                early_stopping_fraction: float = 0.1, random_state: int = 42):
+    """
+    Fits a candidate on one fold and returns (validation R², best iteration or None).
+
+    With early stopping, the stopping set is an inner split of the fold's training rows,
+    so the validation fold only ever scores the fitted estimator.
+    """
+    X_train, y_train, X_stop, y_stop = fold["X_train"], fold["y_train"], None, None
+    if early_stopping_rounds:
+        fit_index, stop_index = train_test_split(np.arange(len(y_train)), test_size=early_stopping_fraction,
+                                                 random_state=random_state)
+        X_train, X_stop = fold["X_train"][fit_index], fold["X_train"][stop_index]
+        y_train, y_stop = fold["y_train"][fit_index], fold["y_train"][stop_index]
+
+    with threadpool_limits(limits=n_threads):
+        estimator = _fit_estimator(
+            model_class, params, X_train, y_train, X_stop, y_stop,
+            fold["categorical_feature"], early_stopping_rounds,
+        )
+        score = r2_score(fold["y_val"], estimator.predict(fold["X_val"]))
+    return float(score), getattr(estimator, "best_iteration_", None) or None
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive-halving hyperparameter search of one model class over a FoldCache.
+
+    Attributes:
+      model_class (type): BaseModel subclass providing SEARCH_SPACE, DEFAULT_PARAMS and make_estimator().
+      n_candidates (int): Configurations sampled from SEARCH_SPACE.
+      eta (int): Promotion ratio: the best 1/eta candidates of a rung move to the next one.
+      min_folds (int): Folds scored by every candidate in the first rung.
+      n_jobs (int): Parallel (candidate, fold) fits; -1 uses every core.
+      early_stopping_rounds (int): Patience of LightGBM early stopping.
+      early_stopping_fraction (float): Share of a fold's training rows held out to early stop on.
+      max_boost_rounds (int): Upper bound on the number of boosting rounds with early stopping.
+      random_state (int): Seed of candidate sampling and estimators.
+    """
+
+    def __init__(self, model_class, n_candidates: int = 27, eta: int = 3, min_folds: int = 1, n_jobs: int = -1,
+                 early_stopping_rounds: int = 50, early_stopping_fraction: float = 0.1, max_boost_rounds: int = 2000,
+                 random_state: int = 42):
+        if eta < 2:
+            raise ValueError("eta must be at least 2.")
+        self.model_class = model_class
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.min_folds = min_folds
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds if model_class.EARLY_STOPPING else None
+        self.early_stopping_fraction = early_stopping_fraction
+        self.max_boost_rounds = max_boost_rounds
+        self.random_state = random_state
+
+    def _candidate_params(self, candidate: dict) -> dict:
+        params = {**self.model_class.DEFAULT_PARAMS, **candidate}
+        if "random_state" in params:
+            params["random_state"] = self.random_state
+        if self.early_stopping_rounds:
+            params["n_estimators"] = self.max_boost_rounds
+        return params
+
+    def run(self, fold_cache: FoldCache, encoding: str = "onehot", verbose: bool = True) -> dict:
+        """
+        Races the candidates over the folds.
+
+        Returns:
+          dict: best_params, cv_r2 and cv_r2_std of the winner (over all folds), the rungs
+          (folds scored and number of candidates per rung) and n_fits.
+        """
+        folds = fold_cache.folds(encoding)
+        # The default configuration always takes part, so tuning cannot do worse in CV
+        candidates, seen = [], set()
+        for candidate in [{}] + sample_candidates(self.model_class.SEARCH_SPACE, self.n_candidates - 1,
+                                                  self.random_state):
+            # Skip samples equal to another candidate once the defaults are filled in
+            signature = repr(sorted(self.model_class.make_estimator(**self._candidate_params(candidate))
+                                    .get_params().items()))
+            if signature not in seen:
+                seen.add(signature)
+                candidates.append(candidate)
+        # scores[c][f] = (R², best iteration) of candidate c on fold f
+        scores = [dict() for _ in candidates]
+        survivors = list(range(len(candidates)))
+        n_folds = min(self.min_folds, len(folds))
+        rungs, n_fits = [], 0
+        n_workers = joblib.effective_n_jobs(self.n_jobs)
+
+        with joblib.Parallel(n_jobs=self.n_jobs) as parallel:
+            while True:
+                tasks = [(c, f) for c in survivors for f in range(n_folds) if f not in scores[c]]
+                # Threads per fit: the cores left over when there are fewer tasks than workers
+                n_threads = max(1, n_workers // max(1, len(tasks)))
+                results = parallel(
+                    joblib.delayed(_score_fold)(
+                        self.model_class, self._candidate_params(candidates[c]), folds[f],
+                        self.early_stopping_rounds, n_threads, self.early_stopping_fraction, self.random_state,
+                    )
+                    for c, f in tasks
+                )
+                for (c, f), result in zip(tasks, results):
+                    scores[c][f] = result
+                n_fits += len(tasks)
+
+                mean_scores = {c: np.mean([scores[c][f][0] for f in range(n_folds)]) for c in survivors}
+                rungs.append({"folds": n_folds, "candidates": len(survivors),
+                              "best_r2": float(max(mean_scores.values()))})
+                if verbose:
+                    print(f"[INFO] {self.model_class.__name__}: {len(survivors)} candidate(s) on {n_folds} fold(s), "
+                          f"best mean R² = {rungs[-1]['best_r2']:.3f}")
+
+                if n_folds == len(folds):
+                    break
+                keep = max(1, len(survivors) // self.eta)
+                survivors = sorted(survivors, key=lambda c: mean_scores[c], reverse=True)[:keep]
+                # A lone survivor goes straight to every fold, so its CV score is complete
+                n_folds = len(folds) if keep == 1 else min(len(folds), n_folds * self.eta)
+
+        best = max(survivors, key=lambda c: mean_scores[c])
+        best_scores = [scores[best][f][0] for f in range(n_folds)]
+        best_params = self._candidate_params(candidates[best])
+        if self.early_stopping_rounds:
+            iterations = [scores[best][f][1] for f in range(n_folds) if scores[best][f][1]]
+            best_params["n_estimators"] = int(round(np.mean(iterations))) if iterations else self.max_boost_rounds
+
+        return {
+            "best_params": best_params,
+            "cv_r2": float(np.mean(best_scores)),
+            "cv_r2_std": float(np.std(best_scores)),
+            "cv_folds": n_folds,
+            "n_candidates": len(candidates),
+            "rungs": rungs,
+            "n_fits": n_fits,
+        }
+
+
+def tune_dataset(X, y, model_classes: dict, build_preprocessor, encoding_for, test_size: float = 0.2,
+                 n_splits: int = 5, random_state: int = 42, verbose: bool = True, **search_kwargs) -> dict:
+    """
+    Tunes every model type on one dataset and scores each winner on a held-out set.
+
+    Args:
+      X (pd.DataFrame): Features (complete rows, as returned by DatasetTrainer._split_features).
+      y (pd.Series): Target.
+      model_classes (dict): {model_type: BaseModel subclass}.
+      build_preprocessor (callable): build_preprocessor(X, encoding) -> (preprocessor, categorical_feature).
+      encoding_for (callable): encoding_for(model_type) -> encoding shared by the fold matrices.
+      test_size (float): Share of rows held out for the final score.
+      n_splits (int): Number of CV folds on the development set.
+      **search_kwargs: Passed to SuccessiveHalvingSearch (n_candidates, eta, n_jobs, ...).
+
+    Returns:
+      dict: {model_type: search result plus held_out_r2, n_dev, n_test and wall_time}.
+    """
+    X_dev, X_test, y_dev, y_test = train_test_split(X, np.asarray(y, dtype=np.float64),
+                                                    test_size=test_size, random_state=random_state)
+    fold_cache = FoldCache(X_dev, y_dev, build_preprocessor, n_splits=n_splits, random_state=random_state)
+
+    results = {}
+    for model_type, model_class in model_classes.items():
+        start = time.perf_counter()
+        encoding = encoding_for(model_type)
+        search = SuccessiveHalvingSearch(model_class, random_state=random_state, **search_kwargs)
+        result = search.run(fold_cache, encoding=encoding, verbose=verbose)
+
+        # Refit the winner on the whole development set, score it on the held-out rows
+        preprocessor, categorical_feature = build_preprocessor(X_dev, encoding)
+        X_dev_preprocessed = preprocessor.fit_transform(X_dev, y_dev)
+        with threadpool_limits(limits=joblib.effective_n_jobs(search.n_jobs)):
+            estimator = _fit_estimator(model_class, result["best_params"], X_dev_preprocessed, y_dev,
+                                       categorical_feature=categorical_feature)
+            held_out_r2 = r2_score(y_test, estimator.predict(preprocessor.transform(X_test)))
+
+        results[model_type] = {
+            **result,
+            "held_out_r2": float(held_out_r2),
+            "n_dev": len(X_dev),
+            "n_test": len(X_test),
+            "wall_time": time.perf_counter() - start,
+        }
+    return results
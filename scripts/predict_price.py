@@ -1,6 +1,17 @@
-import joblib
+import json
+import numpy as np
 import pandas as pd
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ml_models.artifacts import load_artifact
+from ml_models.tree_engine import compile_trees, is_compilable
+from utils.constants import PREPROCESSOR_DIR
+from utils.hashing import file_sha256
+from utils.logger import span
+from utils.prediction_cache import CachedPredictor
 
 
 class PricePredictor:
@@ -9,9 +20,16 @@ class PricePredictor:
     Attributes:
       model (object): The loaded machine learning model with a 'predict' method.
       preprocessor (object, optional): The loaded preprocessor for transforming input data before prediction.
+      backend (str): "native" scores with the model as loaded. "compiled" scores tree ensembles
+        compiled to flat node arrays (see ml_models.tree_engine) and linear models through
+        their LinearFastPath (scaler folded into the coefficients, no DataFrame); other
+        models are unaffected.
+      fast_path (LinearFastPath, optional): Set when the compiled backend folded a linear model.
     Methods:
-      __init__(model_path: str, preprocessor_path: str = None):
+      __init__(model_path: str, preprocessor_path: str = None, preprocessor: object = None, backend: str = "native"):
         Initializes the PricePredictor by loading the model and optional preprocessor from the specified file paths.
+        An already loaded preprocessor can be passed instead so several predictors share one instance.
+        Raises ValueError for an unknown backend.
         Raises FileNotFoundError if the model or preprocessor file does not exist.
         Raises TypeError if the loaded model does not have a 'predict' method.
       predict(input_data: dict) -> float:
@@ -21,20 +39,42 @@ class PricePredictor:
         Returns:
           float: The predicted price.
         Prints the predicted price in a formatted string.
+      predict_batch(input_data, chunk_size: int = 10000, verbose: bool = False) -> np.ndarray:
+        Predicts prices for many listings in one vectorized pass per chunk.
+        Accepts a list of dicts, a DataFrame or a columnar dict of arrays.
+        Also available as predict_many().
     """
-    def __init__(self, model_path: str, preprocessor_path: str = None):
+    BACKENDS = ("native", "compiled")
+
+    def __init__(self, model_path: str, preprocessor_path: str = None, preprocessor: object = None,
+                 backend: str = "native"):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model not found: {model_path}")
-        self.model = joblib.load(model_path)
+        self.model_path = model_path
+        self.preprocessor_path = preprocessor_path
+        # Arrays of uncompressed artifacts are memory-mapped and shared between processes
+        self.model = load_artifact(model_path)
 
         if not hasattr(self.model, "predict"):
             raise TypeError("Loaded object is not a valid model.")
 
-        self.preprocessor = None
-        if preprocessor_path:
+        self.preprocessor = preprocessor
+        if preprocessor is None and preprocessor_path:
             if not os.path.exists(preprocessor_path):
                 raise FileNotFoundError(f"Preprocessor not found: {preprocessor_path}")
-            self.preprocessor = joblib.load(preprocessor_path)
+            self.preprocessor = load_artifact(preprocessor_path)
+
+        self.backend = backend
+        self.fast_path = None
+        if backend == "compiled":
+            # Imports the scikit-learn estimators it checks against
+            from ml_models.linear_fast_path import LinearFastPath
+            if is_compilable(self.model):
+                self.model = compile_trees(self.model)
+            elif LinearFastPath.supports(self.model, self.preprocessor):
+                self.fast_path = LinearFastPath.from_pipeline(self.model, self.preprocessor)
 
     def predict(self, input_data: dict) -> float:
         """
@@ -49,19 +89,410 @@ class PricePredictor:
         Side Effects:
           Prints the predicted price in a formatted string to the console.
         """
-        df = pd.DataFrame([input_data])
-        if self.preprocessor:
-            df = self.preprocessor.transform(df)
-        prediction = self.model.predict(df)
-        predicted_price = float(prediction[0])
+        with span("predict", model=os.path.basename(self.model_path), backend=self.backend,
+                  rows=1, cols=len(input_data)):
+            if self.fast_path is not None:
+                predicted_price = self.fast_path.predict_one(input_data)
+            else:
+                predicted_price = float(self._predict_frame(pd.DataFrame([input_data]))[0])
         print(f">>> Predicted price from input: €{predicted_price:,.0f}")
         return predicted_price
 
+    def predict_batch(self, input_data, chunk_size: int = 10000, verbose: bool = False) -> np.ndarray:
+        """
+        Predicts prices for many listings at once.
 
+        The input is converted to a single DataFrame, then transformed and scored
+        chunk by chunk so memory stays bounded on very large inputs.
 
-if __name__ == "__main__":
-    import os
+        Args:
+          input_data: A list of dicts, a pandas DataFrame or a columnar dict of arrays.
+          chunk_size (int): Maximum number of rows transformed and predicted per call.
+          verbose (bool): If True, prints a summary line once all rows are scored.
+
+        Returns:
+          np.ndarray: The predicted prices as float64, in input order.
+
+        Raises:
+          ValueError: If chunk_size is not positive, or an input column is missing or invalid.
+          TypeError: If input_data is not one of the supported types.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        with span("predict.batch", model=os.path.basename(self.model_path), backend=self.backend) as s:
+            df = self._to_frame(input_data)
+            n_rows = len(df)
+            s.set(rows=n_rows, cols=df.shape[1], fast_path=self.fast_path is not None)
+            if self.fast_path is not None:
+                # Same error as the preprocessor for missing columns
+                missing = [col for col in self.fast_path.columns if col not in df.columns]
+                if missing:
+                    raise ValueError(f"columns are missing: {missing}")
+            predict_chunk = self.fast_path.predict if self.fast_path is not None else self._predict_frame
+            predictions = np.empty(n_rows, dtype=np.float64)
+
+            for start in range(0, n_rows, chunk_size):
+                stop = min(start + chunk_size, n_rows)
+                predictions[start:stop] = predict_chunk(df.iloc[start:stop])
+
+        if verbose:
+            path = "linear fast path, " if self.fast_path is not None else ""
+            print(f">>> Predicted {n_rows:,} prices ({path}chunk_size={chunk_size})")
+        return predictions
+
+    # Alias kept for callers that prefer the "many" naming
+    predict_many = predict_batch
+
+    def _predict_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Runs the preprocessor (if any) and the model on a DataFrame of listings.
+        """
+        X = self.preprocessor.transform(df) if self.preprocessor else df
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+    @staticmethod
+    def _to_frame(input_data) -> pd.DataFrame:
+        """
+        Normalizes the supported batch input types to a DataFrame.
+        """
+        if isinstance(input_data, pd.DataFrame):
+            return input_data
+        if isinstance(input_data, dict):
+            # Columnar dict of arrays: {"surface": [...], "bedrooms": [...]}
+            if all(isinstance(v, (list, tuple, np.ndarray, pd.Series)) for v in input_data.values()):
+                return pd.DataFrame(input_data)
+            # Single listing given as a dict of scalars
+            return pd.DataFrame([input_data])
+        if isinstance(input_data, (list, tuple)):
+            return pd.DataFrame(list(input_data))
+        raise TypeError(
+            "input_data must be a list of dicts, a DataFrame or a columnar dict of arrays."
+        )
+
+
+class ModelRegistry:
+    """
+    Discovers the trained artifacts under a model directory and hands out shared
+    PricePredictor instances.
+
+    Artifacts are expected as <model_dir>/<model_type>/<dataset>_<model_type>.pkl. The matching
+    preprocessor is read from the <dataset>_<model_type>.json sidecar, which references a shared
+    artifact under <model_dir>/preprocessors/, or from a legacy <dataset>_<model_type>_preprocessor.pkl
+    next to the model. Shared preprocessors are loaded once for all models. Discovery runs once;
+    predictors are loaded lazily on first request and kept in a size-bounded LRU cache
+    keyed by (dataset, model_type, mtime). Rewriting an artifact on disk changes its key,
+    so the next request loads the new version.
+
+    With a prediction_cache, predictors are wrapped in a CachedPredictor sharing that cache;
+    the entries of a model version are invalidated when the registry loads a newer one.
+
+    Attributes:
+      base_path (str): Root directory containing one sub-directory per model type.
+      max_size (int): Maximum number of predictors kept in memory.
+      backend (str): PricePredictor backend, "native" or "compiled".
+      prediction_cache (MemoryCache or DiskCache, optional): Cache of predictions
+        (see utils.prediction_cache), None disables it.
+    """
+
+    def __init__(self, base_path: str = "local_models", max_size: int = 8, backend: str = "native",
+                 prediction_cache=None):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer.")
+        self.base_path = base_path
+        self.max_size = max_size
+        self.backend = backend
+        self.prediction_cache = prediction_cache
+        self._artifacts = None
+        self._cache = OrderedDict()
+        self._preprocessors = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def discover(self, refresh: bool = False) -> dict:
+        """
+        Scans base_path for model/preprocessor pairs.
+
+        Returns:
+          dict: {(dataset, model_type): (model_path, preprocessor_path or None)}
+        """
+        if self._artifacts is not None and not refresh:
+            return self._artifacts
+
+        artifacts = {}
+        if os.path.isdir(self.base_path):
+            for model_type in sorted(os.listdir(self.base_path)):
+                model_dir = os.path.join(self.base_path, model_type)
+                if model_type == PREPROCESSOR_DIR or not os.path.isdir(model_dir):
+                    continue
+
+                suffix = f"_{model_type}.pkl"
+                for filename in sorted(os.listdir(model_dir)):
+                    if not filename.endswith(suffix):
+                        continue
+                    dataset = filename[: -len(suffix)]
+                    artifacts[(dataset, model_type)] = (
+                        os.path.join(model_dir, filename),
+                        self._find_preprocessor(model_dir, dataset, model_type),
+                    )
+
+        self._artifacts = artifacts
+        return artifacts
+
+    def list_models(self) -> list:
+        """
+        Returns the sorted list of available (dataset, model_type) pairs.
+        """
+        return sorted(self.discover())
+
+    def get(self, dataset: str, model_type: str):
+        """
+        Returns the shared PricePredictor (a CachedPredictor with a prediction_cache) for a
+        dataset and model type.
+
+        Raises:
+          KeyError: If no artifact exists for the requested pair.
+        """
+        try:
+            model_path, preproc_path = self.discover()[(dataset, model_type)]
+        except KeyError:
+            raise KeyError(f"No model registered for dataset='{dataset}', model_type='{model_type}'") from None
+
+        key = (dataset, model_type, self._artifact_mtime(model_path, preproc_path))
+        with self._lock:
+            predictor = self._cache.get(key)
+            if predictor is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return predictor
+            self.misses += 1
+
+        # Load outside the lock so a cold model does not block lookups of hot ones
+        preprocessor = self._load_preprocessor(preproc_path) if preproc_path else None
+        predictor = PricePredictor(
+            model_path=model_path, preprocessor_path=preproc_path, preprocessor=preprocessor, backend=self.backend
+        )
+        if self.prediction_cache is not None:
+            predictor = CachedPredictor(predictor, self.prediction_cache)
+
+        with self._lock:
+            # Drop older versions of the same artifact (and their cached predictions) before
+            # inserting the new one
+            for stale in [k for k in self._cache if k[:2] == key[:2] and k != key]:
+                stale_predictor = self._cache.pop(stale)
+                if isinstance(stale_predictor, CachedPredictor):
+                    stale_predictor.cache.invalidate(stale_predictor.version)
+            predictor = self._cache.setdefault(key, predictor)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return predictor
+
+    def clear(self):
+        """
+        Empties the predictor cache and the prediction cache. Discovered artifacts are kept.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._preprocessors.clear()
+        if self.prediction_cache is not None:
+            self.prediction_cache.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._cache)
 
+    def _find_preprocessor(self, model_dir: str, dataset: str, model_type: str):
+        meta_path = os.path.join(model_dir, f"{dataset}_{model_type}.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                preprocessor_ref = json.load(f).get("preprocessor")
+            return os.path.join(self.base_path, preprocessor_ref) if preprocessor_ref else None
+
+        legacy_path = os.path.join(model_dir, f"{dataset}_{model_type}_preprocessor.pkl")
+        return legacy_path if os.path.exists(legacy_path) else None
+
+    def _load_preprocessor(self, preproc_path: str):
+        """
+        Loads a preprocessor once and shares it between every model referencing it.
+        """
+        if not os.path.exists(preproc_path):
+            raise FileNotFoundError(f"Preprocessor not found: {preproc_path}")
+        key = (preproc_path, os.stat(preproc_path).st_mtime_ns)
+        with self._lock:
+            preprocessor = self._preprocessors.get(key)
+        if preprocessor is None:
+            preprocessor = load_artifact(preproc_path)
+            with self._lock:
+                preprocessor = self._preprocessors.setdefault(key, preprocessor)
+        return preprocessor
+
+    @staticmethod
+    def _artifact_mtime(model_path: str, preproc_path: str = None) -> int:
+        mtime = os.stat(model_path).st_mtime_ns
+        if preproc_path:
+            mtime = max(mtime, os.stat(preproc_path).st_mtime_ns)
+        return mtime
+
+
+class EnsemblePredictor:
+    """
+    Scores several models in one pass, transforming the input once per distinct preprocessor.
+
+    Members are grouped by preprocessor fingerprint (SHA-256 of the artifact file, so legacy
+    per-model copies of the same preprocessor are grouped too). Each chunk of input is
+    transformed once per group and the matrix is fed to every model of the group, one
+    after another or on a thread pool (scikit-learn and LightGBM release the GIL while
+    predicting). The per-model predictions are blended by a weighted mean or a median.
+
+    Attributes:
+      members (dict): {name: PricePredictor}, name being "<dataset>_<model_type>".
+      groups (list): (preprocessor or None, [member names]) per distinct preprocessor.
+      blend (str): "mean" (weighted by weights) or "median".
+      weights (dict): {name: weight} of the mean blend (equal weights when not given).
+      n_jobs (int): Threads predicting the models of a group concurrently.
+      skip_failures (bool): If True, a group whose preprocessing or prediction fails gets
+        NaN predictions and is left out of the blend instead of raising.
+    """
+
+    BLENDS = ("mean", "median")
+
+    def __init__(self, members: dict, blend: str = "mean", weights: dict = None, n_jobs: int = 1,
+                 skip_failures: bool = False):
+        if blend not in self.BLENDS:
+            raise ValueError(f"Unknown blend '{blend}', expected one of {self.BLENDS}")
+        if weights is not None and blend != "mean":
+            raise ValueError("weights only apply to the mean blend.")
+        if not members:
+            raise ValueError("An ensemble needs at least one model.")
+        unknown = set(weights or {}) - set(members)
+        if unknown:
+            raise KeyError(f"Weights given for unknown models: {sorted(unknown)}")
+
+        # CachedPredictor wrappers are bypassed: the ensemble runs the models on shared matrices
+        self.members = {name: getattr(p, "predictor", p) for name, p in members.items()}
+        self.blend = blend
+        self.weights = {name: float((weights or {}).get(name, 1.0 if weights is None else 0.0)) for name in members}
+        self.n_jobs = n_jobs
+        self.skip_failures = skip_failures
+
+        groups = OrderedDict()
+        for name, predictor in self.members.items():
+            fingerprint = self._fingerprint(predictor)
+            groups.setdefault(fingerprint, (predictor.preprocessor, []))[1].append(name)
+        self.groups = list(groups.values())
+
+    @classmethod
+    def from_registry(cls, registry: "ModelRegistry", models=None, **kwargs) -> "EnsemblePredictor":
+        """
+        Builds an ensemble from the shared predictors of a ModelRegistry.
+
+        Args:
+          registry (ModelRegistry): Where the models are discovered and loaded.
+          models (list, optional): (dataset, model_type) pairs; every registered model by default.
+          **kwargs: blend, weights, n_jobs, skip_failures.
+        """
+        models = models if models is not None else registry.list_models()
+        members = {f"{dataset}_{model_type}": registry.get(dataset, model_type) for dataset, model_type in models}
+        return cls(members, **kwargs)
+
+    @staticmethod
+    def _fingerprint(predictor) -> str:
+        if predictor.preprocessor is None:
+            return "none"
+        if predictor.preprocessor_path and os.path.exists(predictor.preprocessor_path):
+            return file_sha256(predictor.preprocessor_path)
+        # Preprocessor passed in memory: only the same instance can be shared
+        return f"object-{id(predictor.preprocessor)}"
+
+    def predict(self, input_data: dict) -> dict:
+        """
+        Predicts one listing with every model.
+
+        Returns:
+          dict: {model name: price, ..., "ensemble": blended price}.
+        """
+        row = self.predict_batch([input_data]).iloc[0]
+        return {name: float(value) for name, value in row.items()}
+
+    def predict_batch(self, input_data, chunk_size: int = 10000, verbose: bool = False) -> pd.DataFrame:
+        """
+        Predicts many listings with every model.
+
+        Args:
+          input_data: A list of dicts, a pandas DataFrame or a columnar dict of arrays.
+          chunk_size (int): Maximum number of rows transformed and predicted per call.
+          verbose (bool): If True, prints a summary line once all rows are scored.
+
+        Returns:
+          pd.DataFrame: One float64 column per model plus the "ensemble" blend, in input order.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer.")
+        df = PricePredictor._to_frame(input_data)
+        n_rows = len(df)
+        predictions = {name: np.empty(n_rows, dtype=np.float64) for name in self.members}
+        failed = set()
+
+        with span("predict.ensemble", rows=n_rows, models=len(self.members), groups=len(self.groups)):
+            with ThreadPoolExecutor(max_workers=self.n_jobs) if self.n_jobs > 1 else _NoPool() as pool:
+                for start in range(0, n_rows, chunk_size):
+                    chunk = df.iloc[start:start + chunk_size]
+                    for preprocessor, names in self.groups:
+                        names = [name for name in names if name not in failed]
+                        if not names:
+                            continue
+                        try:
+                            X = preprocessor.transform(chunk) if preprocessor is not None else chunk
+                            scored = pool.map(lambda name: self.members[name].model.predict(X), names)
+                            for name, values in zip(names, scored):
+                                predictions[name][start:start + len(chunk)] = values
+                        except Exception as e:
+                            if not self.skip_failures:
+                                raise
+                            print(f"[WARNING] Ensemble members {', '.join(names)} failed: {e}")
+                            failed.update(names)
+
+        for name in failed:
+            predictions[name][:] = np.nan
+        result = pd.DataFrame(predictions, index=df.index if isinstance(input_data, pd.DataFrame) else None)
+        result["ensemble"] = self._blend(result[list(self.members)].to_numpy(), failed)
+        if verbose:
+            print(f">>> Predicted {n_rows:,} prices with {len(self.members) - len(failed)} model(s) "
+                  f"({len(self.groups)} preprocessing pass(es) per chunk, blend={self.blend})")
+        return result
+
+    predict_many = predict_batch
+
+    def _blend(self, matrix: np.ndarray, failed: set) -> np.ndarray:
+        active = np.array([name not in failed for name in self.members])
+        if not active.any():
+            return np.full(matrix.shape[0], np.nan)
+        if self.blend == "median":
+            return np.median(matrix[:, active], axis=1)
+        weights = np.array([self.weights[name] for name in self.members])[active]
+        if weights.sum() <= 0:
+            raise ValueError("The weights of the models left in the ensemble sum to 0.")
+        return matrix[:, active] @ (weights / weights.sum())
+
+
+class _NoPool:
+    """
+    Sequential stand-in for ThreadPoolExecutor when n_jobs=1.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @staticmethod
+    def map(fn, items):
+        return [fn(item) for item in items]
+
+
+if __name__ == "__main__":
     base_path = "local_models"
 
     # Base sample input
@@ -100,26 +531,28 @@ if __name__ == "__main__":
     }
     sample.update(expected_columns)
 
+    # Extend sample with the immovlan categorical columns
+    sample.update({
+        "town": "kortrijk",
+        "city": "Kortrijk",
+        "terrace": "Yes" if sample.get("has_terrace", False) else "No",
+        "terrace_orientation": "South",
+        "condition": "Normal",
+        "kitchen_equipment": "Fully equipped",
+        "cellar": "No",
+        "glazing_type": "Double glass",
+        "elevator": "No",
+        "entry_phone": "Yes",
+    })
 
 
-    for model_type in os.listdir(base_path):
-        model_dir = os.path.join(base_path, model_type)
-        if not os.path.isdir(model_dir):
-            continue
-
-        for filename in os.listdir(model_dir):
-            if filename.endswith(".pkl") and "preprocessor" not in filename:
-                model_path = os.path.join(model_dir, filename)
-
-                # Try to find matching preprocessor
-                preproc_name = filename.replace(".pkl", "_preprocessor.pkl")
-                preproc_path = os.path.join(model_dir, preproc_name)
-                preproc_path = preproc_path if os.path.exists(preproc_path) else None
+    registry = ModelRegistry(base_path=base_path)
 
-                print(f"\n>>> Predicting with model file: {filename}")
-                try:
-                    predictor = PricePredictor(model_path=model_path, preprocessor_path=preproc_path)
-                    predicted_price = predictor.predict(sample)
-                    print(f">>> Predicted price: €{predicted_price:,.0f}")
-                except Exception as e:
-                    print(f">>> ERROR: Prediction failed for {filename} – {e}")
+    # Every model in one pass: each distinct preprocessor transforms the sample once
+    ensemble = EnsemblePredictor.from_registry(registry, blend="median", skip_failures=True)
+    print(f">>> Scoring {len(ensemble.members)} model(s) with {len(ensemble.groups)} preprocessor(s)")
+    for name, predicted_price in ensemble.predict(sample).items():
+        if np.isnan(predicted_price):
+            print(f">>> ERROR: Prediction failed for {name}")
+        else:
+            print(f">>> Predicted price ({name}): €{predicted_price:,.0f}")
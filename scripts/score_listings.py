@@ -0,0 +1,481 @@
+import os
+import json
+import shutil
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from tqdm import tqdm
+
+from scripts.predict_price import EnsemblePredictor, ModelRegistry
+from utils.column_mapper import get_resolver, load_column_mapping
+from utils.constants import EXCLUDE_COLUMNS, POSTAL_CODE_SOURCES, PROFILE_DIR
+from utils.logger import span
+from utils.preprocessing import clean_dataframe, numeric_text_columns, strip_text
+from utils.profiling import DatasetProfile, drift_report, print_drift_report
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Scoring state of the current process, set once per worker by _init_worker
+_WORKER = {}
+
+
+def feature_columns(ensemble: EnsemblePredictor) -> tuple:
+    """
+    Lists the numeric and categorical input columns of every model of an ensemble.
+
+    Returns:
+      tuple: (numeric columns, categorical columns), in first-seen order.
+    """
+    numeric, categorical = [], []
+    for preprocessor, names in ensemble.groups:
+        if preprocessor is None:
+            for name in names:
+                numeric += list(getattr(ensemble.members[name].model, "feature_names_in_", []))
+            continue
+        for transformer_name, _, cols in preprocessor.transformers_:
+            if transformer_name in ("num", "geo"):
+                numeric += list(cols)
+            elif transformer_name == "cat":
+                categorical += list(cols)
+    numeric = list(dict.fromkeys(numeric))
+    return numeric, [col for col in dict.fromkeys(categorical) if col not in numeric]
+
+
+def score_chunk(ensemble: EnsemblePredictor, chunk: pd.DataFrame, first_row: int, target: str, numeric_cols: list,
+                keep_columns=(), profile: DatasetProfile = None) -> pd.DataFrame:
+    """
+    Cleans a chunk of standardized listings and scores it with every model of the ensemble.
+
+    Listings are cleaned as for training (clean_dataframe with the given numeric text
+    columns). As in training, only rows with every numeric input present are scored;
+    the others get NaN predictions.
+
+    Args:
+      ensemble (EnsemblePredictor): The models to score.
+      chunk (pd.DataFrame): Listings with standard column names.
+      first_row (int): Position of the first listing of the chunk in the input file.
+      target (str): Target column, parsed like the other numeric text columns if present.
+      numeric_cols (list): Numeric text columns to parse (fixed once per job).
+      keep_columns (iterable): Input columns copied to the output as text (e.g. "url").
+      profile (DatasetProfile, optional): Updated with the cleaned chunk (see utils.profiling).
+
+    Returns:
+      pd.DataFrame: "row", the kept columns, one column per model and "ensemble".
+    """
+    chunk = clean_dataframe(chunk.reset_index(drop=True), target, numeric_cols=numeric_cols)
+    if profile is not None:
+        profile.update(chunk)
+    numeric, categorical = feature_columns(ensemble)
+
+    X = chunk.reindex(columns=numeric)
+    for col in X.select_dtypes(exclude="number").columns:
+        X[col] = pd.to_numeric(X[col], errors="coerce")
+    X = X.astype(np.float64)
+    for col in categorical:
+        X[col] = strip_text(chunk[col]) if col in chunk.columns else "nan"
+    complete = X[numeric].notna().all(axis=1).to_numpy()
+
+    out = pd.DataFrame({"row": np.arange(first_row, first_row + len(chunk), dtype=np.int64)})
+    for col in keep_columns:
+        out[col] = chunk[col].astype("string") if col in chunk.columns else pd.Series(pd.NA, index=out.index,
+                                                                                          dtype="string")
+    for name in list(ensemble.members) + ["ensemble"]:
+        out[name] = np.nan
+    if complete.any():
+        predictions = ensemble.predict_batch(X[complete])
+        out.loc[complete, predictions.columns] = predictions.to_numpy()
+    return out
+
+
+def _init_worker(config: dict):
+    """
+    Loads the models of a scoring job once per process.
+    """
+    threadpool_limits(limits=config["n_threads"])
+    registry = ModelRegistry(config["model_dir"], backend=config["backend"])
+    _WORKER.clear()
+    _WORKER.update(config)
+    _WORKER["ensemble"] = EnsemblePredictor.from_registry(registry, config["models"], blend=config["blend"])
+    if config["profile_kinds"] is None:
+        # No training profile to follow: profile the model inputs and the target
+        numeric, categorical = feature_columns(_WORKER["ensemble"])
+        _WORKER["profile_kinds"] = {**dict.fromkeys(numeric + [config["target"]], "numeric"),
+                                    **dict.fromkeys(categorical, "categorical")}
+
+
+def _score_part(index: int, first_row: int, chunk: pd.DataFrame) -> tuple:
+    """
+    Scores one chunk and writes its predictions and the profile of its listings to part
+    files of the job.
+
+    The part is written under a temporary name and renamed, so a part file is always complete.
+
+    Returns:
+      tuple: (chunk index, rows, rows scored).
+    """
+    with span("score.chunk", index=index, rows=len(chunk)):
+        profile = DatasetProfile(_WORKER["profile_kinds"])
+        out = score_chunk(_WORKER["ensemble"], chunk, first_row, _WORKER["target"], _WORKER["numeric_cols"],
+                          _WORKER["keep_columns"], profile=profile)
+        profile.save(os.path.join(_WORKER["parts_dir"], f"part-{index:06d}.profile.json"))
+        path = os.path.join(_WORKER["parts_dir"], f"part-{index:06d}.{_WORKER['format']}")
+        tmp_path = path + ".tmp"
+        if _WORKER["format"] == "parquet":
+            out.to_parquet(tmp_path, index=False)
+        else:
+            out.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return index, len(out), int(out["ensemble"].notna().sum())
+
+
+class BulkScorer:
+    """
+    Scores a CSV or Parquet file of listings in chunks on a process pool.
+
+    The main process reads the input chunk by chunk with the column mapping (only the
+    selected columns, standard names), and each worker cleans, scores and writes the
+    predictions of one chunk to a part file. At most max_pending chunks are in flight, so
+    memory stays bounded whatever the size of the input. When every chunk is scored, the
+    parts are merged in input order into the output file.
+
+    Every chunk is also profiled (see utils.profiling): the merged profile is saved next to
+    the output (predictions.csv gets predictions.profile.json) and compared with the
+    training profile of the first model's dataset, if one was saved.
+
+    The parts and a checkpoint listing the finished chunks live in "<output>.parts/": an
+    interrupted job started again with the same input (size and mtime), models and
+    settings skips the finished chunks instead of starting from zero.
+
+    Attributes:
+      models (list): (dataset, model_type) pairs to score.
+      model_dir (str): Where the models are discovered (see ModelRegistry).
+      chunk_size (int): Listings per chunk.
+      n_workers (int): Scoring processes; 1 scores in this process.
+      backend (str): PricePredictor backend ("native" or "compiled").
+      blend (str): Ensemble blend of the "ensemble" column ("mean" or "median").
+      keep_columns (list): Input columns copied to the output (e.g. "url").
+      max_pending (int): Chunks read but not yet scored (default 2 per worker).
+    """
+
+    FORMATS = ("csv", "parquet")
+
+    def __init__(self, models, model_dir: str = "local_models", chunk_size: int = 50000, n_workers: int = 1,
+                 backend: str = "native", blend: str = "mean", target: str = "price", keep_columns=("url",),
+                 mapping_path: str = "configs/feature_mapping.yaml", max_pending: int = None):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer.")
+        self.models = [tuple(m) for m in models]
+        self.model_dir = model_dir
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.backend = backend
+        self.blend = blend
+        self.target = target
+        self.keep_columns = list(keep_columns)
+        self.max_pending = max_pending or 2 * n_workers
+        self.resolver = get_resolver(load_column_mapping(mapping_path))
+        # The postal code sources are parsed for clean_dataframe even when not kept
+        self.exclude = [col for col in EXCLUDE_COLUMNS if col not in self.keep_columns + POSTAL_CODE_SOURCES]
+
+    @staticmethod
+    def _format(path: str) -> str:
+        fmt = os.path.splitext(path)[1].lower().lstrip(".")
+        if fmt not in BulkScorer.FORMATS:
+            raise ValueError(f"Unsupported file type '{path}', expected one of {BulkScorer.FORMATS}")
+        return fmt
+
+    def score(self, input_path: str, output_path: str, restart: bool = False, progress: bool = True) -> dict:
+        """
+        Scores every listing of input_path and writes the predictions to output_path.
+
+        Args:
+          input_path (str): .csv or .parquet file of listings (any mapped column names).
+          output_path (str): .csv or .parquet file of predictions: "row" (position in the
+            input), the kept columns, one column per model and "ensemble".
+          restart (bool): Discard the checkpoint of a previous run instead of resuming it.
+          progress (bool): Show a tqdm progress bar.
+
+        Returns:
+          dict: rows, scored (rows with a prediction), chunks, resumed_chunks, profile (path
+          of the listings profile), wall_time.
+        """
+        start = time.perf_counter()
+        input_format, output_format = self._format(input_path), self._format(output_path)
+        # Validates the models before any chunk is read
+        ensemble = EnsemblePredictor.from_registry(ModelRegistry(self.model_dir, backend=self.backend), self.models,
+                                                   blend=self.blend)
+
+        parts_dir = output_path + ".parts"
+        checkpoint = self._load_checkpoint(parts_dir, input_path, output_format, restart)
+        if checkpoint is None:
+            first = next(self._iter_input(input_path, input_format, 0), (0, pd.DataFrame()))[1]
+            checkpoint = self._new_checkpoint(parts_dir, input_path, output_format,
+                                              numeric_text_columns(first, self.target))
+        completed = {int(index): rows for index, rows in checkpoint["completed"].items()}
+        # Chunks before the first unfinished one are not parsed again
+        resume_index = next(i for i in range(len(completed) + 1) if i not in completed)
+        if completed:
+            print(f"[INFO] Resuming {os.path.basename(input_path)}: {len(completed)} chunk(s), "
+                  f"{sum(completed.values()):,} row(s) already scored")
+
+        reference = self._reference_profile()
+        config = {
+            "profile_kinds": reference.kinds if reference is not None else None,
+            "model_dir": self.model_dir, "models": self.models, "backend": self.backend, "blend": self.blend,
+            "target": self.target, "numeric_cols": checkpoint["numeric_cols"], "keep_columns": self.keep_columns,
+            "parts_dir": parts_dir, "format": output_format,
+            "n_threads": max(1, (os.cpu_count() or 1) // self.n_workers),
+        }
+        total_rows = self._count_rows(input_path, input_format)
+        bar = tqdm(total=total_rows, initial=sum(completed.values()), unit="rows", disable=not progress,
+                   desc=os.path.basename(input_path))
+
+        def finish(index, rows, scored):
+            completed[index] = rows
+            checkpoint["completed"][str(index)] = rows
+            checkpoint["scored"] = checkpoint.get("scored", 0) + scored
+            self._save_checkpoint(parts_dir, checkpoint)
+            bar.update(rows)
+
+        chunks = (
+            (index, first_row, chunk)
+            for index, (first_row, chunk) in enumerate(
+                self._iter_input(input_path, input_format, resume_index * self.chunk_size), start=resume_index)
+            if index not in completed
+        )
+        with span("score.job", input=os.path.basename(input_path), models=len(ensemble.members),
+                  workers=self.n_workers) as s:
+            try:
+                if self.n_workers <= 1:
+                    _init_worker(config)
+                    for index, first_row, chunk in chunks:
+                        finish(*_score_part(index, first_row, chunk))
+                else:
+                    self._score_parallel(chunks, config, finish)
+            finally:
+                bar.close()
+
+            n_chunks = len(completed)
+            self._merge_parts(parts_dir, n_chunks, output_format, output_path)
+            profile = self._merge_profiles(parts_dir, n_chunks)
+            profile_path = os.path.splitext(output_path)[0] + ".profile.json"
+            profile.save(profile_path)
+            shutil.rmtree(parts_dir)
+            summary = {
+                "rows": sum(completed.values()),
+                "scored": checkpoint.get("scored", 0),
+                "chunks": n_chunks,
+                "resumed_chunks": resume_index,
+                "profile": profile_path,
+                "wall_time": time.perf_counter() - start,
+            }
+            s.set(rows=summary["rows"], chunks=n_chunks)
+
+        print(f"[OK] Scored {summary['scored']:,} of {summary['rows']:,} listing(s) with {len(ensemble.members)} "
+              f"model(s) in {summary['wall_time']:.1f}s: {output_path}")
+        if reference is not None:
+            print_drift_report(drift_report(reference, profile), name=os.path.basename(input_path))
+        return summary
+
+    def _reference_profile(self):
+        """
+        Returns the training profile of the first model's dataset, or None if there is none.
+        """
+        path = os.path.join(self.model_dir, PROFILE_DIR, f"{self.models[0][0]}.json")
+        return DatasetProfile.load(path) if os.path.exists(path) else None
+
+    @staticmethod
+    def _merge_profiles(parts_dir: str, n_chunks: int) -> DatasetProfile:
+        """
+        Merges the profiles of the part files (parts written before profiling are skipped).
+        """
+        profile = DatasetProfile()
+        for index in range(n_chunks):
+            path = os.path.join(parts_dir, f"part-{index:06d}.profile.json")
+            if os.path.exists(path):
+                profile.merge(DatasetProfile.load(path))
+        return profile
+
+    def _score_parallel(self, chunks, config: dict, finish):
+        """
+        Scores the chunks on a process pool, keeping at most max_pending of them in flight.
+        """
+        print(f"[INFO] Parallel scoring: {self.n_workers} worker(s) x {config['n_threads']} thread(s)")
+        with ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                 initargs=(config,)) as executor:
+            pending = set()
+            for index, first_row, chunk in chunks:
+                if len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(*future.result())
+                pending.add(executor.submit(_score_part, index, first_row, chunk))
+            for future in wait(pending).done:
+                finish(*future.result())
+
+    def _iter_input(self, path: str, fmt: str, start: int):
+        """
+        Yields (first row, chunk) for the chunks of chunk_size listings from row start on,
+        with standard column names.
+        """
+        if fmt == "csv":
+            chunks = self.resolver.iter_csv(path, self.chunk_size, exclude=self.exclude + [self.target],
+                                            verbose=start == 0, start=start)
+            for i, chunk in enumerate(chunks):
+                yield start + i * self.chunk_size, chunk
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        schema = self.resolver.resolve(parquet.schema_arrow.names, exclude=self.exclude + [self.target])
+        # Whole row groups before start are not read
+        row_groups, offset = [], 0
+        for i in range(parquet.num_row_groups):
+            n_rows = parquet.metadata.row_group(i).num_rows
+            if row_groups or offset + n_rows > start:
+                row_groups.append(i)
+            else:
+                offset += n_rows
+
+        buffered, n_buffered, first_row = [], 0, start
+        skip = start - offset
+        for batch in parquet.iter_batches(batch_size=self.chunk_size, row_groups=row_groups,
+                                          columns=schema.usecols):
+            if skip:
+                dropped = min(skip, batch.num_rows)
+                batch, skip = batch.slice(dropped), skip - dropped
+            buffered.append(batch)
+            n_buffered += batch.num_rows
+            while n_buffered >= self.chunk_size:
+                table = pa.Table.from_batches(buffered)
+                yield first_row, schema.apply(table.slice(0, self.chunk_size).to_pandas())
+                rest = table.slice(self.chunk_size)
+                buffered, n_buffered = rest.to_batches(), rest.num_rows
+                first_row += self.chunk_size
+        if n_buffered:
+            yield first_row, schema.apply(pa.Table.from_batches(buffered).to_pandas())
+
+    @staticmethod
+    def _count_rows(path: str, fmt: str):
+        """
+        Number of listings of a Parquet file (from its metadata); None for a CSV.
+        """
+        if fmt != "parquet":
+            return None
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+
+    def _job_key(self, input_path: str, output_format: str) -> dict:
+        stat = os.stat(input_path)
+        return {
+            "input": os.path.abspath(input_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "models": [list(m) for m in self.models], "chunk_size": self.chunk_size, "backend": self.backend,
+            "blend": self.blend, "keep_columns": self.keep_columns, "format": output_format,
+        }
+
+    def _load_checkpoint(self, parts_dir: str, input_path: str, output_format: str, restart: bool):
+        """
+        Returns the checkpoint of an interrupted run of the same job, or None.
+
+        Parts of a different job (or all of them with restart) are deleted.
+        """
+        path = os.path.join(parts_dir, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+        if not restart and checkpoint.get("job") == self._job_key(input_path, output_format):
+            return checkpoint
+        if not restart:
+            print(f"[WARNING] {parts_dir} belongs to another input or settings, starting from zero")
+        shutil.rmtree(parts_dir)
+        return None
+
+    def _new_checkpoint(self, parts_dir: str, input_path: str, output_format: str, numeric_cols: list) -> dict:
+        os.makedirs(parts_dir, exist_ok=True)
+        checkpoint = {"job": self._job_key(input_path, output_format), "numeric_cols": numeric_cols,
+                      "completed": {}, "scored": 0}
+        self._save_checkpoint(parts_dir, checkpoint)
+        return checkpoint
+
+    @staticmethod
+    def _save_checkpoint(parts_dir: str, checkpoint: dict):
+        path = os.path.join(parts_dir, CHECKPOINT_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _merge_parts(parts_dir: str, n_chunks: int, fmt: str, output_path: str):
+        """
+        Concatenates the part files in input order, one part in memory at a time.
+        """
+        parts = [os.path.join(parts_dir, f"part-{index:06d}.{fmt}") for index in range(n_chunks)]
+        tmp_path = output_path + ".tmp"
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            writer = None
+            for part in parts:
+                table = pq.read_table(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            if writer is not None:
+                writer.close()
+        else:
+            with open(tmp_path, "wb") as out:
+                for i, part in enumerate(parts):
+                    with open(part, "rb") as f:
+                        if i > 0:
+                            f.readline()
+                        shutil.copyfileobj(f, out)
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, output_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of listings with trained models.")
+    parser.add_argument("input", help="Listings to score (.csv or .parquet, any mapped column names)")
+    parser.add_argument("output", help="Predictions file (.csv or .parquet)")
+    parser.add_argument("--dataset", default="immovlan_real_estate",
+                        help="Score with every model trained on this dataset (default: immovlan_real_estate)")
+    parser.add_argument("--models", nargs="+", metavar="DATASET:MODEL_TYPE",
+                        help="Models to score instead, e.g. immovlan_real_estate:dgbm")
+    parser.add_argument("--model-dir", default="local_models")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of scoring processes (default: 1, in this process)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Listings per chunk (default: 50000)")
+    parser.add_argument("--backend", default="native", choices=["native", "compiled"])
+    parser.add_argument("--blend", default="mean", choices=["mean", "median"])
+    parser.add_argument("--keep", nargs="*", default=["url"],
+                        help="Input columns copied to the predictions (default: url)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint of an interrupted run and start from zero")
+    parser.add_argument("--no-progress", action="store_true", help="Hide the progress bar")
+    args = parser.parse_args()
+
+    if args.models:
+        models = [tuple(m.split(":", 1)) for m in args.models]
+    else:
+        models = [m for m in ModelRegistry(args.model_dir).list_models() if m[0] == args.dataset]
+    if not models:
+        raise SystemExit(f"[ERROR] No models found for dataset '{args.dataset}' in {args.model_dir}")
+
+    print(f">>> Scoring {args.input} with {len(models)} model(s): {', '.join(f'{d}:{m}' for d, m in models)}")
+    BulkScorer(
+        models,
+        model_dir=args.model_dir,
+        chunk_size=args.chunk_size,
+        n_workers=args.workers,
+        backend=args.backend,
+        blend=args.blend,
+        keep_columns=args.keep,
+    ).score(args.input, args.output, restart=args.restart, progress=not args.no_progress)
@@ -1,167 +1,895 @@
 import os
+import io
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import numpy as np
 import pandas as pd
 import joblib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sklearn.metrics import r2_score
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
 
+from ml_models.artifacts import load_artifact, save_artifact
+from ml_models.backends import is_instance
+from ml_models.tree_engine import check_compiled, compile_trees, is_compilable
 from ml_models.model_factory import ModelFactory
-from utils.column_mapper import load_column_mapping, standardize_columns
-
+from utils.column_mapper import load_column_mapping, mapping_sha256
+from utils.constants import EXCLUDE_COLUMNS, POSTAL_CODE_SOURCES, PREPROCESSOR_DIR, PROFILE_DIR, TUNING_DIR
+from utils.data_loader import CachedDatasetLoader
+from utils.logger import span
+from utils.profiling import DatasetProfile
+from utils.preprocessing import (
+    build_preprocessor, categorical_feature_indices, clean_dataframe, numeric_text_columns, strip_text
+)
+from utils.training_manifest import TrainingManifest, code_version, config_sha256, data_fingerprint
+
+
+def _run_training_job(trainer, dataset_name, model_type, X, y, preprocessor_ref, categorical_feature, n_threads):
+    """
+    Process-pool entry point: trains one (dataset, model_type) pair with a bounded
+    number of native threads so parallel jobs do not oversubscribe the cores.
+    """
+    # Arrays unpickled in the worker are read-only, which scikit-learn 1.4 validation
+    # rejects; a copy gives the job its own writeable buffers.
+    X, y = X.copy(), y.copy()
+    with threadpool_limits(limits=n_threads):
+        return trainer._train_model(
+            dataset_name, model_type, X, y, preprocessor_ref,
+            categorical_feature=categorical_feature, n_threads=n_threads
+        )
 
 
 class DatasetTrainer:
-    def __init__(self, data_dir="data", model_dir="local_models", target="price", model_types=["rf", "lr", "dgbm"]):
+    # Columns to exclude from training
+    EXCLUDE_COLUMNS = EXCLUDE_COLUMNS
+
+    # Model types using native categorical features instead of one-hot in memory_efficient mode
+    NATIVE_CATEGORICAL_MODELS = {"dgbm"}
+
+    # Model types fitted on one-hot categoricals outside streaming mode: integer codes would
+    # be an arbitrary (alphabetical) ordinal feature for a linear model
+    ONEHOT_MODELS = {"lr"}
+
+    # (postal code, surface) columns of the per-postal-code features (see _build_preprocessor)
+    POSTAL_COLUMNS = ["postal_code", "surface"]
+
+    # Model types that continue boosting on appended rows in incremental mode, and the number
+    # of such updates after which the next append triggers a full fit again (trees fitted on
+    # the appended rows only drift from a fit on the whole dataset)
+    CONTINUED_BOOSTING_MODELS = {"dgbm"}
+    MAX_CONTINUED_UPDATES = 5
+
+    def __init__(self, data_dir="data", model_dir="local_models", target="price", model_types=["rf", "lr", "dgbm"],
+                 n_workers=1, cache_dir="data/.cache", chunk_size=None, memory_efficient=False,
+                 compress=0, compile_trees=False, tuned_params=False, incremental=False):
         self.data_dir = data_dir
         self.model_dir = model_dir
         self.target = target
         self.model_types = model_types
+        self.n_workers = n_workers
+        # Rows per chunk in streaming mode (None loads each dataset in memory)
+        self.chunk_size = chunk_size
+        # float32 numerics, sparse one-hot and native LightGBM categoricals (see build_preprocessor)
+        self.memory_efficient = memory_efficient
+        # 0 saves memory-mappable model artifacts, 1-9 the compressed cold-storage variant
+        self.compress = compress
+        # Save tree ensembles as flat node arrays (see ml_models.tree_engine)
+        self.compile_trees = compile_trees
+        # Use the best hyperparameters saved by scripts/tune_models.py when available
+        self.tuned_params = tuned_params
+        # Only retrain the (dataset, model_type) pairs whose inputs changed (see utils.training_manifest)
+        self.incremental = incremental
         self.mapping_dict = load_column_mapping()
+        # Cleaned snapshots of the raw CSVs (cache_dir=None disables them); excluded columns are not parsed
+        self.loader = CachedDatasetLoader(self.mapping_dict, DatasetTrainer.clean_dataframe, cache_dir=cache_dir,
+                                          exclude_columns=self.EXCLUDE_COLUMNS)
+        # Input fingerprints of the pairs planned in this run and raw row counts of the loaded datasets
+        self._inputs = {}
+        self._dataset_rows = {}
 
 
     @staticmethod
     def clean_dataframe(df: pd.DataFrame, target: str) -> pd.DataFrame:
         """
-        Cleans the dataframe before training:
-        - Cleans price and surface columns (removes currency, spaces, symbols)
-        - Converts numerical columns to float
+        Cleans the dataframe before training (see utils.preprocessing.clean_dataframe):
+        - Parses price, surface and EPC columns to float in one pass per column
+        - Parses any other object column holding numbers with a unit
         - Strips text from categorical columns
-        - Handles known object columns that must be numeric
         """
+        return clean_dataframe(df, target)
 
-        import re
 
-        # Columns to clean as numeric (if present)
-        numeric_cols = [
-            target, "surface", "terrace_surface", "bedroom1_surface",
-            "bedroom2_surface", "epc_score", "epc_total"
-        ]
+    def train_all(self):
+        """
+        Trains every model type on every CSV in data_dir.
 
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = (
-                    df[col]
-                    .astype(str)
-                    .str.replace("€", "", regex=False)
-                    .str.replace("m²", "", regex=False)
-                    .str.replace("%", "", regex=False)
-                    .str.replace("\u202f", "", regex=False)
-                    .str.replace("\xa0", "", regex=False)
-                    .str.replace(",", ".", regex=False)
-                    .str.replace(r"[^\d.]", "", regex=True)
-                )
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+        With chunk_size set, every dataset is streamed in chunks (see _train_dataset_streaming).
+        Otherwise, with n_workers > 1 the (dataset, model_type) jobs run on a process pool,
+        or one after another in this process.
 
-        # Optional: strip whitespace from text columns
-        for col in df.select_dtypes(include="object").columns:
-            df[col] = df[col].astype(str).str.strip()
+        Every trained artifact is recorded in the training manifest. With incremental, pairs
+        whose inputs are unchanged are skipped and LightGBM models of datasets that only got
+        appended rows continue boosting on them (see _plan).
 
-        return df
+        Returns:
+          list: One result dict per job with dataset, model_type, status, r2, wall_time and error.
+        """
+        manifest = TrainingManifest(self.model_dir)
+        self._inputs, self._dataset_rows = {}, {}
+        results = []
+        with span("train.all", n_workers=self.n_workers, chunk_size=self.chunk_size,
+                  memory_efficient=self.memory_efficient, incremental=self.incremental):
+            pending = list(self._pending_datasets(manifest, results))
+            if self.chunk_size:
+                for filename, plan in pending:
+                    results.extend(self._train_dataset_streaming(filename, model_types=list(plan)))
+            elif self.n_workers > 1:
+                results.extend(self._train_all_parallel(pending, manifest))
+            else:
+                for filename, plan in pending:
+                    loaded = self._load_dataset(filename)
+                    if loaded is None:
+                        continue
+                    dataset_name, X, y = loaded
+                    print(f"\n[INFO] Training models for dataset: {dataset_name}...")
+                    results.extend(self._train_models_for_dataset(dataset_name, X, y, plan, manifest))
+
+        self._update_manifest(manifest, results)
+        self._print_summary(results)
+        return results
+
+
+    def _pending_datasets(self, manifest, results):
+        """
+        Yields (filename, plan) for every CSV of data_dir with at least one model type to
+        train, where plan maps each of those model types to "fit" or "continue". Up-to-date
+        pairs are appended to results as skipped.
+        """
+        for filename in sorted(os.listdir(self.data_dir)):
+            if not filename.endswith(".csv"):
+                continue
+            dataset_name = os.path.splitext(filename)[0]
+            try:
+                plan = self._plan(filename, manifest)
+            except Exception as e:
+                print(f"[ERROR] Failed to fingerprint {filename}: {str(e)}")
+                results.extend(self._job_result(dataset_name, m, error=str(e)) for m in self.model_types)
+                continue
 
+            for model_type in [m for m, action in plan.items() if action == "skip"]:
+                print(f"[SKIPPED] {model_type} for {dataset_name} is up to date")
+                results.append(self._job_result(dataset_name, model_type, skipped=True))
+            plan = {m: action for m, action in plan.items() if action != "skip"}
+            if plan:
+                yield filename, plan
 
-    def train_all(self):
-        for filename in os.listdir(self.data_dir):
-            if not filename.endswith(".csv"):
+
+    def _plan(self, filename, manifest):
+        """
+        Fingerprints the inputs of every model type of one CSV and decides what to do with it.
+
+        Returns:
+          dict: {model_type: "fit" | "continue" | "skip"}. Without incremental every
+          model type is "fit".
+        """
+        dataset_path = os.path.join(self.data_dir, filename)
+        dataset_name = os.path.splitext(filename)[0]
+        data = data_fingerprint(dataset_path, previous=manifest.data(dataset_name))
+        mapping_hash, code_hash = mapping_sha256(self.mapping_dict), code_version()
+
+        plan = {}
+        for model_type in self.model_types:
+            inputs = {
+                "data": data,
+                "mapping": mapping_hash,
+                "config": config_sha256(self._model_config(dataset_name, model_type)),
+                "code": code_hash,
+            }
+            self._inputs[(dataset_name, model_type)] = inputs
+            status = manifest.status(dataset_name, model_type, inputs, dataset_path) if self.incremental else "stale"
+            if status == "up_to_date":
+                plan[model_type] = "skip"
+            elif (status == "appended" and model_type in self.CONTINUED_BOOSTING_MODELS and not self.chunk_size
+                  and manifest.get(dataset_name, model_type)["continued"] < self.MAX_CONTINUED_UPDATES):
+                plan[model_type] = "continue"
+            else:
+                plan[model_type] = "fit"
+        return plan
+
+
+    def _model_config(self, dataset_name, model_type):
+        """
+        Returns the training settings an artifact depends on, hashed into its manifest entry.
+        """
+        return {
+            "target": self.target,
+            "model_type": model_type,
+            "params": self._model_params(dataset_name, model_type, verbose=False),
+            "encoding": self._encoding_for(model_type),
+            "exclude_columns": self.EXCLUDE_COLUMNS,
+            "memory_efficient": self.memory_efficient,
+            "streaming": bool(self.chunk_size),
+            "compress": self.compress,
+            "compile_trees": self.compile_trees,
+        }
+
+
+    def _update_manifest(self, manifest, results):
+        """
+        Records the artifacts trained in this run and writes the manifest.
+        """
+        updated = False
+        for res in results:
+            if res["status"] != "ok":
                 continue
+            dataset_name, model_type = res["dataset"], res["model_type"]
+            manifest.record(
+                dataset_name, model_type,
+                artifact=f"{model_type}/{dataset_name}_{model_type}.pkl",
+                inputs=self._inputs[(dataset_name, model_type)],
+                rows=self._dataset_rows.get(dataset_name), r2=res["r2"], continued=res["continued"],
+            )
+            updated = True
+        if updated:
+            manifest.save()
+
+
+    def _load_dataset(self, filename):
+        """
+        Reads, cleans and splits one CSV into features and target, and saves the profile
+        of the cleaned data (see _save_profile).
 
-            dataset_path = os.path.join(self.data_dir, filename)
-            dataset_name = os.path.splitext(filename)[0]
+        Returns:
+          tuple: (dataset_name, X, y), or None if the file is skipped or fails to load.
+        """
+        if not filename.endswith(".csv"):
+            return None
 
-            try:
-                df = pd.read_csv(dataset_path)
-                df = standardize_columns(df, self.mapping_dict)
+        dataset_path = os.path.join(self.data_dir, filename)
+        dataset_name = os.path.splitext(filename)[0]
 
-                # Clean all known problematic columns
-                df = DatasetTrainer.clean_dataframe(df, self.target)
+        try:
+            # Read, standardize and clean (served from the snapshot cache when up to date)
+            with span("train.load", dataset=dataset_name) as s:
+                df = self.loader.load(dataset_path, self.target)
+                s.set(rows=df.shape[0], cols=df.shape[1])
+            self._dataset_rows[dataset_name] = len(df)
 
-                if self.target not in df.columns:
-                    print(f"[SKIPPED] Target '{self.target}' not found in {filename}")
-                    continue
+            if self.target not in df.columns:
+                print(f"[SKIPPED] Target '{self.target}' not found in {filename}")
+                return None
 
+            with span("train.profile", dataset=dataset_name):
+                profiled = df.drop(columns=[col for col in self.EXCLUDE_COLUMNS if col in df.columns])
+                profile = DatasetProfile.from_frame(profiled)
+            self._save_profile(dataset_name, profile)
 
-                # Columns to exclude from training
-                exclude_columns = ["url", "address", "epc_valid_until", "epc_score"]
+            with span("train.split", dataset=dataset_name) as s:
+                X, y = self._split_features(df)
+                s.set(rows=X.shape[0], cols=X.shape[1])
+            return dataset_name, X, y
 
-                # Split features and target
-                X = df.drop(columns=[self.target])
-                y = df[self.target]
+        except Exception as e:
+            print(f"[ERROR] Failed to process {filename}: {str(e)}")
+            return None
 
-                # Drop useless columns if present
-                X = X.drop(columns=[col for col in exclude_columns if col in X.columns])
 
-                # Encode categorical columns
-                for col in X.select_dtypes(include=["object"]).columns:
-                    X[col] = X[col].astype("category").cat.codes
+    def _split_features(self, df):
+        """
+        Splits a cleaned dataframe into features and target, keeping complete rows only.
 
-                # Drop rows with NaN values in features or target
-               # Drop rows with NaN in features
-                X = X.dropna()
-                y = y.loc[X.index]
+        Categorical columns stay text (category dtype in memory_efficient mode) and are
+        encoded by the saved preprocessor, so serving reproduces the training codes.
 
-                # Drop rows where y is still NaN
-                y = y.dropna()
-                X = X.loc[y.index]
+        Returns:
+          tuple: (X, y)
+        """
+        # Split features and target
+        X = df.drop(columns=[self.target])
+        y = df[self.target]
 
-                # Launch training for each model type
-                print(f"\n[INFO] Training models for dataset: {dataset_name}...")
-                self._train_models_for_dataset(dataset_name, X, y)
+        # Drop useless columns if present
+        X = X.drop(columns=[col for col in self.EXCLUDE_COLUMNS if col in X.columns])
 
+        if self.memory_efficient:
+            # Categories stay categorical (encoded by the preprocessor), numerics go float32
+            for col in X.select_dtypes(include=["object"]).columns:
+                X[col] = X[col].astype("category")
+            for col in X.select_dtypes(include=["int64", "float64"]).columns:
+                X[col] = X[col].astype(np.float32)
 
+        # Drop rows with NaN values in features or target
+        X = X.dropna()
+        y = y.loc[X.index]
 
-            except Exception as e:
-                print(f"[ERROR] Failed to process {filename}: {str(e)}")
+        # Drop rows where y is still NaN
+        y = y.dropna()
+        X = X.loc[y.index]
 
+        return X, y
 
 
-    def _train_models_for_dataset(self, dataset_name, X, y):
-        for model_type in self.model_types:
-            try:
-                model = ModelFactory.create(model_type)
+    def _train_dataset_streaming(self, filename, model_types=None):
+        """
+        Trains every model type (or the given ones) on one CSV without loading it in memory.
+
+        1. First pass over the CSV: the preprocessor is fitted on the first chunk and its
+           StandardScaler is updated with partial_fit on the following ones. The data
+           profile (see _save_profile) is built along the way, from all the cleaned rows.
+        2. Second pass: each chunk is transformed and written to a temporary .npy file.
+        3. Each model type is fitted from the memory-mapped chunks (see
+           ml_models.incremental.fit_from_chunks) and scored chunk by chunk.
 
-                # Identify column types
-                categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
-                numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+        Peak memory is bounded by chunk_size rows plus the fitted models.
+        """
+        model_types = model_types or self.model_types
+        dataset_path = os.path.join(self.data_dir, filename)
+        dataset_name = os.path.splitext(filename)[0]
+        print(f"\n[INFO] Streaming training for dataset: {dataset_name} (chunk_size={self.chunk_size:,})...")
+
+        try:
+            numeric_cols, feature_cols, categorical_cols = self._streaming_columns(dataset_path)
+
+            # Pass 1: preprocessor statistics and categorical vocabularies
+            preprocessor = None
+            n_rows = 0
+            profile = DatasetProfile({
+                **{col: "numeric" for col in feature_cols + [self.target]},
+                **{col: "categorical" for col in categorical_cols},
+            })
+            with span("train.stream.preprocess", dataset=dataset_name,
+                      cols=len(feature_cols) + len(categorical_cols)) as s:
+                for X, _ in self._iter_chunks(dataset_path, numeric_cols, feature_cols, categorical_cols, profile):
+                    if preprocessor is None:
+                        preprocessor = self._build_preprocessor(X, encoding="codes")[0].fit(X)
+                    else:
+                        if categorical_cols:
+                            preprocessor.named_transformers_["cat"].partial_fit(X[categorical_cols])
+                        numeric = preprocessor.named_transformers_["num"]
+                        if hasattr(numeric, "steps"):
+                            # memory_efficient: float32 cast followed by the scaler
+                            numeric[-1].partial_fit(numeric[:-1].transform(X[feature_cols]))
+                        else:
+                            numeric.partial_fit(X[feature_cols])
+                    n_rows += len(X)
+                s.set(rows=n_rows)
+
+            self._save_profile(dataset_name, profile)
+            if preprocessor is None:
+                raise ValueError("no complete rows to train on")
+            preprocessor_ref = self._save_preprocessor(preprocessor)
+            print(f"[OK] Preprocessor fitted for {dataset_name} on {n_rows:,} rows: {preprocessor_ref}")
+
+        except Exception as e:
+            print(f"[ERROR] Failed to process {filename}: {str(e)}")
+            return [self._job_result(dataset_name, model_type, error=str(e)) for model_type in model_types]
+
+        with tempfile.TemporaryDirectory(prefix=f"{dataset_name}_") as tmp_dir:
+            # Pass 2: preprocessed chunks spilled to disk. Complete rows are regrouped so
+            # each spilled chunk holds up to chunk_size rows (raw chunks may be mostly NaN).
+            chunk_paths, y_chunks = [], []
+            pending_X, pending_y, pending_rows = [], [], 0
+
+            def spill():
+                path = os.path.join(tmp_dir, f"chunk_{len(chunk_paths):05d}.npy")
+                np.save(path, np.vstack(pending_X))
+                chunk_paths.append(path)
+                y_chunks.append(np.concatenate(pending_y))
+
+            with span("train.stream.spill", dataset=dataset_name) as s:
+                for X, y in self._iter_chunks(dataset_path, numeric_cols, feature_cols, categorical_cols):
+                    X_preprocessed = preprocessor.transform(X)
+                    if hasattr(X_preprocessed, "toarray"):
+                        X_preprocessed = X_preprocessed.toarray()
+                    pending_X.append(
+                        np.asarray(X_preprocessed, dtype=np.float32 if self.memory_efficient else np.float64)
+                    )
+                    pending_y.append(y.to_numpy(dtype=np.float64))
+                    pending_rows += len(X)
+                    if pending_rows >= self.chunk_size:
+                        spill()
+                        pending_X, pending_y, pending_rows = [], [], 0
+                if pending_rows:
+                    spill()
+                s.set(rows=n_rows, chunks=len(chunk_paths))
+
+            return [
+                self._train_model_streaming(dataset_name, model_type, chunk_paths, y_chunks, preprocessor_ref)
+                for model_type in model_types
+            ]
+
+
+    def _skipped_columns(self):
+        """
+        Excluded columns not parsed at all: the postal code sources are read for clean_dataframe.
+        """
+        return [col for col in self.EXCLUDE_COLUMNS if col not in POSTAL_CODE_SOURCES]
+
+
+    def _streaming_columns(self, dataset_path):
+        """
+        Fixes the numeric text columns, the numeric feature columns and the categorical
+        columns from the first chunk, so every chunk is cleaned and selected the same way.
+        """
+        first = next(self.loader.resolver.iter_csv(dataset_path, self.chunk_size, exclude=self._skipped_columns()))
+        numeric_cols = numeric_text_columns(first, self.target)
+        first = clean_dataframe(first, self.target, numeric_cols=numeric_cols)
 
-                # Build preprocessor
-                preprocessor = ColumnTransformer(transformers=[
-                    ("num", StandardScaler(), numeric_cols),
-                    ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_cols)
-                ])
+        if self.target not in first.columns:
+            raise ValueError(f"Target '{self.target}' not found")
 
-                # Fit and transform the features
-                X_preprocessed = preprocessor.fit_transform(X)
+        X = first.drop(columns=[self.target] + [col for col in self.EXCLUDE_COLUMNS if col in first.columns])
+        feature_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+        categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
+        return numeric_cols, feature_cols, categorical_cols
+
+
+    def _iter_chunks(self, dataset_path, numeric_cols, feature_cols, categorical_cols=(), profile=None):
+        """
+        Yields the cleaned (X, y) of each chunk, restricted to complete rows: the numeric
+        feature columns as float64, then the categorical columns as stripped text.
+        Every cleaned chunk, incomplete rows included, is added to profile if given.
+        """
+        for chunk in self.loader.resolver.iter_csv(dataset_path, self.chunk_size, exclude=self._skipped_columns(),
+                                                   verbose=False):
+            chunk = clean_dataframe(chunk, self.target, numeric_cols=numeric_cols)
+            if profile is not None:
+                profile.update(chunk)
+
+            X = chunk.reindex(columns=feature_cols)
+            for col in X.select_dtypes(exclude="number").columns:
+                X[col] = pd.to_numeric(X[col], errors="coerce")
+            X = X.astype(np.float64)
+            for col in categorical_cols:
+                # A column can be parsed as float in a chunk where it is all missing
+                X[col] = strip_text(chunk[col]) if col in chunk.columns else "nan"
+            y = chunk[self.target]
+
+            complete = X.notna().all(axis=1) & y.notna()
+            if complete.any():
+                yield X[complete], y[complete]
+
+
+    def _save_profile(self, dataset_name, profile):
+        """
+        Saves the profile of the cleaned training data as <model_dir>/profiles/<dataset>.json,
+        the reference the data scored later is compared with (see utils.profiling.drift_report).
+        """
+        profile_path = os.path.join(self.model_dir, PROFILE_DIR, f"{dataset_name}.json")
+        profile.save(profile_path)
+        print(f"[OK] Data profile saved for {dataset_name}: {profile.rows:,} rows, "
+              f"{profile.complete_rows:,} complete")
+
+
+    def _train_model_streaming(self, dataset_name, model_type, chunk_paths, y_chunks, preprocessor_ref):
+        start = time.perf_counter()
+        labels = {"dataset": dataset_name, "model_type": model_type, "rows": sum(len(y) for y in y_chunks)}
+        try:
+            with span("train.fit", streaming=True, **labels):
+                model = ModelFactory.create(model_type, **self._model_params(dataset_name, model_type))
+                # LightGBM and the chunked estimators are only imported in streaming mode
+                from ml_models.incremental import fit_from_chunks
+                model = fit_from_chunks(model, chunk_paths, y_chunks)
+
+            # Score on training set, chunk by chunk
+            with span("train.score", **labels):
+                y_all = np.concatenate(y_chunks)
+                ss_res = sum(
+                    float(np.sum((y - model.predict(np.load(path, mmap_mode="r"))) ** 2))
+                    for path, y in zip(chunk_paths, y_chunks)
+                )
+                ss_tot = float(np.sum((y_all - y_all.mean()) ** 2))
+                r2 = 1 - ss_res / ss_tot if ss_tot > 0 else 0.0
+            print(f"[SCORE] {model_type} on {dataset_name}: R² = {r2:.3f}")
 
-                # Fit the model on preprocessed data
-                model.fit(X_preprocessed, y)
+            with span("train.save", dataset=dataset_name, model_type=model_type):
+                self._save_model(dataset_name, model_type, model, preprocessor_ref,
+                                 X_check=np.load(chunk_paths[0], mmap_mode="r"))
+            print(f"[OK] {model_type} trained and saved for {dataset_name}\n")
+            return self._job_result(dataset_name, model_type, r2=r2, wall_time=time.perf_counter() - start)
 
-                # Score on training set
+        except Exception as e:
+            print(f"[ERROR] Failed to train {model_type} for {dataset_name}: {str(e)}")
+            return self._job_result(dataset_name, model_type, wall_time=time.perf_counter() - start, error=str(e))
+
+
+    def _train_all_parallel(self, pending, manifest):
+        """
+        Schedules the (dataset, model_type) jobs of the pending datasets on a process pool.
+
+        The available cores are split between the workers: each job gets
+        cpu_count // n_workers native threads for its estimator (n_jobs) and
+        its BLAS/OpenMP pools. A failing job is reported and does not abort the others.
+        Continued boosting updates only see the appended rows and run in this process.
+        """
+        n_threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+        print(f"[INFO] Parallel training: {self.n_workers} worker(s) x {n_threads} thread(s)")
+
+        results = []
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            futures = {}
+            for filename, plan in pending:
+                loaded = self._load_dataset(filename)
+                if loaded is None:
+                    continue
+                dataset_name, X, y = loaded
+                model_types = [m for m, action in plan.items() if action == "fit"]
+                for model_type in [m for m, action in plan.items() if action == "continue"]:
+                    results.append(self._continue_model(dataset_name, model_type, X, y, manifest))
+                try:
+                    feature_sets = self._prepare_feature_sets(dataset_name, X, y, model_types)
+                except Exception as e:
+                    print(f"[ERROR] Failed to preprocess {dataset_name}: {str(e)}")
+                    results.extend(self._job_result(dataset_name, m, error=str(e)) for m in model_types)
+                    continue
+
+                for model_type in model_types:
+                    X_preprocessed, preprocessor_ref, categorical_feature = feature_sets[self._encoding_for(model_type)]
+                    future = executor.submit(
+                        _run_training_job, self, dataset_name, model_type, X_preprocessed, y,
+                        preprocessor_ref, categorical_feature, n_threads
+                    )
+                    futures[future] = (dataset_name, model_type)
+
+            for future in as_completed(futures):
+                dataset_name, model_type = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # The worker process itself died (e.g. out of memory)
+                    print(f"[ERROR] Failed to train {model_type} for {dataset_name}: {str(e)}")
+                    results.append(self._job_result(dataset_name, model_type, error=str(e)))
+
+        return results
+
+
+    def _train_models_for_dataset(self, dataset_name, X, y, plan=None, manifest=None):
+        """
+        Trains the model types of a plan ({model_type: "fit" | "continue"}, every model
+        type fitted by default) on one loaded dataset.
+        """
+        plan = plan or {model_type: "fit" for model_type in self.model_types}
+        results = [
+            self._continue_model(dataset_name, model_type, X, y, manifest)
+            for model_type, action in plan.items() if action == "continue"
+        ]
+        model_types = [m for m, action in plan.items() if action == "fit"]
+        if not model_types:
+            return results
+        try:
+            feature_sets = self._prepare_feature_sets(dataset_name, X, y, model_types)
+        except Exception as e:
+            print(f"[ERROR] Failed to preprocess {dataset_name}: {str(e)}")
+            return results + [self._job_result(dataset_name, model_type, error=str(e)) for model_type in model_types]
+
+        for model_type in model_types:
+            X_preprocessed, preprocessor_ref, categorical_feature = feature_sets[self._encoding_for(model_type)]
+            results.append(self._train_model(
+                dataset_name, model_type, X_preprocessed, y, preprocessor_ref, categorical_feature=categorical_feature
+            ))
+        return results
+
+
+    def _encoding_for(self, model_type):
+        """
+        Returns how a model type gets categorical columns (see _build_preprocessor):
+        "codes" when streaming, "onehot" for linear models and "codes" for the tree models
+        by default, "native" for LightGBM and "onehot" for the others in memory_efficient mode.
+        """
+        if self.chunk_size:
+            return "codes"
+        if not self.memory_efficient:
+            return "onehot" if model_type in self.ONEHOT_MODELS else "codes"
+        if model_type in self.NATIVE_CATEGORICAL_MODELS:
+            return "native"
+        return "onehot"
+
+
+    def _build_preprocessor(self, X, encoding="onehot"):
+        """
+        Builds the unfitted preprocessor of an encoding:
+          "onehot"  one-hot categorical columns
+          "codes"   integer codes from a persisted CategoricalEncoder vocabulary
+          "native"  the same codes, declared as LightGBM categorical features
+
+        Outside streaming mode, datasets with a postal code and a surface also get the
+        per-postal-code features of a PostalCodeEncoder (utils.preprocessing), so the
+        preprocessor must be fitted with the target.
+
+        Returns:
+          tuple: (preprocessor, categorical_feature), the latter only set for "native".
+        """
+        # Identify column types
+        if self.memory_efficient:
+            categorical_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
+            numeric_cols = X.select_dtypes(include="number").columns.tolist()
+        else:
+            categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
+            numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+
+        # The postal code table is fitted on the target: in memory only (see PostalCodeEncoder)
+        postal_cols = self.POSTAL_COLUMNS if not self.chunk_size and set(self.POSTAL_COLUMNS) <= set(numeric_cols) \
+            else None
+        preprocessor = build_preprocessor(
+            numeric_cols, categorical_cols,
+            memory_efficient=self.memory_efficient, native_categorical=(encoding in ("codes", "native")),
+            postal_cols=postal_cols,
+        )
+        categorical_feature = categorical_feature_indices(numeric_cols, categorical_cols) if encoding == "native" else None
+        return preprocessor, categorical_feature
+
+
+    def _prepare_feature_sets(self, dataset_name, X, y, model_types=None):
+        """
+        Fits each preprocessor needed by model_types (default: all of them) once per dataset
+        and saves it as a shared artifact.
+
+        Returns:
+          dict: {encoding: (X_preprocessed, preprocessor_ref, categorical_feature)} where
+          preprocessor_ref is the artifact path relative to model_dir, referenced by every
+          model using that encoding, and categorical_feature lists the native categorical
+          columns (None for one-hot).
+        """
+        feature_sets = {}
+        for encoding in sorted({self._encoding_for(model_type) for model_type in model_types or self.model_types}):
+            with span("train.preprocess", dataset=dataset_name, encoding=encoding,
+                      rows=X.shape[0], cols=X.shape[1]) as s:
+                preprocessor, categorical_feature = self._build_preprocessor(X, encoding=encoding)
+                X_preprocessed = preprocessor.fit_transform(X, y)
+                s.set(out_cols=X_preprocessed.shape[1])
+            with span("train.save_preprocessor", dataset=dataset_name, encoding=encoding):
+                preprocessor_ref = self._save_preprocessor(preprocessor)
+            print(f"[OK] Preprocessor fitted for {dataset_name}: {preprocessor_ref}")
+            if "geo" in preprocessor.named_transformers_:
+                table = preprocessor.named_transformers_["geo"].table_
+                print(f"[INFO] Postal code table for {dataset_name}: {len(table):,} codes "
+                      f"({int((table[:, 1] > 0).sum()):,} with listings), {table.nbytes / 1024:.0f} KB")
+            feature_sets[encoding] = (X_preprocessed, preprocessor_ref, categorical_feature)
+        return feature_sets
+
+
+    def _save_preprocessor(self, preprocessor):
+        """
+        Saves a fitted preprocessor under model_dir/preprocessors/<sha256>.pkl.
+
+        The file name is the hash of the serialized object, so identical preprocessors
+        are stored once and an existing artifact is never rewritten.
+        """
+        buffer = io.BytesIO()
+        joblib.dump(preprocessor, buffer)
+        payload = buffer.getvalue()
+        digest = hashlib.sha256(payload).hexdigest()[:16]
+
+        preproc_dir = os.path.join(self.model_dir, PREPROCESSOR_DIR)
+        os.makedirs(preproc_dir, exist_ok=True)
+        preproc_path = os.path.join(preproc_dir, f"{digest}.pkl")
+        if not os.path.exists(preproc_path):
+            tmp_path = f"{preproc_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, preproc_path)
+
+        return f"{PREPROCESSOR_DIR}/{digest}.pkl"
+
+
+    def _train_model(self, dataset_name, model_type, X_preprocessed, y, preprocessor_ref,
+                     categorical_feature=None, n_threads=None):
+        """
+        Fits, scores and saves one model type on an already preprocessed dataset.
+
+        Next to <dataset>_<model_type>.pkl a <dataset>_<model_type>.json sidecar records
+        the shared preprocessor the model expects.
+
+        Returns:
+          dict: The job result (see train_all).
+        """
+        start = time.perf_counter()
+        labels = {"dataset": dataset_name, "model_type": model_type,
+                  "rows": X_preprocessed.shape[0], "cols": X_preprocessed.shape[1]}
+        try:
+            model = ModelFactory.create(model_type, **self._model_params(dataset_name, model_type))
+            if n_threads is not None and "n_jobs" in model.get_params():
+                model.set_params(n_jobs=n_threads)
+
+            # Fit the model on preprocessed data
+            with span("train.fit", **labels):
+                if categorical_feature:
+                    model.fit(X_preprocessed, y, categorical_feature=categorical_feature)
+                else:
+                    model.fit(X_preprocessed, y)
+
+            # Score on training set
+            with span("train.score", **labels):
                 y_pred = model.predict(X_preprocessed)
                 r2 = r2_score(y, y_pred)
-                print(f"[SCORE] {model_type} on {dataset_name}: R² = {r2:.3f}")
+            print(f"[SCORE] {model_type} on {dataset_name}: R² = {r2:.3f}")
 
-                # Save model
-                model_subdir = os.path.join(self.model_dir, model_type)
-                os.makedirs(model_subdir, exist_ok=True)
-                model_path = os.path.join(model_subdir, f"{dataset_name}_{model_type}.pkl")
-                joblib.dump(model, model_path)
+            with span("train.save", dataset=dataset_name, model_type=model_type):
+                self._save_model(dataset_name, model_type, model, preprocessor_ref, X_check=X_preprocessed)
+            print(f"[OK] {model_type} trained and saved for {dataset_name}\n")
+            return self._job_result(dataset_name, model_type, r2=r2, wall_time=time.perf_counter() - start)
 
-                # Save preprocessor
-                preproc_path = os.path.join(model_subdir, f"{dataset_name}_{model_type}_preprocessor.pkl")
-                joblib.dump(preprocessor, preproc_path)
+        except Exception as e:
+            print(f"[ERROR] Failed to train {model_type} for {dataset_name}: {str(e)}")
+            return self._job_result(dataset_name, model_type, wall_time=time.perf_counter() - start, error=str(e))
 
-                print(f"[OK] {model_type} trained and saved for {dataset_name}\n")
 
-            except Exception as e:
-                print(f"[ERROR] Failed to train {model_type} for {dataset_name}: {str(e)}")
+    def _continue_model(self, dataset_name, model_type, X, y, manifest):
+        """
+        Continues boosting a saved LightGBM model on the rows appended to its dataset.
+
+        The appended rows are the ones past the row count recorded in the manifest. They are
+        transformed with the model's saved preprocessor (so the feature space is unchanged)
+        and new trees are fitted on them starting from the saved booster (init_model): as
+        many as n_estimators times the share of appended rows. Falls back to a full fit
+        when the saved artifact is not a LightGBM model (e.g. compiled to flat arrays).
+
+        Returns:
+          dict: The job result (see train_all).
+        """
+        start = time.perf_counter()
+        entry = manifest.get(dataset_name, model_type)
+        try:
+            model_path = os.path.join(self.model_dir, entry["artifact"])
+            with open(os.path.splitext(model_path)[0] + ".json", "r") as f:
+                preprocessor_ref = json.load(f)["preprocessor"]
+            previous = load_artifact(model_path, mmap_mode=None)
+            init_model = previous.booster_ if is_instance(previous, "lightgbm", "LGBMModel") else previous
+            if not is_instance(init_model, "lightgbm", "Booster"):
+                raise TypeError(f"saved {type(previous).__name__} cannot continue boosting")
+
+            appended = X.index >= entry["inputs"]["data"]["rows"]
+            X_new, y_new = X[appended], y[appended]
+            if len(X_new) == 0:
+                raise ValueError("no complete appended rows")
+            preprocessor = joblib.load(os.path.join(self.model_dir, preprocessor_ref))
+            categorical_feature = (
+                self._build_preprocessor(X, encoding="native")[1]
+                if self._encoding_for(model_type) == "native" else None
+            )
+        except Exception as e:
+            print(f"[WARNING] Cannot continue {model_type} for {dataset_name} ({str(e)}), refitting")
+            return self._train_models_for_dataset(dataset_name, X, y, {model_type: "fit"})[0]
+
+        labels = {"dataset": dataset_name, "model_type": model_type, "rows": len(X_new)}
+        try:
+            model = ModelFactory.create(model_type, **self._model_params(dataset_name, model_type))
+            n_rounds = max(1, int(np.ceil(model.get_params()["n_estimators"] * len(X_new) / len(X))))
+            model.set_params(n_estimators=n_rounds)
+
+            with span("train.fit", continued=True, **labels):
+                X_new_preprocessed = preprocessor.transform(X_new)
+                fit_kwargs = {"categorical_feature": categorical_feature} if categorical_feature else {}
+                model.fit(X_new_preprocessed, y_new, init_model=init_model, **fit_kwargs)
+
+            # Score on the whole training set
+            with span("train.score", **labels):
+                r2 = r2_score(y, model.predict(preprocessor.transform(X)))
+            print(f"[SCORE] {model_type} on {dataset_name}: R² = {r2:.3f} "
+                  f"({n_rounds} tree(s) added on {len(X_new):,} appended rows)")
+
+            with span("train.save", dataset=dataset_name, model_type=model_type):
+                self._save_model(dataset_name, model_type, model, preprocessor_ref, X_check=X_new_preprocessed)
+            print(f"[OK] {model_type} updated and saved for {dataset_name}\n")
+            return self._job_result(dataset_name, model_type, r2=r2, wall_time=time.perf_counter() - start,
+                                    continued=True)
+
+        except Exception as e:
+            print(f"[ERROR] Failed to continue {model_type} for {dataset_name}: {str(e)}")
+            return self._job_result(dataset_name, model_type, wall_time=time.perf_counter() - start, error=str(e))
+
+
+    def _model_params(self, dataset_name, model_type, verbose=True):
+        """
+        Returns the tuned hyperparameters of a model type for a dataset ({} if not tuned).
+        """
+        if not self.tuned_params:
+            return {}
+        tuning_path = os.path.join(self.model_dir, TUNING_DIR, f"{dataset_name}.json")
+        if not os.path.exists(tuning_path):
+            return {}
+        with open(tuning_path, "r") as f:
+            result = json.load(f).get("models", {}).get(model_type)
+        if result is None:
+            return {}
+        if verbose:
+            print(f"[INFO] Using tuned hyperparameters for {model_type} on {dataset_name}")
+        return result["best_params"]
+
+
+    def _save_model(self, dataset_name, model_type, model, preprocessor_ref, X_check=None):
+        """
+        Saves <dataset>_<model_type>.pkl and its .json sidecar referencing the shared preprocessor
+        and the training data profile.
+
+        The model is written in the compact artifact format (see ml_models.artifacts). With
+        compile_trees, tree ensembles are compiled first and checked against the fitted model
+        on the first rows of X_check; a model failing the check keeps its native format.
+        """
+        if self.compile_trees and is_compilable(model) and X_check is not None:
+            compiled = compile_trees(model)
+            try:
+                check_compiled(model, compiled, X_check[:1000])
+                model = compiled
+            except ValueError as e:
+                print(f"[WARNING] {e}: {model_type} for {dataset_name} is saved uncompiled")
+
+        model_subdir = os.path.join(self.model_dir, model_type)
+        os.makedirs(model_subdir, exist_ok=True)
+        model_path = os.path.join(model_subdir, f"{dataset_name}_{model_type}.pkl")
+        save_artifact(model, model_path, compress=self.compress)
+
+        meta = {"dataset": dataset_name, "model_type": model_type, "preprocessor": preprocessor_ref}
+        profile_ref = f"{PROFILE_DIR}/{dataset_name}.json"
+        if os.path.exists(os.path.join(self.model_dir, profile_ref)):
+            meta["profile"] = profile_ref
+        meta_path = os.path.join(model_subdir, f"{dataset_name}_{model_type}.json")
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+
+    @staticmethod
+    def _job_result(dataset_name, model_type, r2=None, wall_time=None, error=None, skipped=False, continued=False):
+        return {
+            "dataset": dataset_name,
+            "model_type": model_type,
+            "status": "failed" if error else "skipped" if skipped else "ok",
+            "r2": r2,
+            "wall_time": wall_time,
+            "error": error,
+            # True when a LightGBM model continued boosting on appended rows instead of a full fit
+            "continued": continued,
+        }
+
+
+    @staticmethod
+    def _print_summary(results):
+        if not results:
+            return
+        print("\n[SUMMARY] dataset / model_type / status / R² / wall time")
+        for res in sorted(results, key=lambda r: (r["dataset"], r["model_type"])):
+            r2 = f"{res['r2']:.3f}" if res["r2"] is not None else "-"
+            wall = f"{res['wall_time']:.2f}s" if res["wall_time"] is not None else "-"
+            status = "ok (continued)" if res.get("continued") else res["status"]
+            print(f"  {res['dataset']} / {res['model_type']} / {status} / {r2} / {wall}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train all model types on all datasets.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel training processes (default: 1, sequential)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Stream each CSV in chunks of this many rows instead of loading it in memory")
+    parser.add_argument("--memory-efficient", action="store_true",
+                        help="float32 features, sparse one-hot categoricals and native LightGBM categoricals")
+    parser.add_argument("--compress", type=int, default=0, choices=range(10), metavar="LEVEL",
+                        help="Compress model artifacts for cold storage (1-9); 0 keeps them memory-mappable")
+    parser.add_argument("--compile-trees", action="store_true",
+                        help="Save Random Forest and LightGBM models as flat node arrays (memory-mappable), "
+                             "checked against the fitted model")
+    parser.add_argument("--tuned", action="store_true",
+                        help="Use the hyperparameters found by scripts/tune_models.py (local_models/tuning/)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only retrain models whose data, column mapping, config or code changed "
+                             "(local_models/manifest.json); LightGBM continues boosting on appended rows")
+    args = parser.parse_args()
+
     print(">>> Launching dataset-wide training for all models...")
 
     trainer = DatasetTrainer(
         data_dir="data",
         model_dir="local_models",
         target="price",
-        model_types=["rf", "lr", "dgbm"]
+        model_types=["rf", "lr", "dgbm"],
+        n_workers=args.workers,
+        chunk_size=args.chunk_size,
+        memory_efficient=args.memory_efficient,
+        compress=args.compress,
+        compile_trees=args.compile_trees,
+        tuned_params=args.tuned,
+        incremental=args.incremental
     )
 
     trainer.train_all()
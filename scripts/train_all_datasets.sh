@@ -41,7 +41,12 @@ source .venv/Scripts/activate || print_error "Failed to activate virtual environ
 
 # === Clean previous models ===
 print_blue "Cleaning old trained models..."
-rm -f local_models/*/*.pkl || print_error "Failed to clean old model files."
+# Only model artifacts and their preprocessors: tuning results (--tuned) and training
+# profiles (drift references) are kept, the manifest goes with the artifacts it lists
+for dir in rf lr lgbm dgbm preprocessors; do
+    rm -f local_models/$dir/*.pkl local_models/$dir/*.json || print_error "Failed to clean old model files."
+done
+rm -f local_models/manifest.json || print_error "Failed to clean the training manifest."
 
 # === Run the training script ===
 print_blue "Launching dataset-wide training for all models..."
@@ -0,0 +1,86 @@
+import os
+import json
+import argparse
+
+from ml_models.lgbm_model import LGBMModel
+from ml_models.lr_model import LRModel
+from ml_models.rf_model import RFModel
+from ml_models.tuning import tune_dataset
+from scripts.train_all_datasets import DatasetTrainer
+from utils.constants import TUNING_DIR
+
+
+# Model classes tuned for each DatasetTrainer model type
+MODEL_CLASSES = {"rf": RFModel, "lr": LRModel, "dgbm": LGBMModel}
+
+
+def tune_all(trainer: DatasetTrainer, test_size: float = 0.2, n_splits: int = 5, **search_kwargs) -> dict:
+    """
+    Tunes every model type of the trainer on every CSV of its data_dir.
+
+    Datasets are loaded and encoded exactly as for training (DatasetTrainer._load_dataset,
+    _build_preprocessor), so the best_params apply to train_all_datasets.py --tuned.
+    Results are written to <model_dir>/tuning/<dataset>.json.
+
+    Returns:
+      dict: {dataset: {model_type: result}} (see ml_models.tuning.tune_dataset).
+    """
+    model_classes = {m: MODEL_CLASSES[m] for m in trainer.model_types}
+    tuning_dir = os.path.join(trainer.model_dir, TUNING_DIR)
+    os.makedirs(tuning_dir, exist_ok=True)
+
+    all_results = {}
+    for filename in sorted(os.listdir(trainer.data_dir)):
+        loaded = trainer._load_dataset(filename)
+        if loaded is None:
+            continue
+        dataset_name, X, y = loaded
+        print(f"\n[INFO] Tuning models for dataset: {dataset_name} ({len(X):,} rows)...")
+        try:
+            results = tune_dataset(
+                X, y, model_classes,
+                build_preprocessor=trainer._build_preprocessor,
+                encoding_for=trainer._encoding_for,
+                test_size=test_size, n_splits=n_splits, **search_kwargs,
+            )
+        except Exception as e:
+            print(f"[ERROR] Failed to tune {dataset_name}: {str(e)}")
+            continue
+
+        for model_type, result in results.items():
+            print(f"[SCORE] {model_type} on {dataset_name}: CV R² = {result['cv_r2']:.3f} "
+                  f"(± {result['cv_r2_std']:.3f}), held-out R² = {result['held_out_r2']:.3f}, "
+                  f"{result['n_fits']} fits in {result['wall_time']:.1f}s")
+            print(f"       best params: {result['best_params']}")
+
+        tuning_path = os.path.join(tuning_dir, f"{dataset_name}.json")
+        with open(tuning_path, "w") as f:
+            json.dump({"dataset": dataset_name, "models": results}, f, indent=2)
+        print(f"[OK] Tuning results saved to {tuning_path}")
+        all_results[dataset_name] = results
+    return all_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for all datasets.")
+    parser.add_argument("--model-types", nargs="+", default=["rf", "lr", "dgbm"], choices=sorted(MODEL_CLASSES))
+    parser.add_argument("--candidates", type=int, default=27, help="Configurations sampled per model type")
+    parser.add_argument("--folds", type=int, default=5, help="Number of CV folds")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta candidates at each rung")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Share of rows held out for the final score")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel fits (default: all cores)")
+    parser.add_argument("--memory-efficient", action="store_true",
+                        help="Tune on the memory-efficient encoding (see train_all_datasets.py)")
+    args = parser.parse_args()
+
+    print(">>> Launching hyperparameter search for all models...")
+    trainer = DatasetTrainer(
+        data_dir="data",
+        model_dir="local_models",
+        target="price",
+        model_types=args.model_types,
+        memory_efficient=args.memory_efficient
+    )
+    tune_all(trainer, test_size=args.test_size, n_splits=args.folds,
+             n_candidates=args.candidates, eta=args.eta, n_jobs=args.jobs)
+    print(">>> Hyperparameter search finished.")
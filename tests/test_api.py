@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LinearRegression
+
+from api import main
+from ml_models.artifacts import save_artifact
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    X = pd.DataFrame({"surface": [50.0, 100.0, 150.0], "rooms": [1.0, 3.0, 2.0]})
+    save_artifact(LinearRegression().fit(X, 1000.0 * X["surface"]), os.path.join(tmp_path, "lr", "demo_lr.pkl"))
+    monkeypatch.setattr(main, "MODEL_DIR", str(tmp_path))
+    # Entering the client runs the lifespan, so the model is warm before the first request
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_ready_lists_the_warm_models(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "models": ["demo_lr"]}
+
+
+@pytest.mark.parametrize("wait_ms", [3.0, 0.0], ids=["micro-batched", "direct"])
+def test_predict(client, monkeypatch, wait_ms):
+    monkeypatch.setattr(main, "MICROBATCH_WAIT_MS", wait_ms)
+    response = client.post("/predict", json={
+        "dataset": "demo", "model_type": "lr", "features": {"surface": 80.0, "rooms": 2.0},
+    })
+    assert response.status_code == 200
+    assert response.json()["predicted_price"] == pytest.approx(80_000)
+
+    response = client.post("/predict", json={"dataset": "missing", "model_type": "lr", "features": {}})
+    assert response.status_code == 404
+
+
+def test_predict_batch(client):
+    listings = [{"surface": 80.0, "rooms": 2.0}, {"surface": 120.0, "rooms": 3.0}]
+    response = client.post("/predict/batch", json={"dataset": "demo", "model_type": "lr", "listings": listings})
+    assert response.status_code == 200
+    assert response.json()["predictions"] == pytest.approx([80_000, 120_000])
+
+    empty = client.post("/predict/batch", json={"dataset": "demo", "model_type": "lr", "listings": []})
+    assert empty.json()["predictions"] == []
+
+    invalid = client.post("/predict/batch", json={"dataset": "demo", "model_type": "lr",
+                                                  "listings": [{"surface": 80.0}]})
+    assert invalid.status_code == 422
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import api.main as api
+from api.main import PredictRequest
+
+
+class SlowPredictor:
+    def __init__(self, price: float):
+        self.price = price
+
+    def predict_batch(self, listings: list) -> np.ndarray:
+        time.sleep(0.02)
+        return np.full(len(listings), self.price)
+
+
+class Registry:
+    def __init__(self, predictor):
+        self.predictor = predictor
+
+    def get(self, dataset, model_type):
+        return self.predictor
+
+
+def test_reloading_a_model_drains_the_previous_batcher(monkeypatch):
+    monkeypatch.setattr(api, "MICROBATCH_WAIT_MS", 3.0)
+    monkeypatch.setattr(api, "MICROBATCH_SIZE", 4)
+
+    async def scenario():
+        api.app.state.registry = Registry(SlowPredictor(1.0))
+        api.app.state.batchers = {}
+        api.app.state.executor = ThreadPoolExecutor(max_workers=2)
+
+        def request():
+            return asyncio.ensure_future(api.predict(PredictRequest(dataset="immo", model_type="rf", features={})))
+
+        before = [request() for _ in range(20)]
+        await asyncio.sleep(0.01)  # First batches in flight, the rest still queued
+        old = api.app.state.batchers[("immo", "rf")]
+        assert not all(task.done() for task in before)
+
+        # The registry reloads the model while those requests wait
+        api.app.state.registry.predictor = SlowPredictor(2.0)
+        after = [request() for _ in range(5)]
+        results = await asyncio.wait_for(asyncio.gather(*before, *after), timeout=5)
+        api.app.state.executor.shutdown()
+        return old, results
+
+    old, results = asyncio.run(scenario())
+    assert [r.predicted_price for r in results] == [1.0] * 20 + [2.0] * 5
+    assert old._worker is None and not old._pending and old._queue.empty()
+    assert api.app.state.batchers[("immo", "rf")].predictor.price == 2.0
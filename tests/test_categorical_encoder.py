@@ -0,0 +1,59 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.preprocessing import CategoricalEncoder, build_preprocessor, clean_dataframe
+
+
+def test_codes_match_pandas_and_reserve_unknown():
+    X = pd.DataFrame({"town": ["Gent", "Aalst", "Gent", "Namur"], "condition": ["Good", "New", "nan", "Good"]})
+    encoder = CategoricalEncoder().fit(X)
+
+    expected = np.column_stack([X[col].astype("category").cat.codes for col in X.columns])
+    np.testing.assert_array_equal(encoder.transform(X), expected)
+
+    # Missing values are the "nan" category of the cleaned training data
+    serving = pd.DataFrame({"town": ["Namur", "Brugge", None], "condition": ["New", "Good", np.nan]})
+    np.testing.assert_array_equal(encoder.transform(serving), [[2, 1], [-1, 0], [-1, 2]])
+    # Category dtype input (memory-efficient mode) gives the same codes
+    np.testing.assert_array_equal(encoder.transform(serving.astype("category")), encoder.transform(serving))
+
+
+def test_only_vocabularies_are_pickled_and_partial_fit_extends_them():
+    encoder = CategoricalEncoder().fit(pd.DataFrame({"town": ["Gent", "Aalst"]}))
+    encoder.transform(pd.DataFrame({"town": ["Gent"]}))
+    restored = pickle.loads(pickle.dumps(encoder))
+
+    assert "_indexes" not in restored.__dict__
+    np.testing.assert_array_equal(restored.transform(pd.DataFrame({"town": ["Gent", "Ieper"]})), [[1], [-1]])
+
+    restored.partial_fit(pd.DataFrame({"town": ["Ieper", "Brugge"]}))
+    assert list(restored.vocabularies_[0]) == ["Aalst", "Brugge", "Gent", "Ieper"]
+    np.testing.assert_array_equal(restored.transform(pd.DataFrame({"town": ["Gent", "Ieper"]})), [[2], [3]])
+
+
+def test_raw_serving_values_get_the_codes_of_cleaned_training_data():
+    raw = pd.DataFrame({"price": ["250 000 €", "310 000 €", "190 000 €"], "condition": [" New", None, "Good "]})
+    encoder = CategoricalEncoder().fit(clean_dataframe(raw, "price")[["condition"]])
+    assert list(encoder.vocabularies_[0]) == ["Good", "New", "nan"]
+
+    serving = pd.DataFrame({"condition": [None, "nan", " New ", "New", np.nan, "To renovate"]})
+    np.testing.assert_array_equal(encoder.transform(serving).ravel(), [2, 2, 1, 1, 2, -1])
+
+
+@pytest.mark.parametrize("memory_efficient", [False, True])
+def test_one_hot_encoding_strips_serving_values_like_the_codes(memory_efficient):
+    training = pd.DataFrame({"surface": [60.0, 90.0, 120.0], "city": ["Gent", "Namur", "nan"]})
+    serving = pd.DataFrame({"surface": [70.0, 70.0], "city": [" Gent", None]})
+    cleaned = pd.DataFrame({"surface": [70.0, 70.0], "city": ["Gent", "nan"]})
+
+    for native_categorical in (False, True):
+        preprocessor = build_preprocessor(["surface"], ["city"], memory_efficient=memory_efficient,
+                                          native_categorical=native_categorical).fit(training)
+        encoded = preprocessor.transform(serving)
+        expected = preprocessor.transform(cleaned)
+        if hasattr(encoded, "toarray"):
+            encoded, expected = encoded.toarray(), expected.toarray()
+        np.testing.assert_array_equal(encoded, expected)
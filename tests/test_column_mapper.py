@@ -0,0 +1,46 @@
+import pandas as pd
+
+from utils.column_mapper import SchemaResolver, get_resolver, standardize_columns
+
+
+MAPPING = {
+    "columns": {"price": ["price", "prix"], "surface": ["surface_livable", "surface"], "rooms": ["bedrooms"],
+                "url": ["url"]},
+    "dtypes": {"rooms": "float64"},
+}
+
+
+def test_resolve_reports_unknown_missing_and_duplicate_columns():
+    resolver = SchemaResolver(MAPPING)
+    header = ["prix", "surface_livable", "surface", "City", "Bedrooms", "url "]
+    schema = resolver.resolve(header, exclude=["url"])
+
+    assert schema.rename == {"prix": "price", "surface_livable": "surface"}
+    # 'url ' is the excluded url column despite its trailing space
+    assert schema.usecols == ["prix", "surface_livable", "City", "Bedrooms"]
+    assert schema.unknown == ["City", "Bedrooms"] and schema.near_matches == {"Bedrooms": "rooms"}
+    assert schema.missing == ["rooms"]
+    assert schema.duplicates == {"surface": ["surface_livable", "surface"]}
+    assert resolver.resolve(header, exclude=["url"]) is schema
+    assert len(schema.summary()) == 3
+    assert resolver.resolve(["prix", " bedrooms"]).rename == {"prix": "price", " bedrooms": "rooms"}
+
+
+def test_read_csv_selects_columns_and_falls_back_on_undeclared_values(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text("prix,bedrooms,url,extra\n100 €,2,a,x\n200 €,3,b,y\n")
+    resolver = get_resolver(MAPPING)
+
+    df = resolver.read_csv(str(path), exclude=["url"], drop_unknown=True)
+    assert list(df.columns) == ["price", "rooms"] and df["rooms"].dtype == "float64"
+
+    path.write_text("prix,bedrooms,url,extra\n100 €,2,a,x\n200 €,three,b,y\n")
+    assert resolver.read_csv(str(path), exclude=["url"], verbose=False)["rooms"].tolist() == ["2", "three"]
+
+    chunks = list(resolver.iter_csv(str(path), chunksize=1, exclude=["url"], verbose=False))
+    assert pd.concat(chunks)["rooms"].astype(str).tolist() == ["2.0", "three"]
+
+
+def test_standardize_columns_keeps_unknown_columns():
+    df = pd.DataFrame({"prix": [1], "bedrooms": [2], "extra": [3]})
+    assert list(standardize_columns(df, MAPPING).columns) == ["price", "rooms", "extra"]
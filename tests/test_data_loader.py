@@ -0,0 +1,81 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils import data_loader
+from utils.data_loader import CachedDatasetLoader
+from utils.preprocessing import clean_dataframe
+
+pytest.importorskip("pyarrow")
+
+MAPPING = {
+    "columns": {"price": ["price", "prix"], "surface": ["surface"], "city": ["city"], "rooms": ["bedrooms"]},
+    "dtypes": {},
+}
+
+
+class CountingCleaner:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, df, target):
+        self.calls += 1
+        return clean_dataframe(df, target)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "listings.csv"
+    pd.DataFrame({
+        "prix": ["250 000 €", "310 000 €", "on request"],
+        "surface": ["90 m²", "120 m²", "75 m²"],
+        "city": [" Gent", "Aalst", "Namur"],
+        "bedrooms": [2, 3, 1],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def _loader(tmp_path, mapping=MAPPING, exclude_columns=()):
+    cleaner = CountingCleaner()
+    return CachedDatasetLoader(mapping, cleaner, cache_dir=str(tmp_path / "cache"),
+                               exclude_columns=exclude_columns), cleaner
+
+
+def test_snapshot_is_reused_and_keeps_the_cleaned_attrs(tmp_path, csv_path):
+    loader, cleaner = _loader(tmp_path)
+    first = loader.load(csv_path, "price")
+    cached = loader.load(csv_path, "price")
+    # A new loader (e.g. the next run) reads the same snapshot
+    again, other_cleaner = _loader(tmp_path)
+
+    assert cleaner.calls == 1
+    assert other_cleaner.calls == 0
+    pd.testing.assert_frame_equal(cached, first)
+    pd.testing.assert_frame_equal(again.load(csv_path, "price"), first)
+    assert cached.attrs == first.attrs == {"unparsed_values": {"price": 1}}
+    assert len([f for f in os.listdir(tmp_path / "cache") if f.endswith(".feather")]) == 1
+
+
+def test_snapshot_is_rebuilt_when_an_input_changes(tmp_path, csv_path, monkeypatch):
+    loader, cleaner = _loader(tmp_path)
+    loader.load(csv_path, "price")
+    key = loader.snapshot_path(csv_path, "price")
+
+    with open(csv_path, "a") as f:
+        f.write("199 000 €,80 m²,Leuven,2\n")
+    assert loader.snapshot_path(csv_path, "price") != key
+    assert len(loader.load(csv_path, "price")) == 4
+    assert cleaner.calls == 2
+    key = loader.snapshot_path(csv_path, "price")
+
+    changed_mapping = {**MAPPING, "dtypes": {"rooms": "float64"}}
+    assert _loader(tmp_path, mapping=changed_mapping)[0].snapshot_path(csv_path, "price") != key
+    assert _loader(tmp_path, exclude_columns=["city"])[0].snapshot_path(csv_path, "price") != key
+    assert loader.snapshot_path(csv_path, "surface") != key
+    monkeypatch.setattr(data_loader, "CACHE_VERSION", data_loader.CACHE_VERSION + 1)
+    assert loader.snapshot_path(csv_path, "price") != key
+
+    # Excluded columns are not parsed at all
+    excluded, _ = _loader(tmp_path, exclude_columns=["city"])
+    assert "city" not in excluded.load(csv_path, "price").columns
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.predict_price import EnsemblePredictor, ModelRegistry
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "local_models")
+IMMOVLAN = [("immovlan_real_estate", model_type) for model_type in ("dgbm", "lr", "rf")]
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ModelRegistry(MODEL_DIR)
+
+
+@pytest.fixture(scope="module")
+def listings(registry):
+    columns = registry.get(*IMMOVLAN[0]).preprocessor.feature_names_in_
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({col: rng.uniform(1, 200, size=20) for col in columns})
+
+
+def test_ensemble_matches_individual_predictors_with_one_preprocessing_pass(registry, listings):
+    ensemble = EnsemblePredictor.from_registry(registry, IMMOVLAN)
+    # The legacy per-model preprocessor copies are identical files
+    assert len(ensemble.groups) == 1
+
+    result = ensemble.predict_batch(listings, chunk_size=7)
+    for dataset, model_type in IMMOVLAN:
+        expected = registry.get(dataset, model_type).predict_batch(listings)
+        np.testing.assert_allclose(result[f"{dataset}_{model_type}"], expected)
+    np.testing.assert_allclose(result["ensemble"], result.iloc[:, :3].mean(axis=1))
+
+
+def test_weighted_and_median_blends(registry, listings):
+    weights = {"immovlan_real_estate_rf": 3.0, "immovlan_real_estate_lr": 1.0}
+    weighted = EnsemblePredictor.from_registry(registry, IMMOVLAN, weights=weights).predict_batch(listings)
+    np.testing.assert_allclose(
+        weighted["ensemble"], 0.75 * weighted["immovlan_real_estate_rf"] + 0.25 * weighted["immovlan_real_estate_lr"]
+    )
+
+    median = EnsemblePredictor.from_registry(registry, IMMOVLAN, blend="median").predict(listings.iloc[0].to_dict())
+    assert median["ensemble"] == pytest.approx(np.median([median[f"{d}_{m}"] for d, m in IMMOVLAN]))
+
+    with pytest.raises(ValueError):
+        EnsemblePredictor.from_registry(registry, IMMOVLAN, blend="median", weights=weights)
+
+
+def test_failing_group_is_left_out_when_skipping_failures(registry, listings):
+    models = IMMOVLAN + [("zimmo_real_estate_jgchoti", "lr")]
+    with pytest.raises(Exception):
+        EnsemblePredictor.from_registry(registry, models).predict_batch(listings)
+
+    result = EnsemblePredictor.from_registry(registry, models, skip_failures=True, n_jobs=2).predict_batch(listings)
+    assert result["zimmo_real_estate_jgchoti_lr"].isna().all()
+    np.testing.assert_allclose(result["ensemble"], result.iloc[:, :3].mean(axis=1))
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from ml_models.backends import is_instance
+from ml_models.model_factory import ModelFactory
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+BACKENDS = ["lightgbm", "sklearn.ensemble", "sklearn.linear_model", "sklearn.tree"]
+
+
+def imported_backends(code: str, modules: list = BACKENDS) -> list:
+    """
+    Runs code in a fresh interpreter and returns the modules (estimator backends by default) it imported.
+    """
+    report = f"\nimport json, sys\nprint(json.dumps([m for m in {modules!r} if m in sys.modules]))"
+    out = subprocess.run([sys.executable, "-c", code + report], capture_output=True, text=True, check=True,
+                         cwd=ROOT, env={**os.environ, "PYTHONPATH": os.path.abspath(ROOT)}).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_entry_points_import_no_estimator_backend():
+    assert imported_backends("import scripts.predict_price, scripts.score_listings, ml_models.model_factory") == []
+    assert imported_backends("import scripts.train_all_datasets") == []
+    # The API image does not ship pyyaml: serving must not load the training data loader
+    assert imported_backends("import api.main", ["yaml", "utils.data_loader", "utils.column_mapper"]) == []
+
+    scoring_lr = """
+import pandas as pd
+from scripts.predict_price import ModelRegistry
+predictor = ModelRegistry("local_models").get("immovlan_real_estate", "lr")
+predictor.predict_batch(pd.DataFrame([dict.fromkeys(predictor.preprocessor.feature_names_in_, 1.0)]))
+"""
+    assert imported_backends(scoring_lr) == ["sklearn.linear_model"]
+
+
+@pytest.mark.parametrize("model_type, module, kwargs, class_name", [
+    ("rf", "sklearn.ensemble", "n_jobs=1", "RandomForestRegressor"),
+    ("lr", "sklearn.linear_model", "", "LinearRegression"),
+    ("dgbm", "lightgbm", "n_jobs=1", "LGBMRegressor"),
+])
+def test_factory_builds_estimators_on_first_use(model_type, module, kwargs, class_name):
+    code = f"""
+import sys
+from ml_models.backends import is_instance
+from ml_models.model_factory import ModelFactory
+assert {module!r} not in sys.modules
+assert is_instance(ModelFactory.create({model_type!r}, {kwargs}), {module!r}, {class_name!r})
+"""
+    assert module in imported_backends(code)
+
+
+def test_model_classes_and_types():
+    assert ModelFactory.get_model_class("lr").__name__ == "LRModel"
+    with pytest.raises(ValueError):
+        ModelFactory.create("svm")
+
+    # Class names missing from the installed version of a module are skipped
+    matrix = sparse.csr_matrix(np.eye(2))
+    assert is_instance(matrix, "scipy.sparse", "spmatrix", "no_such_class")
+    assert not is_instance(matrix, "scipy.sparse", "no_such_class")
@@ -0,0 +1,97 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from ml_models.artifacts import load_artifact
+from ml_models.linear_fast_path import LinearFastPath
+from utils.preprocessing import build_preprocessor
+
+LR_DIR = os.path.join(os.path.dirname(__file__), "..", "local_models", "lr")
+SAVED_PAIRS = sorted(
+    (path, path.replace("_lr.pkl", "_lr_preprocessor.pkl"))
+    for path in glob.glob(os.path.join(LR_DIR, "*_lr.pkl"))
+)
+
+
+def _sample_inputs(preprocessor, n_rows: int, rng) -> pd.DataFrame:
+    """
+    Random raw inputs for a fitted preprocessor: known and unknown categories, scaled numbers.
+    Dropped (remainder) columns are filled with a constant.
+    """
+    columns = {col: ["ignored"] * n_rows for col in preprocessor.feature_names_in_}
+    for _, transformer, cols in preprocessor.transformers_:
+        if len(cols) == 0:
+            continue
+        if isinstance(transformer, OneHotEncoder):
+            for col, categories in zip(cols, transformer.categories_):
+                choices = np.append(np.asarray(categories, dtype=object), "__unseen__")
+                columns[col] = rng.choice(choices, size=n_rows)
+        elif not isinstance(transformer, str):
+            for col in cols:
+                columns[col] = rng.normal(loc=50.0, scale=30.0, size=n_rows)
+    return pd.DataFrame(columns)[list(preprocessor.feature_names_in_)]
+
+
+@pytest.mark.parametrize("model_path, preprocessor_path", SAVED_PAIRS, ids=os.path.basename)
+def test_saved_lr_pairs_match_pipeline(model_path, preprocessor_path):
+    model = load_artifact(model_path)
+    preprocessor = load_artifact(preprocessor_path)
+    fast_path = LinearFastPath.from_pipeline(model, preprocessor)
+
+    X = _sample_inputs(preprocessor, 300, np.random.default_rng(0))
+    expected = model.predict(preprocessor.transform(X))
+
+    np.testing.assert_allclose(fast_path.predict(X), expected, rtol=1e-9, atol=1e-6)
+    listing = X.iloc[0].to_dict()
+    assert fast_path.predict_one(listing) == pytest.approx(expected[0], rel=1e-9)
+
+
+@pytest.mark.parametrize("memory_efficient, native_categorical, postal", [
+    (False, False, False), (True, False, False), (False, True, False), (False, False, True), (True, False, True),
+    (True, True, True),
+])
+def test_category_tables_handle_missing_and_unknown_categories(memory_efficient, native_categorical, postal):
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({
+        "surface": rng.uniform(30, 300, size=500),
+        "rooms": rng.integers(1, 6, size=500).astype(float),
+        "postal_code": rng.choice([1000, 1050, 9000, 9300], size=500).astype(float),
+        "type": rng.choice(["house", "flat", None, np.nan], size=500),
+        "city": rng.choice(["Gent", "Leuven", "Namur"], size=500),
+    })
+    y = 2000 * X["surface"] + 10000 * X["rooms"] + X["city"].map({"Gent": 5e4, "Leuven": 8e4, "Namur": 0})
+    preprocessor = build_preprocessor(["surface", "rooms", "postal_code"], ["type", "city"],
+                                      memory_efficient=memory_efficient, native_categorical=native_categorical,
+                                      postal_cols=["postal_code", "surface"] if postal else None)
+    model = LinearRegression().fit(preprocessor.fit_transform(X, y), y)
+    assert ("geo" in preprocessor.named_transformers_) == postal
+
+    assert LinearFastPath.supports(model, preprocessor)
+    fast_path = LinearFastPath.from_pipeline(model, preprocessor)
+
+    X_test = X.head(50).copy()
+    X_test.loc[::4, "city"] = "Brugge"
+    # Known, neighbor-only and unknown postal codes
+    X_test.loc[1::4, "postal_code"] = 9310.0
+    X_test.loc[2::4, "postal_code"] = 99999.0
+    expected = model.predict(preprocessor.transform(X_test))
+    # float32 features in memory-efficient mode only agree to single precision
+    rtol = 1e-5 if memory_efficient else 1e-9
+    np.testing.assert_allclose(fast_path.predict(X_test), expected, rtol=rtol)
+    np.testing.assert_allclose(fast_path.predict(X_test.to_dict("records")), expected, rtol=rtol)
+
+
+def test_unsupported_preprocessor_is_rejected():
+    X = pd.DataFrame({"surface": [50.0, 80.0, 120.0], "city": ["Gent", "Gent", "Namur"]})
+    preprocessor = ColumnTransformer([("num", StandardScaler(), ["surface"]), ("cat", OrdinalEncoder(), ["city"])])
+    model = LinearRegression().fit(preprocessor.fit_transform(X), [1.0, 2.0, 3.0])
+
+    assert not LinearFastPath.supports(model, preprocessor)
+    with pytest.raises(TypeError):
+        LinearFastPath.from_pipeline(model, preprocessor)
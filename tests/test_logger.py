@@ -0,0 +1,59 @@
+import pytest
+
+from utils import logger
+from utils.logger import MetricsRegistry, span
+
+
+@pytest.fixture
+def records():
+    collected = []
+    logger.enable(sink=collected.append)
+    yield collected
+    logger.disable()
+
+
+def test_spans_record_fields_timings_and_parent(records):
+    with span("train.all"):
+        with span("train.fit", model_type="rf", rows=10) as s:
+            s.set(cols=3)
+        with pytest.raises(ValueError):
+            with span("train.save"):
+                raise ValueError("disk full")
+
+    fit, save, outer = records
+    assert fit["name"] == "train.fit" and fit["parent"] == "train.all"
+    assert (fit["model_type"], fit["rows"], fit["cols"], fit["status"]) == ("rf", 10, 3, "ok")
+    assert fit["wall_ms"] >= 0 and fit["cpu_ms"] >= 0
+    assert (save["status"], save["error"]) == ("error", "ValueError")
+    assert outer["parent"] is None
+
+
+def test_disabled_spans_record_nothing():
+    collected = []
+    logger.enable(sink=collected.append)
+    logger.disable()
+    with span("predict", rows=1) as s:
+        s.set(cols=2)
+    assert collected == []
+
+
+def test_metrics_render_prometheus_text():
+    registry = MetricsRegistry(enabled=True)
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    requests.inc(route="/predict")
+    requests.inc(2, route="/predict")
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, route="/predict")
+
+    text = registry.render()
+    assert 'requests_total{route="/predict"} 3' in text
+    assert 'latency_seconds_bucket{route="/predict",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/predict",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/predict",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/predict"} 3' in text
+
+    disabled = MetricsRegistry(enabled=False)
+    counter = disabled.counter("requests_total", "Requests")
+    counter.inc()
+    assert counter.value() == 0
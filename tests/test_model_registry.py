@@ -0,0 +1,57 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ml_models.artifacts import save_artifact
+from scripts.predict_price import ModelRegistry
+
+LISTING = {"surface": 80.0, "rooms": 2.0}
+
+
+def _train(model_dir, dataset: str, slope: float) -> str:
+    X = pd.DataFrame({"surface": [50.0, 100.0, 150.0], "rooms": [1.0, 3.0, 2.0]})
+    model = LinearRegression().fit(X, slope * X["surface"])
+    path = os.path.join(model_dir, "lr", f"{dataset}_lr.pkl")
+    save_artifact(model, path)
+    return path
+
+
+def test_registry_evicts_the_least_recently_used_model(tmp_path):
+    for i, dataset in enumerate(["a", "b", "c"]):
+        _train(str(tmp_path), dataset, slope=1000.0 * (i + 1))
+    registry = ModelRegistry(str(tmp_path), max_size=2)
+    assert registry.list_models() == [("a", "lr"), ("b", "lr"), ("c", "lr")]
+
+    first = registry.get("a", "lr")
+    registry.get("b", "lr")
+    # "a" becomes the most recently used, so loading "c" evicts "b"
+    assert registry.get("a", "lr") is first
+    registry.get("c", "lr")
+
+    assert len(registry) == 2
+    assert (registry.hits, registry.misses) == (1, 3)
+    assert registry.get("a", "lr") is first
+    registry.get("b", "lr")
+    assert registry.misses == 4
+
+    with pytest.raises(KeyError):
+        registry.get("d", "lr")
+
+
+def test_registry_reloads_a_rewritten_artifact(tmp_path):
+    path = _train(str(tmp_path), "demo", slope=1000.0)
+    registry = ModelRegistry(str(tmp_path))
+    old = registry.get("demo", "lr")
+    assert old.predict_batch([LISTING])[0] == pytest.approx(80_000)
+
+    _train(str(tmp_path), "demo", slope=2000.0)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    new = registry.get("demo", "lr")
+
+    assert new is not old
+    assert new.predict_batch([LISTING])[0] == pytest.approx(160_000)
+    # The previous version is dropped instead of taking a cache slot
+    assert len(registry) == 1
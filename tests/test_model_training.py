@@ -1 +1,130 @@
-# Placeholder file - to be implemented
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ml_models.artifacts import load_artifact
+
+from scripts.predict_price import ModelRegistry
+from scripts.train_all_datasets import DatasetTrainer
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    n_rows = 200
+    surface = rng.uniform(40, 300, size=n_rows).round()
+    bedrooms = rng.integers(1, 6, size=n_rows).astype(float)
+    # Brugge only shows up in the last chunk
+    town = np.where(np.arange(n_rows) >= 180, "Brugge", rng.choice(["Gent", "Leuven", "Namur"], size=n_rows))
+    condition = rng.choice(["Good", "New", "To renovate"], size=n_rows)
+    price = 2500 * surface + 8000 * bedrooms + rng.normal(scale=10000, size=n_rows)
+
+    path = tmp_path / "data"
+    path.mkdir()
+    pd.DataFrame({
+        "price": [f"{p:,.0f} €".replace(",", " ") for p in price],
+        "surface_livable": [f"{s:.0f} m²" for s in surface],
+        "bedrooms": bedrooms,
+        "town": town,
+        "condition": condition,
+    }).to_csv(path / "demo.csv", index=False)
+    return str(path)
+
+
+def test_linear_models_get_one_hot_categoricals(tmp_path):
+    trainer = DatasetTrainer(model_dir=str(tmp_path), cache_dir=None)
+    assert {m: trainer._encoding_for(m) for m in trainer.model_types} == {"rf": "codes", "lr": "onehot",
+                                                                         "dgbm": "codes"}
+
+    trainer.memory_efficient = True
+    assert {m: trainer._encoding_for(m) for m in trainer.model_types} == {"rf": "onehot", "lr": "onehot",
+                                                                         "dgbm": "native"}
+    # Streaming fits a single preprocessor for every model type
+    trainer.chunk_size = 100
+    assert {trainer._encoding_for(m) for m in trainer.model_types} == {"codes"}
+
+
+def test_streaming_training_matches_an_in_memory_fit(tmp_path, data_dir):
+    model_dir = str(tmp_path / "models")
+    trainer = DatasetTrainer(data_dir=data_dir, model_dir=model_dir, model_types=["lr", "dgbm"], cache_dir=None,
+                             chunk_size=40)
+    results = trainer.train_all()
+    assert [res["status"] for res in results] == ["ok", "ok"]
+
+    # The same rows and codes preprocessor, fitted in memory
+    in_memory = DatasetTrainer(data_dir=data_dir, model_dir=str(tmp_path / "in_memory"), cache_dir=None)
+    _, X, y = in_memory._load_dataset("demo.csv")
+    preprocessor = in_memory._build_preprocessor(X, encoding="codes")[0].fit(X, y)
+    expected = LinearRegression().fit(preprocessor.transform(X), y).predict(preprocessor.transform(X))
+
+    registry = ModelRegistry(model_dir)
+    assert registry.list_models() == [("demo", "dgbm"), ("demo", "lr")]
+    predictor = registry.get("demo", "lr")
+    streamed = predictor.preprocessor.named_transformers_["cat"]
+    for vocabulary, in_memory_vocabulary in zip(streamed.vocabularies_,
+                                                preprocessor.named_transformers_["cat"].vocabularies_):
+        np.testing.assert_array_equal(vocabulary, in_memory_vocabulary)
+    assert "Brugge" in streamed.vocabularies_[0]
+
+    np.testing.assert_allclose(predictor.predict_batch(X), expected, rtol=1e-6)
+    assert np.isfinite(registry.get("demo", "dgbm").predict_batch(X.to_dict("records"))).all()
+    assert os.path.exists(os.path.join(model_dir, "profiles", "demo.json"))
+
+
+def test_memory_efficient_training_declares_native_categoricals(tmp_path, data_dir):
+    model_dir = str(tmp_path / "models")
+    trainer = DatasetTrainer(data_dir=data_dir, model_dir=model_dir, model_types=["dgbm", "lr"], cache_dir=None,
+                             memory_efficient=True)
+    results = trainer.train_all()
+    assert [res["status"] for res in results] == ["ok", "ok"]
+
+    _, X, _ = trainer._load_dataset("demo.csv")
+    assert {str(dtype) for dtype in X.dtypes} == {"float32", "category"}
+    # surface and bedrooms are scaled first, then the codes of town and condition
+    model = load_artifact(os.path.join(model_dir, "dgbm", "demo_dgbm.pkl"))
+    assert model.booster_.params["categorical_column"] == [2, 3]
+
+    registry = ModelRegistry(model_dir)
+    for model_type in ("dgbm", "lr"):
+        assert np.isfinite(registry.get("demo", model_type).predict_batch(X)).all()
+
+
+def test_parallel_training_matches_a_sequential_run(tmp_path, data_dir):
+    runs = {}
+    for n_workers in (1, 2):
+        model_dir = str(tmp_path / f"workers_{n_workers}")
+        # The trainer's forest is unseeded by default: seed it through the tuned parameters
+        os.makedirs(os.path.join(model_dir, "tuning"))
+        with open(os.path.join(model_dir, "tuning", "demo.json"), "w") as f:
+            json.dump({"models": {"rf": {"best_params": {"n_estimators": 20, "random_state": 0}}}}, f)
+        trainer = DatasetTrainer(data_dir=data_dir, model_dir=model_dir, model_types=["rf", "dgbm"], cache_dir=None,
+                                 n_workers=n_workers, tuned_params=True)
+        results = sorted(trainer.train_all(), key=lambda res: res["model_type"])
+        assert [res["status"] for res in results] == ["ok", "ok"]
+        runs[n_workers] = (model_dir, results)
+
+    references = set()
+    for model_dir, _ in runs.values():
+        refs = set()
+        for model_type in ("rf", "dgbm"):
+            with open(os.path.join(model_dir, model_type, f"demo_{model_type}.json")) as f:
+                refs.add(json.load(f)["preprocessor"])
+        # Both model types share one content-addressed preprocessor, stored once
+        assert len(refs) == 1 and re.fullmatch(r"preprocessors/[0-9a-f]{16}\.pkl", next(iter(refs)))
+        assert os.listdir(os.path.join(model_dir, "preprocessors")) == [os.path.basename(next(iter(refs)))]
+        references |= refs
+    # The same fitted preprocessor gets the same name in both runs
+    assert len(references) == 1
+
+    _, X, _ = DatasetTrainer(data_dir=data_dir, cache_dir=None)._load_dataset("demo.csv")
+    (sequential_dir, sequential), (parallel_dir, parallel) = runs[1], runs[2]
+    for expected, actual in zip(sequential, parallel):
+        assert actual["r2"] == pytest.approx(expected["r2"], rel=1e-9)
+        model_type = actual["model_type"]
+        np.testing.assert_allclose(ModelRegistry(parallel_dir).get("demo", model_type).predict_batch(X),
+                                   ModelRegistry(sequential_dir).get("demo", model_type).predict_batch(X))
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from utils.constants import EXCLUDE_COLUMNS
+from utils.data_loader import CachedDatasetLoader
+from utils.preprocessing import PostalCodeEncoder, clean_dataframe
+
+
+def test_table_shrinks_codes_toward_their_area_and_falls_back():
+    X = pd.DataFrame({
+        "postal_code": [9000.0] * 20 + [9050.0, 9310.0, 9310.0],
+        "surface": [100.0] * 23,
+    })
+    y = np.array([300_000.0] * 20 + [200_000.0, 150_000.0, 170_000.0])
+    encoder = PostalCodeEncoder(smoothing=10.0).fit(X, y)
+
+    out = encoder.transform(pd.DataFrame({
+        "postal_code": [9000.0, 9050.0, 9310.0, 9020.0, 1000.0, np.nan, 9000.5],
+        "surface": [np.nan] * 7,  # Not needed to look up
+    }))
+    overall = 3000.0  # Median price per m² of all listings
+    assert out.shape == (7, len(PostalCodeEncoder.FEATURES))
+    # 9050 has one listing: mostly its area's (90xx) value
+    assert out[1, 2] == out[0, 2] and out[1, 0] < out[1, 2] and out[1, 0] > 2000.0
+    assert out[0, 1] == np.float32(np.log1p(20)) and out[1, 3] == np.float32(np.log1p(21))
+    # 9020 has no listing: its area's values; 9310 is in another area of the same province
+    np.testing.assert_array_equal(out[3, [0, 2]], out[0, [2, 2]])
+    assert out[3, 1] == 0.0 and out[2, 2] != out[0, 2]
+    # Unknown, missing or non-integer codes get the overall values
+    for row in out[4:]:
+        np.testing.assert_array_equal(row, [overall, 0.0, overall, 0.0])
+
+
+def test_fit_transform_never_uses_a_listings_own_price():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    codes = rng.choice(np.arange(1000, 1100), n).astype(float)
+    X = pd.DataFrame({"postal_code": codes, "surface": np.full(n, 100.0)})
+    y = rng.lognormal(12.5, 0.3, n)
+    # A single listing with an extreme price in its own code
+    X.loc[n] = [5000.0, 100.0]
+    y = np.r_[y, 5e7]
+
+    encoder = PostalCodeEncoder(n_folds=5)
+    out = encoder.fit_transform(X, y)
+    # Fitted on the other folds only: the overall values of those folds
+    assert abs(out[n, 0] - encoder.fallback_[0]) < 0.05 * encoder.fallback_[0] and out[n, 1] == 0.0
+    # transform() uses the table of all rows, which does include it
+    assert encoder.transform(X.iloc[[n]])[0, 0] > 10 * encoder.fallback_[0]
+    # Out-of-fold features stay close to the full-table ones elsewhere
+    full = encoder.transform(X.iloc[:n])
+    assert np.median(np.abs(out[:n, 0] - full[:, 0]) / full[:, 0]) < 0.05
+
+
+def test_postal_code_is_parsed_from_the_url_or_address(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(
+        "price,postal_code,url,address\n"
+        "250 000 €,57,https://immovlan.be/en/detail/apartment/for-sale/9300/aalst/rbt1,Geldhofstraat 57 9300 Aalst\n"
+        "310 000 €,16,,Rue du Ruisseau 16 5300 Andenne\n"
+        "199 000 €,8500,,\n"
+    )
+    mapping = {"columns": {col: [col] for col in ["price", "postal_code", "url", "address"]}}
+    loader = CachedDatasetLoader(mapping, clean_dataframe, cache_dir=None, exclude_columns=EXCLUDE_COLUMNS)
+
+    df = loader.load(str(path), "price")
+    # House numbers replaced by the stated codes, the scraped value kept when none is stated
+    assert df["postal_code"].tolist() == [9300.0, 5300.0, 8500.0]
+    assert list(df.columns) == ["price", "postal_code"]
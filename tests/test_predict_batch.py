@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from ml_models.artifacts import save_artifact
+from scripts.predict_price import PricePredictor
+from utils.preprocessing import build_preprocessor
+
+LISTINGS = pd.DataFrame({
+    "surface": [55.0, 80.0, 120.0, 95.0, 210.0, 70.0, 140.0],
+    "rooms": [1.0, 2.0, 3.0, 2.0, 5.0, 2.0, 4.0],
+    "city": ["Gent", "Namur", "Gent", "Leuven", "Namur", "Brugge", "Leuven"],
+})
+
+
+def _save_pair(model_class, model_dir) -> tuple:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "surface": rng.uniform(40, 300, size=200),
+        "rooms": rng.integers(1, 6, size=200).astype(float),
+        "city": rng.choice(["Gent", "Leuven", "Namur"], size=200),
+    })
+    y = 2500 * X["surface"] + 8000 * X["rooms"] + X["city"].map({"Gent": 5e4, "Leuven": 8e4, "Namur": 0})
+    preprocessor = build_preprocessor(["surface", "rooms"], ["city"])
+    model = model_class().fit(preprocessor.fit_transform(X), y)
+
+    model_path, preprocessor_path = os.path.join(model_dir, "demo.pkl"), os.path.join(model_dir, "demo_prep.pkl")
+    save_artifact(model, model_path)
+    save_artifact(preprocessor, preprocessor_path)
+    return model_path, preprocessor_path
+
+
+@pytest.fixture(scope="module", params=[LinearRegression, RandomForestRegressor])
+def artifacts(request, tmp_path_factory):
+    return _save_pair(request.param, tmp_path_factory.mktemp("models"))
+
+
+@pytest.fixture(params=PricePredictor.BACKENDS)
+def predictor(request, artifacts):
+    return PricePredictor(*artifacts, backend=request.param)
+
+
+@pytest.mark.parametrize("to_input", [
+    lambda df: df.to_dict("records"),
+    lambda df: df,
+    lambda df: {col: df[col].tolist() for col in df.columns},
+], ids=["records", "dataframe", "columns"])
+def test_predict_batch_matches_one_listing_at_a_time(predictor, to_input):
+    expected = [predictor.predict(listing) for listing in LISTINGS.to_dict("records")]
+
+    result = predictor.predict_batch(to_input(LISTINGS), chunk_size=3)
+    assert result.dtype == np.float64
+    np.testing.assert_allclose(result, expected)
+    np.testing.assert_allclose(predictor.predict_many(to_input(LISTINGS)), expected)
+
+
+def test_predict_batch_rejects_unsupported_input(predictor):
+    with pytest.raises(ValueError):
+        predictor.predict_batch(LISTINGS, chunk_size=0)
+    with pytest.raises(ValueError):
+        predictor.predict_batch(LISTINGS.drop(columns=["rooms"]))
+    with pytest.raises(TypeError):
+        predictor.predict_batch("surface=80")
+
+
+def test_compiled_linear_model_scores_chunk_by_chunk(tmp_path, monkeypatch):
+    artifacts = _save_pair(LinearRegression, tmp_path)
+    predictor = PricePredictor(*artifacts, backend="compiled")
+    assert predictor.fast_path is not None
+    chunks = []
+    predict = predictor.fast_path.predict
+    monkeypatch.setattr(predictor.fast_path, "predict", lambda X: chunks.append(len(X)) or predict(X))
+
+    expected = PricePredictor(*artifacts).predict_batch(LISTINGS)
+    np.testing.assert_allclose(predictor.predict_batch(LISTINGS, chunk_size=3), expected)
+    assert chunks == [3, 3, 1]
@@ -0,0 +1,113 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ml_models.artifacts import save_artifact
+from scripts.predict_price import ModelRegistry, PricePredictor
+from utils.prediction_cache import CachedPredictor, DiskCache, MemoryCache, listing_key
+
+
+def _train(model_dir, slope: float):
+    X = pd.DataFrame({"surface": [50.0, 100.0, 150.0], "rooms": [1.0, 3.0, 2.0]})
+    model = LinearRegression().fit(X, slope * X["surface"])
+    path = os.path.join(model_dir, "lr", "demo_lr.pkl")
+    save_artifact(model, path)
+    return path
+
+
+class CountingPredictor:
+    """
+    Stands in for PricePredictor and records the listings it scores.
+    """
+
+    model_path = __file__
+    preprocessor_path = None
+    preprocessor = None
+    _to_frame = staticmethod(PricePredictor._to_frame)
+
+    def __init__(self):
+        self.model = LinearRegression()
+        self.model.feature_names_in_ = np.array(["surface", "city"], dtype=object)
+        self.scored = []
+
+    def predict_batch(self, listings, chunk_size=10000):
+        self.scored.extend(listings)
+        return np.array([listing["surface"] * 1000.0 for listing in listings])
+
+
+def test_listing_key_merges_only_equivalent_inputs():
+    columns = ["surface", "city"]
+    base = listing_key({"surface": 120, "city": "Gent"}, columns)
+
+    assert listing_key({"city": "Gent", "surface": np.float32(120.0), "url": "https://a"}, columns) == base
+    assert listing_key({"surface": 120, "city": "Gent "}, columns) != base
+    assert listing_key({"surface": 120, "city": None}, columns) != listing_key({"surface": 120, "city": np.nan}, columns)
+    assert listing_key({"surface": 120}, columns) != listing_key({"surface": 120, "city": None}, columns)
+
+
+def test_memory_cache_evicts_least_recently_used_and_expires():
+    cache = MemoryCache(max_size=2)
+    cache.set_many("v1", {"a": 1.0, "b": 2.0})
+    cache.get_many("v1", ["a"])
+    cache.set_many("v1", {"c": 3.0})
+
+    assert cache.get_many("v1", ["a", "b", "c"]) == {"a": 1.0, "c": 3.0}
+    assert cache.get_many("v2", ["a"]) == {}
+    assert cache.stats.evictions == 1
+
+    expiring = MemoryCache(ttl=0.01)
+    expiring.set_many("v1", {"a": 1.0})
+    time.sleep(0.02)
+    assert expiring.get_many("v1", ["a"]) == {}
+    assert expiring.stats.expirations == 1
+
+
+def test_disk_cache_is_shared_and_bounded(tmp_path):
+    path = str(tmp_path / "predictions.sqlite")
+    writer, reader = DiskCache(path, max_size=100), DiskCache(path, max_size=100)
+    writer.set_many("v1", {f"k{i}": float(i) for i in range(150)})
+
+    assert len(reader) <= 100
+    assert reader.get_many("v1", ["k149"]) == {"k149": 149.0}
+    reader.invalidate("v1")
+    assert len(writer) == 0
+
+
+def test_cached_predictor_scores_each_distinct_listing_once():
+    predictor = CountingPredictor()
+    cached = CachedPredictor(predictor, MemoryCache())
+    listings = [{"surface": 50, "city": "Gent", "page": 1}, {"surface": 50.0, "city": "Gent", "page": 2},
+                {"surface": 70, "city": "Gent"}]
+
+    np.testing.assert_array_equal(cached.predict_batch(listings), [50000.0, 50000.0, 70000.0])
+    np.testing.assert_array_equal(cached.predict_batch(pd.DataFrame(listings)), [50000.0, 50000.0, 70000.0])
+    assert len(predictor.scored) == 2
+    assert cached.cache.stats.snapshot()["hits"] == 2
+
+    # A single listing as a dict of scalars, and a dict of columns
+    np.testing.assert_array_equal(cached.predict_batch({"surface": 70, "city": "Gent"}), [70000.0])
+    np.testing.assert_array_equal(cached.predict_batch({"surface": [50, 90], "city": ["Gent", "Gent"]}),
+                                  [50000.0, 90000.0])
+    assert len(predictor.scored) == 3
+
+
+@pytest.mark.parametrize("backend", ["memory", "disk"])
+def test_registry_reload_invalidates_cached_predictions(tmp_path, backend):
+    model_dir = str(tmp_path / "models")
+    path = _train(model_dir, slope=1000.0)
+    cache = MemoryCache() if backend == "memory" else DiskCache(str(tmp_path / "cache.sqlite"))
+    registry = ModelRegistry(model_dir, prediction_cache=cache)
+    listing = {"surface": 80.0, "rooms": 2.0}
+
+    assert registry.get("demo", "lr").predict_batch([listing])[0] == pytest.approx(80_000)
+    assert len(cache) == 1
+
+    _train(model_dir, slope=2000.0)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert registry.get("demo", "lr").predict_batch([listing])[0] == pytest.approx(160_000)
+    # Only the entry of the new version is left
+    assert len(cache) == 1
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from utils.preprocessing import (
+    build_preprocessor, categorical_feature_indices, clean_dataframe, count_unparsed, detect_numeric_text_columns,
+    parse_numeric_text
+)
+
+
+def test_parse_numeric_text_drops_currency_units_and_spaces():
+    series = pd.Series(["169 000 €", "69 m²", "151 kWh/m²/year", "1 250\xa0000 €", None, "on request"])
+    np.testing.assert_array_equal(parse_numeric_text(series), [169000.0, 69.0, 151.0, 1250000.0, np.nan, np.nan])
+
+
+def test_comma_is_the_decimal_point():
+    np.testing.assert_array_equal(parse_numeric_text(pd.Series(["7,5", "12,25 m²", "0,8"])), [7.5, 12.25, 0.8])
+
+
+def test_numeric_columns_pass_through_unchanged():
+    series = pd.Series([120, 85, 300], dtype=np.int64)
+    parsed = parse_numeric_text(series)
+    assert parsed.dtype == np.float64
+    np.testing.assert_array_equal(parsed, [120.0, 85.0, 300.0])
+
+    floats = pd.Series([1.5, np.nan, 1e6])
+    np.testing.assert_array_equal(parse_numeric_text(floats), floats.to_numpy())
+
+
+def test_count_unparsed_ignores_missing_and_blank_values():
+    series = pd.Series(["250 000 €", "n/a", None, "  ", "on request"])
+    assert count_unparsed(series, parse_numeric_text(series)) == 2
+
+
+def test_detects_numeric_text_columns():
+    df = pd.DataFrame({
+        "epc_score": ["151 kWh/m²/year", "320 kWh/m²/year", None, "95 kWh/m²/year"],
+        "garden_surface": ["120 m²", "45 m²", "80 m²", "7,5 m²"],
+        "city": ["Gent", "Aalst", "Gent", "Namur"],
+        "surface_count": [1.0, 2.0, 3.0, 4.0],
+    })
+    assert detect_numeric_text_columns(df) == ["epc_score", "garden_surface"]
+
+
+def test_clean_dataframe_counts_unparsed_values_and_strips_headers_and_text():
+    raw = pd.DataFrame({
+        "price": ["250 000 €", "n/a", None, "310 000 €"],
+        "surface ": ["90 m²", "x", "120 m²", "75 m²"],
+        "garden_surface": ["120 m²", "45 m²", "80 m²", "7,5 m²"],
+        " city": [" Gent", "Aalst ", None, "Gent"],
+    })
+    df = clean_dataframe(raw, "price")
+
+    assert list(df.columns) == ["price", "surface", "garden_surface", "city"]
+    np.testing.assert_array_equal(df["price"], [250000.0, np.nan, np.nan, 310000.0])
+    np.testing.assert_array_equal(df["surface"], [90.0, np.nan, 120.0, 75.0])
+    np.testing.assert_array_equal(df["garden_surface"], [120.0, 45.0, 80.0, 7.5])
+    assert list(df["city"]) == ["Gent", "Aalst", "nan", "Gent"]
+    assert df.attrs["unparsed_values"] == {"price": 1, "surface": 1}
+
+
+def test_memory_efficient_preprocessor_outputs_float32():
+    X = pd.DataFrame({
+        "surface": np.array([60.0, 90.0, 120.0, 75.0], dtype=np.float32),
+        "rooms": np.array([1.0, 2.0, 3.0, 2.0], dtype=np.float32),
+        "city": pd.Categorical(["Gent", "Namur", "Gent", "Aalst"]),
+    })
+
+    one_hot = build_preprocessor(["surface", "rooms"], ["city"], memory_efficient=True).fit_transform(X)
+    assert sp.issparse(one_hot) and one_hot.dtype == np.float32
+    assert one_hot.shape == (4, 2 + 3)
+
+    codes = build_preprocessor(["surface", "rooms"], ["city"], memory_efficient=True,
+                               native_categorical=True).fit_transform(X)
+    assert isinstance(codes, np.ndarray) and codes.dtype == np.float32
+    # Codes follow the scaled numeric columns
+    assert categorical_feature_indices(["surface", "rooms"], ["city"]) == [2]
+    np.testing.assert_array_equal(codes[:, 2], [1, 2, 1, 0])
+
+    default = build_preprocessor(["surface", "rooms"], ["city"]).fit_transform(X)
+    assert isinstance(default, np.ndarray) and default.dtype == np.float64
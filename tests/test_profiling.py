@@ -0,0 +1,139 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.preprocessing import clean_dataframe
+from utils.profiling import DatasetProfile, DriftMonitor, QuantileSketch, TopKSketch, drift_report
+
+
+def test_sketches_merge_to_the_statistics_of_the_whole_data():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(12, 0.6, 100_000)
+    sketches = [QuantileSketch(relative_accuracy=0.01) for _ in range(4)]
+    for sketch, part in zip(sketches, np.array_split(values, 4)):
+        sketch.add(part)
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(QuantileSketch.from_dict(sketch.to_dict()))
+
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    assert merged.count == len(values) and merged.exact is None
+    np.testing.assert_allclose(merged.quantiles(qs), np.quantile(values, qs), rtol=0.02)
+
+    # Few distinct values stay exact
+    exact = QuantileSketch()
+    exact.add(np.array([1, 2, 2, 3, 3, 3], dtype=float))
+    assert exact.exact == {1.0: 1, 2.0: 2, 3.0: 3} and exact.quantiles(0.5)[0] == 2.0
+    assert exact.cdf([2.0])[0] == 0.5
+
+    words = rng.choice([f"v{i}" for i in range(200)], 20_000, p=np.r_[[0.3, 0.2], np.full(198, 0.5 / 198)])
+    top = TopKSketch(capacity=16)
+    top.add(words[:10_000])
+    other = TopKSketch(capacity=16)
+    other.add(words[10_000:])
+    top.merge(other)
+    assert [value for value, _ in top.top(2)] == ["v0", "v1"]
+    true_count = int((words == "v0").sum())
+    assert true_count - top.error <= top.counters["v0"] <= true_count
+
+
+def test_profile_counts_unparsed_values_and_round_trips(tmp_path):
+    raw = pd.DataFrame({
+        "price": ["250 000 €", "n/a", None, "310 000 €"],
+        "surface": ["90 m²", "x", "120 m²", "75 m²"],
+        "city ": ["Gent", "Aalst", None, "Gent"],
+    })
+    df = clean_dataframe(raw, "price")
+    assert df.attrs["unparsed_values"] == {"price": 1, "surface": 1}
+
+    profile = DatasetProfile.from_frame(df)
+    assert profile.kinds == {"price": "numeric", "surface": "numeric", "city": "categorical"}
+    assert profile.columns["price"].nulls == 2 and profile.columns["price"].unparsed == 1
+    assert profile.columns["city"].sketch.top(1) == [("Gent", 2)]
+    assert profile.complete_rows == 2
+
+    profile.save(str(tmp_path / "profile.json"))
+    loaded = DatasetProfile.load(str(tmp_path / "profile.json"))
+    assert loaded.to_dict() == profile.to_dict()
+
+    # Chunked profiles merge into the profile of the whole frame
+    merged = DatasetProfile.from_frame(df.iloc[:2]).merge(DatasetProfile.from_frame(df.iloc[2:]))
+    assert merged.columns["surface"].mean == profile.columns["surface"].mean
+    assert merged.columns["surface"].m2 == profile.columns["surface"].m2
+
+
+def test_drift_report_flags_shifted_values_and_null_rates(tmp_path):
+    rng = np.random.default_rng(1)
+    n = 20_000
+    reference = DatasetProfile.from_frame(pd.DataFrame({
+        "price": rng.lognormal(12.5, 0.4, n),
+        "surface": rng.normal(110, 30, n),
+        "bedrooms": rng.integers(1, 5, n).astype(float),
+        "city": rng.choice(["Gent", "Aalst", "Brugge"], n),
+    }))
+    listings = pd.DataFrame({
+        "surface": rng.normal(110, 30, 5_000) * 1.4,
+        "bedrooms": np.where(rng.random(5_000) < 0.3, np.nan, rng.integers(1, 5, 5_000)),
+        "city": rng.choice(["Gent", "Aalst", "Brugge"], 5_000),
+    })
+
+    # Two serving processes sharing a directory
+    monitors = [DriftMonitor(reference, "immo", directory=str(tmp_path), buffer_size=100) for _ in range(2)]
+    monitors[0].observe(listings.iloc[:2_500])
+    monitors[1].observe(listings.iloc[2_500:].to_dict("records"))
+    monitors[1].flush()
+    # Same pid in this test: rename the flushed profile as the file of another live process
+    os.replace(monitors[1]._path(), tmp_path / f"immo.{os.getppid()}.json")
+
+    current = monitors[0].current()
+    assert current.rows == 5_000
+    report = drift_report(reference, current)
+    assert "price" not in report  # Never sent at serving time
+    assert report["surface"]["status"] == "drift" and report["surface"]["ks"] > 0.3
+    assert report["bedrooms"]["status"] == "drift" and report["bedrooms"]["psi"] < 0.1
+    assert report["city"]["status"] == "ok"
+
+
+def test_profiles_of_exited_processes_expire(tmp_path):
+    reference = DatasetProfile.from_frame(pd.DataFrame({"surface": [60.0, 90.0, 120.0]}))
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+
+    worker = DriftMonitor(reference, "immo", directory=str(tmp_path))
+    worker.observe([{"surface": 80.0}] * 10)
+    worker.flush()
+    # A worker replaced by a restart left its profile behind
+    os.replace(worker._path(), tmp_path / f"immo.{exited.pid}.json")
+
+    monitor = DriftMonitor(reference, "immo", directory=str(tmp_path))
+    monitor.observe([{"surface": 100.0}] * 3)
+    assert monitor.current().rows == 3
+    assert not (tmp_path / f"immo.{exited.pid}.json").exists()
+
+
+def test_api_profiles_listings_off_the_event_loop(monkeypatch):
+    import api.main as api
+
+    class Monitor:
+        threads = []
+
+        def observe(self, listings):
+            self.threads.append(threading.current_thread())
+
+    async def scenario():
+        api.app.state.executor = ThreadPoolExecutor(max_workers=1)
+        api.app.state.drift_monitors = {"immo": Monitor()}
+        api.app.state.drift_tasks = set()
+        api._observe("immo", [{"surface": 90.0}])
+        await asyncio.gather(*api.app.state.drift_tasks)
+        api.app.state.executor.shutdown()
+
+    monkeypatch.setattr(api, "DRIFT_MONITORING", True)
+    asyncio.run(scenario())
+    assert Monitor.threads and Monitor.threads[0] is not threading.main_thread()
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scripts.score_listings as score_listings
+from scripts.predict_price import ModelRegistry
+from scripts.score_listings import BulkScorer
+from utils.column_mapper import load_column_mapping, standardize_columns
+from utils.preprocessing import clean_dataframe
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+MODEL_DIR = os.path.join(ROOT, "local_models")
+MAPPING = os.path.join(ROOT, "configs", "feature_mapping.yaml")
+MODELS = [("immovlan_real_estate", "dgbm"), ("immovlan_real_estate", "lr")]
+
+
+@pytest.fixture(scope="module")
+def listings_csv(tmp_path_factory):
+    df = pd.read_csv(os.path.join(ROOT, "data", "immovlan_real_estate.csv"))
+    complete = df.dropna().index[:40]
+    sample = pd.concat([df.loc[complete], df.drop(complete).head(160)]).sample(frac=1, random_state=0)
+    path = tmp_path_factory.mktemp("listings") / "listings.csv"
+    sample.to_csv(path, index=False)
+    return str(path)
+
+
+def scorer(**kwargs):
+    return BulkScorer(MODELS, model_dir=MODEL_DIR, chunk_size=32, mapping_path=MAPPING, **kwargs)
+
+
+def test_parallel_parquet_scoring_matches_csv_scoring(listings_csv, tmp_path):
+    n_rows = len(pd.read_csv(listings_csv))
+    summary = scorer().score(listings_csv, str(tmp_path / "p.csv"), progress=False)
+    assert summary["rows"] == n_rows and summary["chunks"] == -(-n_rows // 32) and summary["scored"] > 0
+    assert not os.path.exists(tmp_path / "p.csv.parts")
+
+    pd.read_csv(listings_csv).to_parquet(tmp_path / "listings.parquet", row_group_size=50)
+    scorer(n_workers=2).score(str(tmp_path / "listings.parquet"), str(tmp_path / "p.parquet"), progress=False)
+
+    expected = pd.read_csv(tmp_path / "p.csv")
+    actual = pd.read_parquet(tmp_path / "p.parquet")
+    assert actual["row"].tolist() == list(range(n_rows))
+    pd.testing.assert_frame_equal(actual.drop(columns="url"), expected.drop(columns="url"), check_dtype=False)
+
+    # Scored rows match the predictor on the same listings
+    scored = actual.dropna(subset=["ensemble"])
+    predictor = ModelRegistry(MODEL_DIR).get(*MODELS[1])
+    listings = standardize_columns(pd.read_csv(listings_csv), load_column_mapping(MAPPING))
+    X = clean_dataframe(listings, "price").iloc[scored["row"]]
+    np.testing.assert_allclose(scored["immovlan_real_estate_lr"], predictor.predict_batch(X))
+
+
+def test_interrupted_job_resumes_from_checkpoint(listings_csv, tmp_path, monkeypatch):
+    output = str(tmp_path / "p.parquet")
+    score_part = score_listings._score_part
+
+    def failing_score_part(index, first_row, chunk):
+        if index == 3:
+            raise KeyboardInterrupt
+        return score_part(index, first_row, chunk)
+
+    monkeypatch.setattr(score_listings, "_score_part", failing_score_part)
+    with pytest.raises(KeyboardInterrupt):
+        scorer().score(listings_csv, output, progress=False)
+    assert not os.path.exists(output)
+    monkeypatch.undo()
+
+    summary = scorer().score(listings_csv, output, progress=False)
+    assert summary["resumed_chunks"] == 3 and summary["rows"] == len(pd.read_csv(listings_csv))
+
+    fresh = scorer().score(listings_csv, str(tmp_path / "fresh.parquet"), progress=False)
+    assert fresh["resumed_chunks"] == 0 and fresh["scored"] == summary["scored"]
+    pd.testing.assert_frame_equal(pd.read_parquet(output), pd.read_parquet(tmp_path / "fresh.parquet"))
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from scripts.train_all_datasets import DatasetTrainer
+from utils.training_manifest import TrainingManifest, data_fingerprint, is_append
+
+
+SOURCE_CSV = "data/immovlan_real_estate.csv"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    df = pd.read_csv(SOURCE_CSV)
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    df.iloc[:12000].to_csv(data_dir / "immo.csv", index=False)
+    return data_dir, df
+
+
+def _train(tmp_path, data_dir, **kwargs):
+    trainer = DatasetTrainer(data_dir=str(data_dir), model_dir=str(tmp_path / "models"), cache_dir=None, **kwargs)
+    return {r["model_type"]: r for r in trainer.train_all()}
+
+
+def test_is_append_requires_an_unchanged_prefix(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_text("x,y\n1,2\n")
+    before = data_fingerprint(str(path))
+
+    path.write_text("x,y\n1,2\n3,4\n")
+    assert is_append(str(path), before)
+    path.write_text("x,y\n9,2\n3,4\n")
+    assert not is_append(str(path), before)
+
+
+def test_incremental_run_skips_up_to_date_and_continues_boosting_on_appended_rows(tmp_path, data_dir):
+    data_dir, df = data_dir
+    first = _train(tmp_path, data_dir)
+    assert {r["status"] for r in first.values()} == {"ok"}
+
+    unchanged = _train(tmp_path, data_dir, incremental=True)
+    assert {r["status"] for r in unchanged.values()} == {"skipped"}
+
+    df.iloc[12000:].to_csv(data_dir / "immo.csv", mode="a", header=False, index=False)
+    appended = _train(tmp_path, data_dir, incremental=True)
+    assert appended["dgbm"]["continued"] and appended["dgbm"]["status"] == "ok"
+    assert not appended["rf"]["continued"] and appended["rf"]["status"] == "ok"
+
+    manifest = TrainingManifest(str(tmp_path / "models"))
+    assert manifest.get("immo", "dgbm")["continued"] == 1
+    assert manifest.get("immo", "rf")["inputs"]["data"]["rows"] == len(df)
+
+    # Any other change of the inputs is a full refit
+    with open(os.path.join(tmp_path, "models", "manifest.json"), "r") as f:
+        raw = json.load(f)
+    raw["entries"]["immo/lr"]["inputs"]["code"] = "older"
+    with open(os.path.join(tmp_path, "models", "manifest.json"), "w") as f:
+        json.dump(raw, f)
+    changed = _train(tmp_path, data_dir, incremental=True)
+    assert changed["lr"]["status"] == "ok" and changed["rf"]["status"] == "skipped"
@@ -0,0 +1,102 @@
+import lightgbm as lgb
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from ml_models.artifacts import load_artifact, save_artifact
+from ml_models.tree_engine import FlatForest, check_compiled, compile_trees
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    X[:, 4] = rng.integers(0, 8, size=600)
+    y = 3 * X[:, 0] - X[:, 1] ** 2 + (X[:, 4] % 3) + rng.normal(scale=0.1, size=600)
+
+    X_test = rng.normal(size=(400, 5))
+    X_test[:, 4] = rng.integers(-1, 10, size=400)
+    X_test[::7, 0] = np.nan
+    X_test[::5, 1] = 0.0
+    X_test[::11, 4] = np.nan
+    return X, y, X_test
+
+
+def test_random_forest_matches_sklearn(data):
+    X, y, X_test = data
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+    compiled = compile_trees(model)
+
+    assert isinstance(compiled, FlatForest)
+    assert check_compiled(model, compiled, X_test) < 1e-9
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"zero_as_missing": True},
+    {"objective": "poisson"},
+    {"boosting_type": "rf", "subsample": 0.8, "subsample_freq": 1},
+])
+def test_lightgbm_matches_booster(data, params):
+    X, y, X_test = data
+    target = np.exp(y / 4) if params.get("objective") == "poisson" else y
+    model = lgb.LGBMRegressor(n_estimators=30, verbose=-1, **params).fit(X, target, categorical_feature=[4])
+
+    assert check_compiled(model, compile_trees(model), X_test) < 1e-6
+    assert check_compiled(model.booster_, compile_trees(model.booster_), X_test) < 1e-6
+
+
+def test_engines_agree_on_every_batch_size(data):
+    X, y, X_test = data
+    compiled = compile_trees(RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y))
+
+    for n_rows in [1, 2, compiled.native_min_rows, len(X_test)]:
+        batch = X_test[:n_rows]
+        np.testing.assert_allclose(compiled.predict(batch, engine="numpy"), compiled.predict(batch, engine="native"))
+
+
+def test_check_compiled_rejects_a_different_model(data):
+    X, y, X_test = data
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    other = compile_trees(RandomForestRegressor(n_estimators=10, random_state=1).fit(X, y))
+
+    with pytest.raises(ValueError):
+        check_compiled(model, other, X_test)
+
+
+def test_compiled_artifact_round_trip(tmp_path, data):
+    X, y, X_test = data
+    model = lgb.LGBMRegressor(n_estimators=30, verbose=-1).fit(X, y)
+    path = str(tmp_path / "model.pkl")
+
+    save_artifact(model, path, compile_trees=True)
+    loaded = load_artifact(path)
+
+    assert isinstance(loaded, FlatForest)
+    assert isinstance(loaded.threshold, np.memmap)
+    np.testing.assert_allclose(loaded.predict(X_test), model.predict(X_test), rtol=1e-9)
+
+
+def test_forests_are_only_flattened_on_request(tmp_path, data):
+    X, y, X_test = data
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+
+    save_artifact(model, str(tmp_path / "native.pkl"))
+    assert isinstance(load_artifact(str(tmp_path / "native.pkl")), RandomForestRegressor)
+
+    save_artifact(model, str(tmp_path / "flat.pkl"), compile_trees=True)
+    flat = load_artifact(str(tmp_path / "flat.pkl"))
+    assert isinstance(flat, FlatForest)
+    assert check_compiled(model, flat, X_test) < 1e-9
+
+
+def test_sklearn_node_layout_is_the_pinned_one():
+    from sklearn.tree._tree import NODE_DTYPE
+
+    assert NODE_DTYPE.names == (
+        "left_child", "right_child", "feature", "threshold", "impurity",
+        "n_node_samples", "weighted_n_node_samples", "missing_go_to_left",
+    ), (
+        "sklearn.tree._tree.NODE_DTYPE changed; FlatForest._build_kernel writes this "
+        "private layout and must be updated together with the scikit-learn pin."
+    )
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_models.lgbm_model import LGBMModel
+from ml_models.lr_model import LRModel
+from ml_models import tuning
+from ml_models.tuning import FoldCache, SuccessiveHalvingSearch, sample_candidates, tune_dataset
+from utils.preprocessing import build_preprocessor
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "surface": rng.uniform(40, 300, size=300),
+        "rooms": rng.integers(1, 6, size=300).astype(float),
+        "city": rng.choice(["Gent", "Leuven", "Namur"], size=300),
+    })
+    y = 2500 * X["surface"] + 8000 * X["rooms"] + rng.normal(scale=20000, size=300)
+    return X, y
+
+
+class CountingBuilder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, X, encoding):
+        self.calls += 1
+        return build_preprocessor(["surface", "rooms"], ["city"]), None
+
+
+def test_sample_candidates_is_distinct_and_falls_back_to_the_grid():
+    space = {"a": [1, 2, 3], "b": ["x", "y"]}
+    assert len(sample_candidates(space, 100)) == 6
+
+    sampled = sample_candidates(space, 4, random_state=1)
+    assert len(sampled) == 4
+    assert len({tuple(sorted(c.items())) for c in sampled}) == 4
+
+
+def test_successive_halving_reuses_fold_matrices(dataset):
+    X, y = dataset
+    builder = CountingBuilder()
+    cache = FoldCache(X, y, builder, n_splits=3)
+
+    result = SuccessiveHalvingSearch(LGBMModel, n_candidates=9, n_jobs=1, max_boost_rounds=200).run(
+        cache, verbose=False
+    )
+    SuccessiveHalvingSearch(LRModel, n_jobs=1).run(cache, verbose=False)
+
+    # One preprocessor per fold, shared by every candidate and model class
+    assert builder.calls == 3
+    assert [rung["candidates"] for rung in result["rungs"]] == [9, 3]
+    assert result["cv_folds"] == 3
+    assert result["n_fits"] == 9 + 3 * 2
+    assert 0 < result["best_params"]["n_estimators"] <= 200
+    assert result["cv_r2"] > 0.8
+
+
+def test_early_stopping_never_sees_the_validation_fold(dataset, monkeypatch):
+    X, y = dataset
+    fold = FoldCache(X, y, CountingBuilder(), n_splits=3).folds("onehot")[0]
+    fit_calls = []
+    fit_estimator = tuning._fit_estimator
+
+    def recording_fit_estimator(model_class, params, X_train, y_train, X_val=None, y_val=None, *args):
+        fit_calls.append((y_train, y_val))
+        return fit_estimator(model_class, params, X_train, y_train, X_val, y_val, *args)
+
+    monkeypatch.setattr(tuning, "_fit_estimator", recording_fit_estimator)
+    params = {**LGBMModel.DEFAULT_PARAMS, "n_estimators": 200}
+    score, best_iteration = tuning._score_fold(LGBMModel, params, fold, early_stopping_rounds=10)
+
+    y_fit, y_stop = fit_calls[0]
+    # The stopping set is carved out of the training rows, the validation fold is only scored
+    assert len(y_fit) + len(y_stop) == len(fold["y_train"])
+    assert set(y_stop) <= set(fold["y_train"]) and not set(y_stop) & set(fold["y_val"])
+    assert 0 < best_iteration <= 200
+    assert score > 0.8
+
+
+def test_tune_dataset_reports_a_held_out_score(dataset):
+    X, y = dataset
+    results = tune_dataset(
+        X, y, {"lr": LRModel}, build_preprocessor=CountingBuilder(), encoding_for=lambda m: "onehot",
+        n_splits=3, n_jobs=1, verbose=False,
+    )
+    assert set(results["lr"]["best_params"]) <= {"fit_intercept", "positive"}
+    assert results["lr"]["held_out_r2"] > 0.8
+    assert results["lr"]["n_test"] == 60
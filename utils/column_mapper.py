@@ -1,17 +1,242 @@
+import copy
+import hashlib
+import json
+import os
+
+import pandas as pd
 import yaml
 
+
+# Parsed mapping files, keyed by (absolute path, mtime): the YAML is only read again when it changes
+_MAPPING_CACHE = {}
+
+# Compiled resolvers, keyed by the hash of their mapping
+_RESOLVERS = {}
+
+
 def load_column_mapping(filepath="configs/feature_mapping.yaml"):
-    with open(filepath, "r") as f:
-        return yaml.safe_load(f)
+    """
+    Loads the column mapping (standard name -> source variants, and optional dtypes).
+
+    The parsed file is cached until its modification time changes; every call returns
+    its own copy, so callers may modify it.
+    """
+    key = (os.path.abspath(filepath), os.stat(filepath).st_mtime_ns)
+    if key not in _MAPPING_CACHE:
+        with open(filepath, "r") as f:
+            _MAPPING_CACHE[key] = yaml.safe_load(f)
+    return copy.deepcopy(_MAPPING_CACHE[key])
+
+
+def mapping_sha256(mapping_dict: dict) -> str:
+    """
+    Returns a stable hash of a column mapping (key order does not matter).
+    """
+    payload = json.dumps(mapping_dict, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def get_resolver(mapping_dict: dict) -> "SchemaResolver":
+    """
+    Returns the compiled SchemaResolver of a mapping, built once per distinct mapping.
+    """
+    key = mapping_sha256(mapping_dict)
+    if key not in _RESOLVERS:
+        _RESOLVERS[key] = SchemaResolver(mapping_dict)
+    return _RESOLVERS[key]
+
 
 def standardize_columns(df, mapping_dict):
     """
     Renames columns in the dataframe to standardized names using a mapping dictionary.
     """
-    inverse_map = {}
-    for standard_col, variants in mapping_dict["columns"].items():
-        for v in variants:
-            inverse_map[v] = standard_col
+    return get_resolver(mapping_dict).resolve(list(df.columns)).apply(df)
+
+
+class ResolvedSchema:
+    """
+    How the columns of one source header map to the standard schema.
+
+    Attributes:
+      fingerprint (str): Hash of the source header.
+      rename (dict): {source column: standard name} for the selected columns to rename.
+      usecols (list): Source columns to parse (mapped columns not excluded, plus unknown
+        columns unless they are dropped).
+      dtype (dict): {source column: dtype} for the selected columns with a declared dtype.
+      unknown (list): Source columns matching no variant of the mapping.
+      missing (list): Standard columns (not excluded) with no variant in the header.
+      duplicates (dict): {standard name: [source columns]} when several variants of the
+        same column are present; only the first one is parsed.
+      near_matches (dict): {unknown column: standard name} for unknown columns differing from
+        a variant only by case (surrounding whitespace is ignored when matching).
+    """
+
+    def __init__(self, fingerprint, rename, usecols, dtype, unknown, missing, duplicates, near_matches):
+        self.fingerprint = fingerprint
+        self.rename = rename
+        self.usecols = usecols
+        self.dtype = dtype
+        self.unknown = unknown
+        self.missing = missing
+        self.duplicates = duplicates
+        self.near_matches = near_matches
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        True when every source column is known and every standard column is present.
+        """
+        return not (self.unknown or self.missing or self.duplicates)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Selects and renames the columns of a frame read with this schema.
+        """
+        if len(self.usecols) != df.shape[1]:
+            df = df[[col for col in self.usecols if col in df.columns]]
+        return df.rename(columns=self.rename) if self.rename else df
+
+    def summary(self, name: str = "source") -> list:
+        """
+        Returns the validation messages of the schema (empty when it is valid).
+        """
+        messages = []
+        if self.unknown:
+            described = [
+                f"'{col}' (did you mean '{self.near_matches[col]}'?)" if col in self.near_matches else f"'{col}'"
+                for col in self.unknown
+            ]
+            messages.append(f"{name}: {len(self.unknown)} unknown column(s): {', '.join(described)}")
+        if self.missing:
+            messages.append(f"{name}: {len(self.missing)} missing column(s): {', '.join(self.missing)}")
+        for standard_col, sources in self.duplicates.items():
+            messages.append(f"{name}: several variants of '{standard_col}' ({', '.join(sources)}), "
+                            f"keeping '{sources[0]}'")
+        return messages
+
+
+class SchemaResolver:
+    """
+    Column mapping compiled once: resolves source headers to the standard schema.
+
+    The inverse variant -> standard map is built at construction, and the ResolvedSchema
+    of each distinct (header, selection) is cached, so feeds sharing a header are resolved
+    once. read_csv() and iter_csv() read only the selected columns with their declared
+    dtypes, and report unknown, missing and duplicate columns the first time a header is seen.
+
+    Attributes:
+      mapping_dict (dict): {"columns": {standard: [variants]}, "dtypes": {standard: dtype}}.
+      inverse (dict): {variant: standard name}.
+      dtypes (dict): {standard name: dtype} applied while parsing.
+    """
+
+    def __init__(self, mapping_dict: dict):
+        self.mapping_dict = mapping_dict
+        self.inverse = {}
+        for standard_col, variants in mapping_dict["columns"].items():
+            for v in variants:
+                self.inverse[v] = standard_col
+        self.dtypes = dict(mapping_dict.get("dtypes") or {})
+        self._normalized = {v.strip().lower(): standard_col for v, standard_col in self.inverse.items()}
+        self._schemas = {}
+
+    def resolve(self, header: list, exclude=(), drop_unknown: bool = False) -> ResolvedSchema:
+        """
+        Resolves a source header.
+
+        Args:
+          header (list): Source column names, in file order.
+          exclude (iterable): Standard columns not to parse.
+          drop_unknown (bool): Leave out the columns matching no variant (kept by default,
+            under their source name).
+
+        Returns:
+          ResolvedSchema: Cached per distinct header and selection.
+        """
+        key = (tuple(header), tuple(sorted(exclude)), drop_unknown)
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = self._schemas[key] = self._compile(list(header), set(exclude), drop_unknown)
+        return schema
+
+    def _compile(self, header, exclude, drop_unknown) -> ResolvedSchema:
+        fingerprint = hashlib.sha256("\x1f".join(map(str, header)).encode("utf-8")).hexdigest()[:16]
+        rename, usecols, dtype = {}, [], {}
+        unknown, near_matches, sources_of = [], {}, {}
+
+        for col in header:
+            standard_col = self.inverse.get(col)
+            if standard_col is None and isinstance(col, str):
+                # Stray whitespace in a header (e.g. 'epc_valid_until ') still matches its variant
+                standard_col = self.inverse.get(col.strip())
+            if standard_col is None:
+                unknown.append(col)
+                if isinstance(col, str) and col.strip().lower() in self._normalized:
+                    near_matches[col] = self._normalized[col.strip().lower()]
+                if not drop_unknown:
+                    usecols.append(col)
+                continue
+            sources_of.setdefault(standard_col, []).append(col)
+            if standard_col in exclude or len(sources_of[standard_col]) > 1:
+                continue
+            usecols.append(col)
+            if col != standard_col:
+                rename[col] = standard_col
+            if standard_col in self.dtypes:
+                dtype[col] = self.dtypes[standard_col]
+
+        missing = [col for col in self.mapping_dict["columns"] if col not in sources_of and col not in exclude]
+        duplicates = {col: sources for col, sources in sources_of.items() if len(sources) > 1}
+        return ResolvedSchema(fingerprint, rename, usecols, dtype, unknown, missing, duplicates, near_matches)
+
+    def _resolve_file(self, path, exclude, drop_unknown, verbose) -> ResolvedSchema:
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        seen = (tuple(header), tuple(sorted(exclude)), drop_unknown) in self._schemas
+        schema = self.resolve(header, exclude, drop_unknown)
+        if verbose and not seen:
+            for message in schema.summary(os.path.basename(path)):
+                print(f"[WARNING] {message}")
+        return schema
+
+    def read_csv(self, path: str, exclude=(), drop_unknown: bool = False, verbose: bool = True,
+                 **kwargs) -> pd.DataFrame:
+        """
+        Reads the selected columns of a CSV with their declared dtypes and standard names.
+
+        A file whose values do not fit a declared dtype is read again with inferred types.
+        Extra keyword arguments are passed to pd.read_csv.
+        """
+        schema = self._resolve_file(path, exclude, drop_unknown, verbose)
+        try:
+            df = pd.read_csv(path, usecols=schema.usecols, dtype=schema.dtype, **kwargs)
+        except (ValueError, TypeError) as e:
+            if not schema.dtype:
+                raise
+            print(f"[WARNING] {os.path.basename(path)} does not fit the declared dtypes ({e}), inferring them")
+            df = pd.read_csv(path, usecols=schema.usecols, **kwargs)
+        return schema.apply(df)
+
+    def iter_csv(self, path: str, chunksize: int, exclude=(), drop_unknown: bool = False, verbose: bool = True,
+                 start: int = 0, **kwargs):
+        """
+        Same as read_csv, yielding chunks of chunksize rows.
 
-    df = df.rename(columns=lambda col: inverse_map.get(col, col))
-    return df
+        start skips the first data rows without parsing them (e.g. to resume a job).
+        If a chunk does not fit the declared dtypes, the rest of the file is read with
+        inferred types.
+        """
+        schema = self._resolve_file(path, exclude, drop_unknown, verbose)
+        rows_read = start
+        try:
+            for chunk in pd.read_csv(path, usecols=schema.usecols, dtype=schema.dtype, chunksize=chunksize,
+                                     skiprows=range(1, start + 1), **kwargs):
+                rows_read += len(chunk)
+                yield schema.apply(chunk)
+            return
+        except (ValueError, TypeError) as e:
+            if not schema.dtype:
+                raise
+            print(f"[WARNING] {os.path.basename(path)} does not fit the declared dtypes ({e}), inferring them")
+        for chunk in pd.read_csv(path, usecols=schema.usecols, chunksize=chunksize,
+                                 skiprows=range(1, rows_read + 1), **kwargs):
+            yield schema.apply(chunk)
@@ -1 +1,22 @@
-# Placeholder file - to be implemented
+# Sub-directory of the model directory holding the content-addressed preprocessors
+# shared by all model types of a dataset (see DatasetTrainer._save_preprocessor)
+PREPROCESSOR_DIR = "preprocessors"
+
+# Sub-directory of the model directory holding the hyperparameter search results,
+# one <dataset>.json per dataset (see scripts/tune_models.py)
+TUNING_DIR = "tuning"
+
+# File of the model directory recording the inputs every model artifact was trained
+# from (see utils.training_manifest)
+MANIFEST_FILE = "manifest.json"
+
+# Source columns that are not model features (see DatasetTrainer and scripts/score_listings.py)
+EXCLUDE_COLUMNS = ["url", "address", "epc_valid_until", "epc_score"]
+
+# Excluded columns still read from the source: clean_dataframe takes the postal code of a
+# listing from them (see utils.preprocessing.parse_postal_code), then they are dropped
+POSTAL_CODE_SOURCES = ["url", "address"]
+
+# Sub-directory of the model directory holding the training data profile of each
+# dataset, one <dataset>.json per dataset (see utils.profiling)
+PROFILE_DIR = "profiles"
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from utils.column_mapper import get_resolver, mapping_sha256
+from utils.constants import POSTAL_CODE_SOURCES
+from utils.hashing import file_sha256
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is optional, caching is skipped without it
+    feather = None
+
+
+# Bump when the cleaning logic changes so existing snapshots are rebuilt
+CACHE_VERSION = 6
+
+# Schema metadata key of the snapshot holding the DataFrame.attrs set by the cleaning function
+_ATTRS_KEY = b"dataframe_attrs"
+
+
+class CachedDatasetLoader:
+    """
+    Reads a raw CSV, standardizes and cleans it once, and caches the result as a Feather
+    (Arrow IPC) snapshot.
+
+    The CSV is read through the compiled SchemaResolver of the mapping: only the mapped
+    columns not in exclude_columns (plus unknown ones) are parsed, with their declared dtypes.
+    A snapshot is keyed by the SHA-256 of the raw file, the hash of the column mapping,
+    the excluded columns, the target column and CACHE_VERSION, so it is rebuilt
+    automatically when any of them changes. Snapshots are stored uncompressed and read with
+    memory mapping, so a cache hit costs little more than mapping the file.
+
+    Attributes:
+      mapping_dict (dict): Column mapping (see utils.column_mapper).
+      clean_fn (callable): Cleaning function called as clean_fn(df, target).
+      cache_dir (str, optional): Snapshot folder. None disables caching.
+      exclude_columns (list): Standard columns not parsed at all.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, mapping_dict: dict, clean_fn, cache_dir: str = "data/.cache", exclude_columns=()):
+        self.mapping_dict = mapping_dict
+        self.clean_fn = clean_fn
+        self.cache_dir = cache_dir if feather is not None else None
+        self.exclude_columns = sorted(exclude_columns)
+        self.resolver = get_resolver(mapping_dict)
+        self._mapping_hash = mapping_sha256(mapping_dict)
+
+        if cache_dir and feather is None:
+            print("[WARNING] pyarrow is not installed: cleaned dataset snapshots are disabled")
+
+    def load(self, dataset_path: str, target: str) -> pd.DataFrame:
+        """
+        Returns the standardized and cleaned DataFrame for a raw CSV file.
+        """
+        if not self.cache_dir:
+            return self._build(dataset_path, target)
+
+        snapshot_path = self.snapshot_path(dataset_path, target)
+        if os.path.exists(snapshot_path):
+            try:
+                table = feather.read_table(snapshot_path, memory_map=True)
+                df = table.to_pandas()
+                df.attrs = json.loads((table.schema.metadata or {}).get(_ATTRS_KEY, b"{}"))
+                return df
+            except Exception as e:
+                print(f"[WARNING] Unreadable snapshot {snapshot_path}, rebuilding: {e}")
+
+        df = self._build(dataset_path, target)
+        self._write_snapshot(df, snapshot_path, dataset_path)
+        return df
+
+    def snapshot_path(self, dataset_path: str, target: str) -> str:
+        dataset_name = os.path.splitext(os.path.basename(dataset_path))[0]
+        key = hashlib.sha256(
+            f"{self._source_hash(dataset_path)}|{self._mapping_hash}|{','.join(self.exclude_columns)}|{target}|"
+            f"{CACHE_VERSION}".encode("utf-8")
+        ).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{dataset_name}__{key}.feather")
+
+    def _build(self, dataset_path: str, target: str) -> pd.DataFrame:
+        exclude = [c for c in self.exclude_columns if c != target]
+        # The postal code sources are parsed for the cleaning function, then dropped
+        sources = [c for c in exclude if c in POSTAL_CODE_SOURCES]
+        df = self.resolver.read_csv(dataset_path, exclude=[c for c in exclude if c not in sources])
+        df = self.clean_fn(df, target)
+        return df.drop(columns=[c for c in sources if c in df.columns])
+
+    def _write_snapshot(self, df: pd.DataFrame, snapshot_path: str, dataset_path: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Only one snapshot per source file is kept
+        prefix = os.path.basename(snapshot_path).split("__")[0] + "__"
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix) and filename.endswith(".feather"):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+            metadata = {**(table.schema.metadata or {}), _ATTRS_KEY: json.dumps(df.attrs).encode("utf-8")}
+            feather.write_feather(table.replace_schema_metadata(metadata), tmp_path, compression="uncompressed")
+            os.replace(tmp_path, snapshot_path)
+        except Exception as e:
+            # Caching is best effort: training goes on with the in-memory frame
+            print(f"[WARNING] Could not cache {dataset_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _source_hash(self, dataset_path: str) -> str:
+        """
+        Hashes the raw file, reusing the previous digest while its size and mtime are unchanged.
+        """
+        stat = os.stat(dataset_path)
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        index = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+
+        abs_path = os.path.abspath(dataset_path)
+        entry = index.get(abs_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        digest = file_sha256(dataset_path)
+        index[abs_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, index_path)
+        return digest
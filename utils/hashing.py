@@ -0,0 +1,12 @@
+import hashlib
+
+
+def file_sha256(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Streams a file through SHA-256 and returns the hex digest.
+    """
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -1 +1,332 @@
-# Placeholder file - to be implemented
+"""
+Lightweight instrumentation: timing spans emitted as structured logs, plus an optional
+Prometheus-style metrics registry.
+
+Spans measure a block of code:
+
+  with span("train.fit", dataset="immovlan", model_type="rf", rows=len(X)) as s:
+      model.fit(X, y)
+      s.set(n_trees=len(model.estimators_))
+
+or a whole function with the @instrumented("stage") decorator. On exit a span emits one
+JSON record with its fields plus wall_ms, cpu_ms (process CPU time, all threads), peak_rss_mb
+(high-water mark of the process), rss_growth_mb (how much the span raised that mark), the
+enclosing span ("parent") and "status" ("ok" or "error").
+
+Instrumentation is off by default: span() then returns a shared no-op object, so an
+instrumented call costs one function call. Enable it with INSTRUMENTATION=1 or enable().
+Records go to the "instrumentation" logger (one JSON line per span on stderr unless the
+application configures handlers), or to the sink passed to enable().
+"""
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows, peak RSS is then omitted
+    resource = None
+
+
+LOGGER_NAME = "instrumentation"
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_RSS_DIVISOR = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+_enabled = False
+_sink = None
+_local = threading.local()
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process in MB (None where unsupported).
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / _RSS_DIVISOR
+
+
+def _log_sink(record: dict):
+    logging.getLogger(LOGGER_NAME).info(json.dumps(record, default=str))
+
+
+def enable(sink=None):
+    """
+    Turns span recording on.
+
+    Args:
+      sink (callable, optional): Called with each span record (a dict). Defaults to one
+        JSON line per record on the "instrumentation" logger.
+    """
+    global _enabled, _sink
+    logger = logging.getLogger(LOGGER_NAME)
+    if sink is None and not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    _sink = sink or _log_sink
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Span:
+    """
+    One timed block. Use through span(); set() adds fields (e.g. row counts known later).
+    """
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+        return self
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self._rss_start = peak_rss_mb()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        rss = peak_rss_mb()
+        _local.stack.pop()
+
+        record = {"event": "span", "name": self.name, "parent": self.parent, **self.fields,
+                  "wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu * 1000, 3)}
+        if rss is not None:
+            record["peak_rss_mb"] = round(rss, 1)
+            record["rss_growth_mb"] = round(rss - self._rss_start, 1)
+        record["status"] = "ok" if exc_type is None else "error"
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        try:
+            _sink(record)
+        except Exception as e:
+            # Instrumentation must never break the instrumented code
+            print(f"[WARNING] Instrumentation sink failed: {e}")
+        return False
+
+
+class _NullSpan:
+    """
+    Shared stand-in returned by span() while instrumentation is disabled.
+    """
+
+    def set(self, **fields):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **fields):
+    """
+    Returns a context manager timing its block (a no-op while instrumentation is disabled).
+
+    Args:
+      name (str): Stage name, dotted by convention ("train.fit", "predict.batch").
+      **fields: Extra fields of the record, e.g. dataset, model_type, rows, cols.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+
+def instrumented(name: str = None):
+    """
+    Decorator wrapping every call of a function in a span (named after the function by default).
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Prometheus-style metrics
+
+# Default upper bounds (seconds) of latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[k] for k in self.labelnames)
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter, one value per label combination.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative histogram with fixed buckets, plus the sum and count of observations.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple, buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # One count per bucket plus the +Inf bucket, then the sum
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[:-1]) if state else 0
+
+    def _render(self) -> list:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds counters and histograms and renders them in the Prometheus text format.
+
+    While disabled, inc() and observe() return immediately, so metrics can be declared and
+    updated unconditionally.
+
+    Attributes:
+      enabled (bool): Whether updates are recorded.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered with another type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric._render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the API (enabled with METRICS_ENABLED=1)
+METRICS = MetricsRegistry(enabled=_env_flag("METRICS_ENABLED"))
+
+if _env_flag("INSTRUMENTATION"):
+    enable()
@@ -0,0 +1,361 @@
+"""
+Prediction cache in front of PricePredictor.
+
+Re-listed and re-scraped properties produce the same feature dict many times. A
+CachedPredictor scores each distinct listing once per model version: the key is the
+SHA-256 of the canonical form of the listing (see listing_key) combined with the artifact
+version of the model, so entries written for an older model can never be served after a
+reload.
+
+Two backends share the same interface:
+  MemoryCache  in-process LRU with optional TTL (default)
+  DiskCache    SQLite file shared by every process pointing at it (e.g. the API workers)
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _canonical_value(value):
+    """
+    Maps a feature value to a JSON value that only merges inputs the model cannot tell apart.
+
+    Numbers (bool, int, float, NumPy scalars) become floats, since 3, 3.0 and np.int64(3)
+    are scaled and one-hot encoded identically. NaN and None stay distinct: OneHotEncoder
+    treats them as different categories. Strings are kept as is.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, int, float, np.bool_, np.integer, np.floating)):
+        number = float(value)
+        if math.isnan(number):
+            return {"nan": True}
+        if math.isinf(number):
+            return {"inf": number > 0}
+        return number
+    if value is pd.NaT:
+        return {"nat": True}
+    return {"repr": repr(value)}
+
+
+def listing_key(listing: dict, columns=None) -> str:
+    """
+    Returns the canonical hash of a listing.
+
+    Args:
+      listing (dict): Raw feature values.
+      columns (iterable, optional): Input columns of the model. Other fields (e.g. url, page
+        of a scraped listing) are left out of the key since the model ignores them.
+
+    Returns:
+      str: Hex SHA-256 of the sorted, canonicalized features.
+    """
+    if columns is not None:
+        # A missing column is part of the key too (the model fails on it either way)
+        items = {col: _canonical_value(listing.get(col)) if col in listing else {"missing": True} for col in columns}
+    else:
+        items = {str(k): _canonical_value(v) for k, v in listing.items()}
+    payload = json.dumps(items, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """
+    Hit, miss and eviction counters of a cache backend.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class MemoryCache:
+    """
+    Thread-safe in-process LRU cache of predictions with an optional time to live.
+
+    Attributes:
+      max_size (int): Maximum number of entries; the least recently used one is evicted.
+      ttl (float, optional): Seconds an entry stays valid. None keeps entries until evicted.
+      stats (CacheStats): Hit/miss statistics.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, version: str, keys: list) -> dict:
+        """
+        Returns {key: prediction} for the keys present and not expired.
+        """
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((version, key))
+                if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                    del self._entries[(version, key)]
+                    self.stats.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.stats.misses += 1
+                    continue
+                self._entries.move_to_end((version, key))
+                self.stats.hits += 1
+                found[key] = entry[0]
+        return found
+
+    def set_many(self, version: str, items: dict):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items.items():
+                self._entries[(version, key)] = (float(value), now)
+                self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, version: str = None):
+        """
+        Drops the entries of one model version, or everything with version=None.
+        """
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+            else:
+                for entry_key in [k for k in self._entries if k[0] == version]:
+                    del self._entries[entry_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    Prediction cache stored in a SQLite file, shared by every process opening the same path.
+
+    Each process keeps its own connection (SQLite serializes the writers, WAL mode lets readers
+    proceed meanwhile). Entries are evicted least recently used first once the table holds
+    more than max_size rows. Statistics are per process.
+
+    Attributes:
+      path (str): SQLite database file, created if needed.
+      max_size (int): Maximum number of entries.
+      ttl (float, optional): Seconds an entry stays valid (wall clock, shared by processes).
+      stats (CacheStats): Hit/miss statistics of this process.
+    """
+
+    # Size and expiry are enforced after every max_size * MAINTENANCE_SHARE inserts (by this
+    # process), evicting that many extra rows, so COUNT(*) does not run on every insert
+    MAINTENANCE_SHARE = 0.05
+
+    def __init__(self, path: str, max_size: int = 1_000_000, ttl: float = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer.")
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " version TEXT NOT NULL, key TEXT NOT NULL, value REAL NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (version, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_accessed ON predictions (accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are not shared between threads (nor inherited across fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get_many(self, version: str, keys: list) -> dict:
+        if not keys:
+            return {}
+        conn = self._connection()
+        now = time.time()
+        found = {}
+        # SQLite limits the number of bound parameters per statement
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, value, created FROM predictions WHERE version = ? AND key IN ({placeholders})",
+                [version, *batch],
+            ).fetchall()
+            for key, value, created in rows:
+                if self.ttl is not None and now - created > self.ttl:
+                    continue
+                found[key] = value
+
+        with self._lock:
+            self.stats.hits += len(found)
+            self.stats.misses += len(keys) - len(found)
+        if found:
+            conn.executemany(
+                "UPDATE predictions SET accessed = ? WHERE version = ? AND key = ?",
+                [(now, version, key) for key in found],
+            )
+        return found
+
+    def set_many(self, version: str, items: dict):
+        if not items:
+            return
+        conn = self._connection()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO predictions (version, key, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            [(version, key, float(value), now, now) for key, value in items.items()],
+        )
+        slack = max(1, int(self.max_size * self.MAINTENANCE_SHARE))
+        with self._lock:
+            self._inserts += len(items)
+            due = self._inserts >= slack
+            if due:
+                self._inserts = 0
+        if due:
+            self._maintain(conn, now, slack)
+
+    def _maintain(self, conn: sqlite3.Connection, now: float, slack: int):
+        """
+        Deletes expired entries, then the least recently used ones above max_size.
+        """
+        expired = 0
+        if self.ttl is not None:
+            expired = conn.execute("DELETE FROM predictions WHERE created < ?", (now - self.ttl,)).rowcount
+        excess = len(self) - self.max_size
+        evicted = 0
+        if excess > 0:
+            evicted = conn.execute(
+                "DELETE FROM predictions WHERE rowid IN (SELECT rowid FROM predictions ORDER BY accessed LIMIT ?)",
+                (excess + slack,),
+            ).rowcount
+        with self._lock:
+            self.stats.expirations += expired
+            self.stats.evictions += evicted
+
+    def invalidate(self, version: str = None):
+        conn = self._connection()
+        if version is None:
+            conn.execute("DELETE FROM predictions")
+        else:
+            conn.execute("DELETE FROM predictions WHERE version = ?", (version,))
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+def artifact_version(predictor) -> str:
+    """
+    Identifies the model a PricePredictor serves: artifact paths and modification times.
+    """
+    parts = []
+    for path in (predictor.model_path, predictor.preprocessor_path):
+        if path:
+            parts.append(f"{os.path.abspath(path)}@{os.stat(path).st_mtime_ns}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class CachedPredictor:
+    """
+    Wraps a PricePredictor with a prediction cache.
+
+    predict() and predict_batch() look every listing up first and only score the misses,
+    in one predict_batch call. Other attributes are forwarded to the wrapped predictor.
+
+    Attributes:
+      predictor (PricePredictor): The wrapped predictor.
+      cache (MemoryCache or DiskCache): Cache backend, can be shared by several predictors.
+      version (str): Artifact version of the model, part of every key.
+      columns (list, optional): Model input columns hashed into the key (all fields if None).
+    """
+
+    def __init__(self, predictor, cache, version: str = None):
+        self.predictor = predictor
+        self.cache = cache
+        self.version = version or artifact_version(predictor)
+        source = predictor.preprocessor if predictor.preprocessor is not None else predictor.model
+        names = getattr(source, "feature_names_in_", None)
+        self.columns = [str(name) for name in names] if names is not None else None
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__ (guard against recursion on unpickling)
+        if name == "predictor":
+            raise AttributeError(name)
+        return getattr(self.predictor, name)
+
+    def predict(self, input_data: dict) -> float:
+        predicted_price = float(self.predict_batch([input_data])[0])
+        print(f">>> Predicted price from input: €{predicted_price:,.0f}")
+        return predicted_price
+
+    def predict_batch(self, input_data, chunk_size: int = 10000, verbose: bool = False) -> np.ndarray:
+        """
+        Same contract as PricePredictor.predict_batch, served from the cache where possible.
+        """
+        if isinstance(input_data, (pd.DataFrame, dict)):
+            # Normalized by the wrapped predictor: a dict is one listing or a dict of columns
+            listings = self.predictor._to_frame(input_data).to_dict("records")
+        else:
+            listings = list(input_data)
+
+        keys = [listing_key(listing, self.columns) for listing in listings]
+        found = self.cache.get_many(self.version, list(dict.fromkeys(keys)))
+
+        predictions = np.empty(len(listings), dtype=np.float64)
+        missing = {}
+        for i, key in enumerate(keys):
+            if key in found:
+                predictions[i] = found[key]
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            # Score each distinct missing listing once
+            first_rows = [rows[0] for rows in missing.values()]
+            scored = self.predictor.predict_batch([listings[i] for i in first_rows], chunk_size=chunk_size)
+            for rows, value in zip(missing.values(), scored):
+                predictions[rows] = value
+            self.cache.set_many(self.version, dict(zip(missing, scored)))
+
+        if verbose:
+            print(f">>> Predicted {len(listings):,} prices ({len(listings) - sum(map(len, missing.values())):,} "
+                  f"from cache)")
+        return predictions
+
+    predict_many = predict_batch
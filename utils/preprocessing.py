@@ -1 +1,501 @@
-# Placeholder file - to be implemented
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+
+# Columns always parsed as numbers (if present), in addition to the target
+NUMERIC_TEXT_COLUMNS = [
+    "surface", "terrace_surface", "bedroom1_surface",
+    "bedroom2_surface", "epc_score", "epc_total"
+]
+
+# Everything that is not part of a number: currency, units, (narrow) no-break spaces, ...
+_NON_NUMERIC = re.compile(r"[^\d.,]+")
+
+# A number followed by an optional unit, e.g. "169 000 €", "69 m²", "151 kWh/m²/year", "7,5"
+_NUMERIC_TEXT = re.compile(r"^\s*[-+]?\d[\d\s.,]*(?:[^\W\d_]|[€%/()\s])*$")
+
+# Postal code stated by a listing, by source column in order of preference: a path segment
+# of its url (".../for-sale/9300/aalst/...") or the code before the town closing its
+# address ("Geldhofstraat 2 9300 Aalst")
+POSTAL_CODE_PATTERNS = {
+    "url": r"/(\d{4})/",
+    "address": r"(?:^|\s)(\d{4})\s+\D+$",
+}
+
+
+def _parse_number(text: str) -> float:
+    """
+    Parses one numeric text value: keeps digits and separators, reads "," as a decimal point.
+    """
+    cleaned = _NON_NUMERIC.sub("", text).replace(",", ".")
+    try:
+        return float(cleaned)
+    except ValueError:
+        return np.nan
+
+
+def _map_unique(series: pd.Series, fn, na_value, dtype) -> np.ndarray:
+    """
+    Applies fn to each distinct value of a Series only once and scatters the results back.
+
+    Scraped columns repeat the same strings many times ("69 m²", "Normal", ...), so
+    factorizing first turns a per-row Python loop into a per-unique one.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = np.empty(len(uniques) + 1, dtype=dtype)
+    mapped[:-1] = [fn(value) for value in uniques]
+    # Code -1 (missing) picks the last slot
+    mapped[-1] = na_value
+    return mapped[codes]
+
+
+def parse_numeric_text(series: pd.Series) -> np.ndarray:
+    """
+    Converts a column of numeric text ("169 000 €", "69 m²", "151 kWh/m²/year") to float64.
+
+    Every character other than digits, "." and "," is dropped and "," is read as the
+    decimal point; values that do not parse become NaN. Already numeric columns are
+    returned as float64 without going through text.
+
+    Args:
+      series (pd.Series): Column to parse.
+
+    Returns:
+      np.ndarray: float64 values, NaN where the text is missing or not a number.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return _map_unique(series, lambda v: _parse_number(str(v)), np.nan, np.float64)
+
+
+def count_unparsed(series: pd.Series, parsed: np.ndarray) -> int:
+    """
+    Counts the values of a column that are present but became NaN in parse_numeric_text.
+
+    Blank strings count as missing values, not as parse failures.
+    """
+    failed = np.isnan(parsed) & series.notna().to_numpy()
+    if not failed.any():
+        return 0
+    return int((series[failed].astype(str).str.strip() != "").sum())
+
+
+def detect_numeric_text_columns(df: pd.DataFrame, min_share: float = 0.95, sample_size: int = 1000) -> list:
+    """
+    Lists the object columns whose values look like numbers with a unit.
+
+    A column qualifies when at least min_share of its distinct non-null values
+    (up to sample_size of them) match "<number> [unit]".
+    """
+    detected = []
+    for col in df.select_dtypes(include="object").columns:
+        uniques = df[col].dropna().unique()[:sample_size]
+        if len(uniques) == 0:
+            continue
+        matches = sum(1 for v in uniques if isinstance(v, str) and _NUMERIC_TEXT.match(v))
+        if matches / len(uniques) >= min_share:
+            detected.append(col)
+    return detected
+
+
+def strip_text(series: pd.Series) -> np.ndarray:
+    """
+    Casts a column to str and strips surrounding whitespace (missing values become "nan").
+    """
+    return _map_unique(series, lambda v: str(v).strip(), "nan", object)
+
+
+def strip_text_columns(X):
+    """
+    Applies strip_text to every column of X (DataFrame or 2-D array), e.g. in front of a
+    OneHotEncoder so raw serving input is encoded like the cleaned training data.
+    """
+    if isinstance(X, pd.DataFrame):
+        return pd.DataFrame({col: strip_text(X[col]) for col in X.columns}, index=X.index)
+    X = np.asarray(X, dtype=object)
+    return np.column_stack([strip_text(pd.Series(X[:, j])) for j in range(X.shape[1])]) if X.shape[1] else X
+
+
+def category_text(value) -> str:
+    """
+    Normalizes one categorical value like strip_text: stripped text, missing values -> "nan".
+    """
+    return "nan" if pd.isna(value) else str(value).strip()
+
+
+def numeric_text_columns(df: pd.DataFrame, target: str) -> list:
+    """
+    Lists the columns clean_dataframe parses as numbers: the target, NUMERIC_TEXT_COLUMNS
+    and the detected "<number> [unit]" object columns.
+    """
+    numeric_cols = [col for col in [target] + NUMERIC_TEXT_COLUMNS if col in df.columns]
+    return numeric_cols + [col for col in detect_numeric_text_columns(df) if col not in numeric_cols]
+
+
+def parse_postal_code(df: pd.DataFrame):
+    """
+    Returns the postal codes stated in the POSTAL_CODE_PATTERNS columns of a frame of listings
+    (float64, NaN where no column states one), or None if it has none of these columns.
+    """
+    sources = [col for col in POSTAL_CODE_PATTERNS if col in df.columns]
+    if not sources:
+        return None
+    codes = pd.Series(np.nan, index=df.index)
+    for col in sources:
+        found = df[col].astype("string").str.extract(POSTAL_CODE_PATTERNS[col], expand=False)
+        codes = codes.fillna(pd.to_numeric(found, errors="coerce").astype(np.float64))
+    return codes
+
+
+def clean_dataframe(df: pd.DataFrame, target: str, numeric_cols: list = None) -> pd.DataFrame:
+    """
+    Cleans the dataframe before training:
+    - Parses price, surface and EPC columns to float (removes currency, units, spaces)
+    - Parses any other object column that holds numbers with a unit
+    - Strips text from categorical columns
+
+    Pass numeric_cols to skip detection, e.g. to clean every chunk of a file the same way.
+    The number of values per column that were present but did not parse (and became NaN)
+    is recorded in df.attrs["unparsed_values"] (see utils.profiling).
+    Surrounding whitespace is stripped from the column names, so 'epc_valid_until ' is
+    cleaned (and excluded) as 'epc_valid_until'.
+
+    When the url or address of the listings is given, postal_code is the code they state
+    (see parse_postal_code): the scraped postal_code of some feeds holds house numbers. It
+    is only kept for the listings stating no code.
+    """
+    padded = {col: col.strip() for col in df.columns if isinstance(col, str) and col != col.strip()}
+    if padded:
+        df = df.rename(columns=padded)
+    if numeric_cols is None:
+        numeric_cols = numeric_text_columns(df, target)
+    numeric_cols = [col for col in numeric_cols if col in df.columns]
+
+    unparsed = {}
+    for col in numeric_cols:
+        parsed = parse_numeric_text(df[col])
+        n_unparsed = count_unparsed(df[col], parsed)
+        if n_unparsed:
+            unparsed[col] = n_unparsed
+        df[col] = parsed
+
+    codes = parse_postal_code(df)
+    if codes is not None:
+        scraped = pd.to_numeric(df["postal_code"], errors="coerce") if "postal_code" in df.columns else np.nan
+        df["postal_code"] = codes.fillna(scraped)
+
+    # Optional: strip whitespace from text columns
+    for col in df.select_dtypes(include="object").columns:
+        df[col] = strip_text(df[col])
+
+    df.attrs["unparsed_values"] = unparsed
+    return df
+
+
+class CategoricalEncoder(TransformerMixin, BaseEstimator):
+    """
+    Integer codes of categorical columns from vocabularies fitted once and saved with the preprocessor.
+
+    Values are normalized the way clean_dataframe's strip_text cleans training data
+    (stripped text, missing values -> "nan"), so raw serving input (None, " New ") gets the
+    codes of the cleaned training rows. The vocabulary of a column is the sorted array of
+    its distinct normalized values, so the codes of the training frame are the ones pandas'
+    astype("category").cat.codes gives. Values missing from the vocabulary get the reserved
+    code unknown_value. Only the vocabulary arrays are pickled; transform() looks values up
+    through a pandas Index hash table built on first use, with no category dtype built per call.
+
+    Attributes:
+      unknown_value (int): Code of values missing from the vocabulary.
+      dtype (type): Output dtype.
+      vocabularies_ (list): One object array of categories per input column.
+    """
+
+    def __init__(self, unknown_value: int = -1, dtype=np.float64):
+        self.unknown_value = unknown_value
+        self.dtype = dtype
+
+    @staticmethod
+    def _columns(X) -> list:
+        """
+        Returns the input columns as object arrays normalized by strip_text.
+        """
+        if isinstance(X, pd.DataFrame):
+            return [strip_text(X.iloc[:, j]) for j in range(X.shape[1])]
+        X = np.asarray(X, dtype=object)
+        return [strip_text(pd.Series(X[:, j])) for j in range(X.shape[1])]
+
+    @staticmethod
+    def _vocabulary(values: np.ndarray, previous=None) -> np.ndarray:
+        if previous is not None:
+            values = np.concatenate([np.asarray(previous, dtype=object), values])
+        return np.array(sorted(set(values)), dtype=object)
+
+    def fit(self, X, y=None):
+        if hasattr(X, "columns"):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+        self.vocabularies_ = [self._vocabulary(values) for values in self._columns(X)]
+        self._indexes = None
+        return self
+
+    def partial_fit(self, X, y=None):
+        """
+        Adds the values of X to the vocabularies (e.g. chunk by chunk); codes are only
+        stable once every chunk has been seen.
+        """
+        if not hasattr(self, "vocabularies_"):
+            return self.fit(X)
+        self.vocabularies_ = [
+            self._vocabulary(values, previous) for values, previous in zip(self._columns(X), self.vocabularies_)
+        ]
+        self._indexes = None
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        columns = self._columns(X)
+        if len(columns) != self.n_features_in_:
+            raise ValueError(f"X has {len(columns)} features, CategoricalEncoder expects {self.n_features_in_}.")
+        if getattr(self, "_indexes", None) is None:
+            self._indexes = [pd.Index(vocabulary, dtype=object) for vocabulary in self.vocabularies_]
+
+        codes = np.empty((len(columns[0]) if columns else 0, len(columns)), dtype=self.dtype)
+        for j, (values, index) in enumerate(zip(columns, self._indexes)):
+            found = index.get_indexer(values)
+            codes[:, j] = np.where(found < 0, self.unknown_value, found)
+        return codes
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        if input_features is None:
+            input_features = getattr(self, "feature_names_in_", [f"x{j}" for j in range(self.n_features_in_)])
+        return np.asarray(input_features, dtype=object)
+
+    def __getstate__(self):
+        # The lookup indexes are rebuilt on first transform
+        state = self.__dict__.copy()
+        state.pop("_indexes", None)
+        return state
+
+
+class PostalCodeEncoder(TransformerMixin, BaseEstimator):
+    """
+    Per-postal-code features looked up in a table fitted on the training prices.
+
+    X has two columns: the postal code, then the surface (m², only read to fit the price
+    per m²). For every postal code the table holds (FEATURES):
+      postal_price_m2  median price per m² of its listings, shrunk toward area_price_m2
+                       (n / (n + smoothing) of the weight goes to its own median)
+      postal_listings  log(1 + number of its listings)
+      area_price_m2    the same for its neighbors, the codes sharing its first two digits,
+                       shrunk toward the codes sharing its first digit, then the overall median
+      area_listings    log(1 + number of listings of its area)
+
+    The table has one float32 row per code between the smallest and the largest training
+    code (codes without listings get their area's values), so transform() is a single
+    vectorized gather; missing codes and codes outside the table get fallback_. Only codes
+    in [min_code, max_code] (Belgian postal codes by default) are fitted, which also bounds
+    the table size.
+
+    fit_transform() encodes every training row out-of-fold, with tables fitted on the
+    other n_folds - 1 folds (listing counts scaled to the whole set), so a listing's
+    features never include its own price. transform() uses the table of all rows.
+
+    Attributes:
+      smoothing (float): Listings at which a code's own median and its area's weigh the same.
+      min_code, max_code (int): Range of valid postal codes.
+      n_folds (int): Folds of the out-of-fold encoding of fit_transform().
+      random_state (int): Seed of the fold assignment.
+      dtype (type): Output dtype.
+      offset_ (int): Postal code of the first table row.
+      table_ (np.ndarray): Feature table, one row per code from offset_.
+      fallback_ (np.ndarray): Features of unknown or missing postal codes.
+    """
+
+    FEATURES = ("postal_price_m2", "postal_listings", "area_price_m2", "area_listings")
+
+    # Codes with the same code // AREA_DIVISOR are neighbors, grouped by code // PROVINCE_DIVISOR
+    AREA_DIVISOR = 100
+    PROVINCE_DIVISOR = 1000
+
+    def __init__(self, smoothing: float = 10.0, min_code: int = 1000, max_code: int = 9999, n_folds: int = 5,
+                 random_state: int = 42, dtype=np.float64):
+        self.smoothing = smoothing
+        self.min_code = min_code
+        self.max_code = max_code
+        self.n_folds = n_folds
+        self.random_state = random_state
+        self.dtype = dtype
+
+    @staticmethod
+    def _codes(X) -> np.ndarray:
+        X = X.to_numpy(dtype=np.float64) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float64)
+        return X[:, 0]
+
+    def _price_m2(self, X, y) -> tuple:
+        """
+        Returns the integer postal codes and prices per m² of the rows with all three values.
+        """
+        if y is None:
+            raise ValueError("PostalCodeEncoder needs the target (price) to fit.")
+        X = X.to_numpy(dtype=np.float64) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float64)
+        codes, surface = X[:, 0], X[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_m2 = np.asarray(y, dtype=np.float64) / surface
+        valid = (codes >= self.min_code) & (codes <= self.max_code) & (codes == np.floor(codes)) & \
+            (surface > 0) & np.isfinite(price_m2)
+        return codes[valid].astype(np.int64), price_m2[valid]
+
+    def _build_table(self, codes: np.ndarray, price_m2: np.ndarray, count_scale: float = 1.0) -> tuple:
+        """
+        Returns (offset, table, fallback) for the given codes and prices per m².
+        """
+        if len(codes) == 0:
+            raise ValueError("No listing with a postal code, a surface and a price to fit.")
+        overall = float(np.median(price_m2))
+        factor = self.PROVINCE_DIVISOR // self.AREA_DIVISOR
+        lo, hi = int(codes.min()), int(codes.max())
+        province_lo, area_lo = lo // self.PROVINCE_DIVISOR, lo // self.AREA_DIVISOR
+
+        province = np.full(hi // self.PROVINCE_DIVISOR - province_lo + 1, overall)
+        keys, median, n = self._grouped(codes // self.PROVINCE_DIVISOR, price_m2)
+        province[keys - province_lo] = self._shrink(median, n, overall)
+
+        # Areas without listings take their province's value
+        area = province[np.arange(area_lo, hi // self.AREA_DIVISOR + 1) // factor - province_lo]
+        area_n = np.zeros(len(area))
+        keys, median, n = self._grouped(codes // self.AREA_DIVISOR, price_m2)
+        area[keys - area_lo] = self._shrink(median, n, province[keys // factor - province_lo])
+        area_n[keys - area_lo] = n
+
+        code_area = np.arange(lo, hi + 1) // self.AREA_DIVISOR - area_lo
+        postal, postal_n = area[code_area], np.zeros(hi - lo + 1)
+        keys, median, n = self._grouped(codes, price_m2)
+        postal[keys - lo] = self._shrink(median, n, postal[keys - lo])
+        postal_n[keys - lo] = n
+
+        table = np.column_stack([
+            postal, np.log1p(postal_n * count_scale), area[code_area], np.log1p(area_n[code_area] * count_scale)
+        ]).astype(np.float32)
+        return lo, table, np.array([overall, 0.0, overall, 0.0])
+
+    @staticmethod
+    def _grouped(keys: np.ndarray, values: np.ndarray) -> tuple:
+        stats = pd.Series(values).groupby(keys).agg(["median", "size"])
+        return stats.index.to_numpy(dtype=np.int64), stats["median"].to_numpy(), stats["size"].to_numpy()
+
+    def _shrink(self, median: np.ndarray, n: np.ndarray, prior) -> np.ndarray:
+        return (n * median + self.smoothing * prior) / (n + self.smoothing)
+
+    def _lookup(self, codes: np.ndarray, offset: int, table: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+        index = codes - offset
+        found = (index >= 0) & (index < len(table)) & (index == np.floor(index))
+        out = np.empty((len(codes), table.shape[1]), dtype=self.dtype)
+        out[:] = fallback
+        out[found] = table[index[found].astype(np.int64)]
+        return out
+
+    def fit(self, X, y=None):
+        if hasattr(X, "columns"):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+        self.offset_, self.table_, self.fallback_ = self._build_table(*self._price_m2(X, y))
+        return self
+
+    def fit_transform(self, X, y=None, **fit_params) -> np.ndarray:
+        """
+        Fits the table on all rows and returns the out-of-fold features of the rows.
+        """
+        self.fit(X, y)
+        if self.n_folds < 2:
+            return self.transform(X)
+
+        codes = self._codes(X)
+        folds = np.random.default_rng(self.random_state).permutation(len(codes)) % self.n_folds
+        out = np.empty((len(codes), len(self.FEATURES)), dtype=self.dtype)
+        y = np.asarray(y, dtype=np.float64)
+        for fold in range(self.n_folds):
+            held_out = folds == fold
+            fit_codes, price_m2 = self._price_m2(X[~held_out] if isinstance(X, np.ndarray) else X.iloc[~held_out],
+                                                 y[~held_out])
+            try:
+                table = self._build_table(fit_codes, price_m2, count_scale=len(codes) / (~held_out).sum())
+            except ValueError:
+                # Nothing left to fit on (tiny inputs): the held-out rows get the overall values
+                table = (0, np.empty((0, len(self.FEATURES))), self.fallback_)
+            out[held_out] = self._lookup(codes[held_out], *table)
+        return out
+
+    def transform(self, X) -> np.ndarray:
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, PostalCodeEncoder expects {self.n_features_in_}.")
+        return self._lookup(self._codes(X), self.offset_, self.table_, self.fallback_)
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        return np.asarray(self.FEATURES, dtype=object)
+
+
+def build_preprocessor(numeric_cols: list, categorical_cols: list, memory_efficient: bool = False,
+                       native_categorical: bool = False, postal_cols: list = None) -> ColumnTransformer:
+    """
+    Builds the ColumnTransformer used in front of every model.
+
+    Default: StandardScaler on numeric columns and OneHotEncoder on categorical ones. The
+    categorical values are normalized by strip_text first, like CategoricalEncoder does, so
+    " Gent" and None are encoded as the cleaned training values "Gent" and "nan".
+
+    memory_efficient=True:
+    - numeric columns are downcast to float32 before scaling (output stays float32)
+    - one-hot blocks are float32 and the output is kept sparse end-to-end
+      (for models accepting sparse input, e.g. LinearRegression, RandomForest)
+
+    native_categorical=True: categorical columns are encoded as integer codes by a
+    CategoricalEncoder (unknown values -> -1) instead of one-hot, for tree
+    models and LightGBM's native categorical support. The output is dense (float32 with
+    memory_efficient) and the codes follow the len(numeric_cols) scaled columns, see
+    categorical_feature_indices().
+
+    postal_cols=[postal code column, surface column] appends the PostalCodeEncoder
+    features ("geo" block, after the categorical columns). Their table is fitted on the
+    target, so the preprocessor must then be fitted with y: fit_transform(X, y).
+    """
+    geo = [("geo", PostalCodeEncoder(dtype=np.float32 if memory_efficient else np.float64), list(postal_cols))] \
+        if postal_cols else []
+
+    if not memory_efficient:
+        categorical = CategoricalEncoder() if native_categorical else _strip_then(OneHotEncoder(handle_unknown="ignore"))
+        return ColumnTransformer(transformers=[
+            ("num", StandardScaler(), numeric_cols),
+            ("cat", categorical, categorical_cols)
+        ] + geo, sparse_threshold=0.0 if native_categorical else 0.3)
+
+    numeric = make_pipeline(
+        FunctionTransformer(np.asarray, kw_args={"dtype": np.float32}, feature_names_out="one-to-one"),
+        StandardScaler(),
+    )
+    if native_categorical:
+        categorical = CategoricalEncoder(dtype=np.float32)
+        sparse_threshold = 0.0
+    else:
+        categorical = _strip_then(OneHotEncoder(handle_unknown="ignore", sparse_output=True, dtype=np.float32))
+        sparse_threshold = 1.0
+
+    return ColumnTransformer(
+        transformers=[("num", numeric, numeric_cols), ("cat", categorical, categorical_cols)] + geo,
+        sparse_threshold=sparse_threshold,
+    )
+
+
+def _strip_then(encoder):
+    return make_pipeline(FunctionTransformer(strip_text_columns, feature_names_out="one-to-one"), encoder)
+
+
+def categorical_feature_indices(numeric_cols: list, categorical_cols: list) -> list:
+    """
+    Output positions of the categorical codes of a native_categorical preprocessor.
+    """
+    return list(range(len(numeric_cols), len(numeric_cols) + len(categorical_cols)))
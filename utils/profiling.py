@@ -0,0 +1,671 @@
+"""
+Streaming data profiles and drift scores.
+
+A DatasetProfile summarizes a table column by column in one pass over its chunks:
+row and null counts, values that did not parse (see clean_dataframe), mean and
+variance, approximate quantiles for numeric columns and the most frequent values of
+categorical ones. Every statistic is kept in a mergeable sketch, so the profiles of
+chunks, or of worker processes, merge into the profile of the whole data:
+
+- moments are merged exactly (Chan et al. parallel variance);
+- QuantileSketch keeps exact value counts while a column has few distinct values
+  (bedrooms, postal codes, years) and otherwise switches to logarithmic buckets with a
+  bounded relative error (DDSketch), whose bucket boundaries do not depend on the data;
+- TopKSketch is a Misra-Gries summary: counts are exact while a column has at most
+  capacity distinct values, and underestimated by at most `error` otherwise.
+
+drift_report() compares a reference profile (the training data, saved next to the
+models by DatasetTrainer) with a current one (listings seen at serving time) with the
+population stability index (PSI) and, for numeric columns, the Kolmogorov-Smirnov
+statistic, without any raw data.
+"""
+
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# Text values that clean_dataframe leaves in categorical columns for missing values
+MISSING_TEXT = ("nan", "", "None")
+
+# PSI thresholds of the usual rule of thumb: < 0.1 stable, < 0.25 moderate shift, drift above
+PSI_MODERATE = 0.1
+PSI_DRIFT = 0.25
+
+# Absolute change of a column's null rate flagged as moderate / drift (a broken parser or field)
+NULL_RATE_MODERATE = 0.05
+NULL_RATE_DRIFT = 0.1
+
+_STATUSES = ("ok", "moderate", "drift")
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch: exact value counts up to max_exact distinct values, then
+    logarithmic buckets with the given relative accuracy.
+
+    In bucket mode a positive value v falls in bucket ceil(log_gamma(v)) with
+    gamma = (1 + a) / (1 - a), and every quantile is returned within a relative error a.
+    Negative values use the same buckets on -v; values within 1e-12 of 0 are counted apart.
+    """
+
+    _TINY = 1e-12
+
+    def __init__(self, relative_accuracy: float = 0.005, max_exact: int = 1024):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1).")
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.count = 0
+        # {value: count} in exact mode, None once the sketch switched to buckets
+        self.exact = {}
+        self.positive, self.negative, self.zero = {}, {}, 0
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+    def add(self, values: np.ndarray):
+        """
+        Adds an array of finite values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        self.count += values.size
+        if self.exact is not None:
+            uniques, counts = np.unique(values, return_counts=True)
+            _add_counts(self.exact, uniques.tolist(), counts.tolist())
+            if len(self.exact) > self.max_exact:
+                self._collapse()
+            return
+        self._add_buckets(values, np.ones(values.size, dtype=np.int64))
+
+    def _add_buckets(self, values: np.ndarray, counts: np.ndarray):
+        for sign, target in ((1, self.positive), (-1, self.negative)):
+            mask = sign * values > self._TINY
+            if mask.any():
+                keys = np.ceil(np.log(sign * values[mask]) / self._log_gamma).astype(np.int64)
+                uniques, inverse = np.unique(keys, return_inverse=True)
+                _add_counts(target, uniques.tolist(), np.bincount(inverse, weights=counts[mask]).astype(np.int64).tolist())
+        self.zero += int(counts[np.abs(values) <= self._TINY].sum())
+
+    def _collapse(self):
+        values = np.fromiter(self.exact.keys(), dtype=np.float64, count=len(self.exact))
+        counts = np.fromiter(self.exact.values(), dtype=np.int64, count=len(self.exact))
+        self.exact = None
+        self._add_buckets(values, counts)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Adds the values of another sketch with the same relative accuracy (in place).
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches with different relative accuracies.")
+        self.count += other.count
+        if self.exact is not None and other.exact is not None:
+            _add_counts(self.exact, list(other.exact), list(other.exact.values()))
+            if len(self.exact) > self.max_exact:
+                self._collapse()
+            return self
+        if self.exact is not None:
+            self._collapse()
+        if other.exact is not None:
+            other = QuantileSketch.from_dict(other.to_dict())
+            other._collapse()
+        _add_counts(self.positive, list(other.positive), list(other.positive.values()))
+        _add_counts(self.negative, list(other.negative), list(other.negative.values()))
+        self.zero += other.zero
+        return self
+
+    def support(self) -> tuple:
+        """
+        Returns the sorted (values, counts) the sketch represents, bucket midpoints in bucket mode.
+        """
+        if self.exact is not None:
+            values = np.array(sorted(self.exact), dtype=np.float64)
+            return values, np.array([self.exact[v] for v in values.tolist()], dtype=np.int64)
+        gamma = math.exp(self._log_gamma)
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        values = (
+            [-2 * gamma ** k / (gamma + 1) for k in negative]
+            + ([0.0] if self.zero else [])
+            + [2 * gamma ** k / (gamma + 1) for k in positive]
+        )
+        counts = [self.negative[k] for k in negative] + ([self.zero] if self.zero else []) + \
+            [self.positive[k] for k in positive]
+        return np.array(values, dtype=np.float64), np.array(counts, dtype=np.int64)
+
+    def quantiles(self, qs) -> np.ndarray:
+        """
+        Returns the approximate quantiles qs (NaN for an empty sketch).
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        values, counts = self.support()
+        ranks = qs * (self.count - 1)
+        return values[np.searchsorted(np.cumsum(counts), ranks, side="right").clip(max=len(values) - 1)]
+
+    def cdf(self, points) -> np.ndarray:
+        """
+        Returns the share of values <= each point.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if self.count == 0:
+            return np.zeros(points.shape)
+        values, counts = self.support()
+        cumulative = np.concatenate([[0], np.cumsum(counts)])
+        return cumulative[np.searchsorted(values, points, side="right")] / self.count
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_exact": self.max_exact,
+            "count": self.count,
+            "exact": None if self.exact is None else [[v, c] for v, c in self.exact.items()],
+            "positive": {str(k): c for k, c in self.positive.items()},
+            "negative": {str(k): c for k, c in self.negative.items()},
+            "zero": self.zero,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        sketch = cls(state["relative_accuracy"], state["max_exact"])
+        sketch.count = state["count"]
+        sketch.exact = None if state["exact"] is None else {float(v): int(c) for v, c in state["exact"]}
+        sketch.positive = {int(k): c for k, c in state["positive"].items()}
+        sketch.negative = {int(k): c for k, c in state["negative"].items()}
+        sketch.zero = state["zero"]
+        return sketch
+
+
+class TopKSketch:
+    """
+    Mergeable frequent-values summary (Misra-Gries) keeping at most capacity counters.
+
+    Each kept count is at most `error` below the true count; values that were dropped
+    occurred at most `error` times.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.count = 0
+        self.error = 0
+        self.counters = {}
+
+    def add(self, values):
+        """
+        Adds an array of values (missing values must be removed first).
+        """
+        counts = pd.Series(values, dtype=object).value_counts()
+        self.add_counts(counts.index.tolist(), counts.to_numpy())
+
+    def add_counts(self, values: list, counts: np.ndarray):
+        """
+        Adds distinct values with their counts (e.g. the value_counts of a chunk).
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        self.count += int(counts.sum())
+        if len(counts) > self.capacity:
+            # Summarize the chunk first (its own Misra-Gries summary, kept vectorized)
+            threshold = int(np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1])
+            keep = np.flatnonzero(counts > threshold)
+            values, counts = [values[i] for i in keep], counts[keep] - threshold
+            self.error += threshold
+        self._add(values, counts.tolist())
+
+    def _add(self, values: list, counts: list):
+        _add_counts(self.counters, values, counts)
+        if len(self.counters) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count and drop the counters reaching 0
+            threshold = sorted(self.counters.values(), reverse=True)[self.capacity]
+            self.counters = {v: c - threshold for v, c in self.counters.items() if c > threshold}
+            self.error += threshold
+
+    def merge(self, other: "TopKSketch") -> "TopKSketch":
+        """
+        Adds the counters of another summary (in place).
+        """
+        self.count += other.count
+        self.error += other.error
+        self._add(list(other.counters), list(other.counters.values()))
+        return self
+
+    def top(self, k: int = 10) -> list:
+        """
+        Returns the k most frequent values as (value, count) pairs.
+        """
+        return sorted(self.counters.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def to_dict(self) -> dict:
+        return {"capacity": self.capacity, "count": self.count, "error": self.error, "counters": self.counters}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "TopKSketch":
+        sketch = cls(state["capacity"])
+        sketch.count, sketch.error, sketch.counters = state["count"], state["error"], dict(state["counters"])
+        return sketch
+
+
+class ColumnProfile:
+    """
+    Statistics of one column.
+
+    Attributes:
+      kind (str): "numeric" or "categorical".
+      rows (int): Rows seen.
+      nulls (int): Missing values (NaN, or "nan" / blank text in categorical columns).
+      unparsed (int): Values present in the source that did not parse as numbers (counted in nulls).
+      count, mean, m2, min, max: Moments of the non-missing values (numeric columns).
+      sketch: QuantileSketch (numeric) or TopKSketch (categorical).
+    """
+
+    def __init__(self, kind: str, relative_accuracy: float = 0.005, capacity: int = 64):
+        if kind not in ("numeric", "categorical"):
+            raise ValueError(f"Unknown column kind '{kind}'")
+        self.kind = kind
+        self.rows = self.nulls = self.unparsed = 0
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = math.inf, -math.inf
+        self.sketch = QuantileSketch(relative_accuracy) if kind == "numeric" else TopKSketch(capacity)
+
+    def update(self, series: pd.Series, unparsed: int = 0):
+        self.rows += len(series)
+        self.unparsed += unparsed
+        if self.kind == "categorical":
+            # Counted on the distinct values only (hash-based value_counts), then normalized
+            counts = series.value_counts()
+            counts.index = counts.index.astype(str).str.strip()
+            if counts.index.has_duplicates:
+                counts = counts.groupby(level=0).sum()
+            counts = counts[~counts.index.isin(MISSING_TEXT)]
+            self.nulls += len(series) - int(counts.sum())
+            self.sketch.add_counts(counts.index.tolist(), counts.to_numpy())
+            return
+
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[np.isfinite(values)]
+        self.nulls += len(series) - len(values)
+        if len(values) == 0:
+            return
+        self._merge_moments(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+        self.min, self.max = min(self.min, float(values.min())), max(self.max, float(values.max()))
+        self.sketch.add(values)
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        if other.kind != self.kind:
+            raise ValueError(f"Cannot merge a {other.kind} column profile into a {self.kind} one.")
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.unparsed += other.unparsed
+        if other.kind == "numeric" and other.count:
+            self._merge_moments(other.count, other.mean, other.m2)
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def null_rate(self) -> float:
+        return self.nulls / self.rows if self.rows else float("nan")
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float("nan")
+
+    def summary(self) -> dict:
+        """
+        Returns the readable statistics of the column.
+        """
+        summary = {"kind": self.kind, "rows": self.rows, "null_rate": self.null_rate, "unparsed": self.unparsed}
+        if self.kind == "numeric":
+            q = self.sketch.quantiles([0.01, 0.25, 0.5, 0.75, 0.99]).tolist()
+            summary.update(mean=self.mean if self.count else None, std=self.std, min=self.min, max=self.max,
+                           p01=q[0], p25=q[1], p50=q[2], p75=q[3], p99=q[4])
+        else:
+            summary["top"] = self.sketch.top(5)
+        return summary
+
+    def to_dict(self) -> dict:
+        state = {"kind": self.kind, "rows": self.rows, "nulls": self.nulls, "unparsed": self.unparsed,
+                 "sketch": self.sketch.to_dict()}
+        if self.kind == "numeric":
+            state.update(count=self.count, mean=self.mean, m2=self.m2,
+                         min=self.min if self.count else None, max=self.max if self.count else None)
+        return state
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "ColumnProfile":
+        profile = cls(state["kind"])
+        profile.rows, profile.nulls, profile.unparsed = state["rows"], state["nulls"], state["unparsed"]
+        if profile.kind == "numeric":
+            profile.count, profile.mean, profile.m2 = state["count"], state["mean"], state["m2"]
+            if profile.count:
+                profile.min, profile.max = state["min"], state["max"]
+            profile.sketch = QuantileSketch.from_dict(state["sketch"])
+        else:
+            profile.sketch = TopKSketch.from_dict(state["sketch"])
+        return profile
+
+
+class DatasetProfile:
+    """
+    Column profiles of a table, built chunk by chunk and mergeable across processes.
+
+    The kind of each column is fixed by the first chunk (numeric dtypes are numeric,
+    everything else categorical) unless given. Rows with every numeric column of the chunk
+    present are counted in complete_rows: the rows DatasetTrainer keeps.
+
+    Attributes:
+      columns (dict): {column: ColumnProfile}.
+      rows (int): Rows seen.
+      complete_rows (int): Rows without a missing numeric value.
+    """
+
+    def __init__(self, kinds: dict = None, relative_accuracy: float = 0.005, capacity: int = 64):
+        self.relative_accuracy = relative_accuracy
+        self.capacity = capacity
+        self.columns = {col: ColumnProfile(kind, relative_accuracy, capacity) for col, kind in (kinds or {}).items()}
+        self.rows = 0
+        self.complete_rows = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> "DatasetProfile":
+        return cls(**kwargs).update(df)
+
+    @property
+    def kinds(self) -> dict:
+        return {col: profile.kind for col, profile in self.columns.items()}
+
+    def update(self, df: pd.DataFrame, unparsed: dict = None) -> "DatasetProfile":
+        """
+        Adds a chunk of (cleaned) rows.
+
+        Args:
+          df (pd.DataFrame): The chunk. With fixed kinds, only the profiled columns are read;
+            a profiled column absent from the chunk is left untouched (e.g. the target in
+            the listings seen at serving time).
+          unparsed (dict, optional): {column: values that did not parse}; read from
+            df.attrs["unparsed_values"] (set by clean_dataframe) by default.
+        """
+        if unparsed is None:
+            unparsed = df.attrs.get("unparsed_values", {})
+        if not self.columns:
+            for col in df.columns:
+                kind = "numeric" if pd.api.types.is_numeric_dtype(df[col]) and not \
+                    pd.api.types.is_bool_dtype(df[col]) else "categorical"
+                self.columns[col] = ColumnProfile(kind, self.relative_accuracy, self.capacity)
+
+        complete = np.ones(len(df), dtype=bool)
+        for col, profile in self.columns.items():
+            if col not in df.columns:
+                continue
+            series = df[col]
+            profile.update(series, unparsed.get(col, 0))
+            if profile.kind == "numeric":
+                complete &= pd.to_numeric(series, errors="coerce").notna().to_numpy()
+        self.rows += len(df)
+        self.complete_rows += int(complete.sum())
+        return self
+
+    def merge(self, other: "DatasetProfile") -> "DatasetProfile":
+        """
+        Adds another profile (of other chunks or another process) in place.
+        """
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = ColumnProfile.from_dict(profile.to_dict())
+        self.rows += other.rows
+        self.complete_rows += other.complete_rows
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows, "complete_rows": self.complete_rows,
+            "relative_accuracy": self.relative_accuracy, "capacity": self.capacity,
+            "columns": {col: profile.to_dict() for col, profile in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "DatasetProfile":
+        profile = cls(relative_accuracy=state["relative_accuracy"], capacity=state["capacity"])
+        profile.rows, profile.complete_rows = state["rows"], state["complete_rows"]
+        profile.columns = {col: ColumnProfile.from_dict(s) for col, s in state["columns"].items()}
+        return profile
+
+    def save(self, path: str):
+        """
+        Writes the profile as JSON (atomically).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetProfile":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def psi(expected: np.ndarray, actual: np.ndarray, eps: float = 1e-4) -> float:
+    """
+    Population stability index of two arrays of bin shares.
+    """
+    expected = np.clip(np.asarray(expected, dtype=np.float64), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _numeric_drift(reference: ColumnProfile, current: ColumnProfile, n_bins: int) -> dict:
+    ref, cur = reference.sketch, current.sketch
+    # Bins of (about) equal reference mass
+    edges = np.unique(ref.quantiles(np.arange(1, n_bins) / n_bins))
+    ref_cdf = np.concatenate([[0.0], ref.cdf(edges), [1.0]])
+    cur_cdf = np.concatenate([[0.0], cur.cdf(edges), [1.0]])
+    points = np.union1d(ref.support()[0], cur.support()[0])
+    return {
+        "psi": psi(np.diff(ref_cdf), np.diff(cur_cdf)),
+        "ks": float(np.max(np.abs(ref.cdf(points) - cur.cdf(points)))),
+        "reference_median": float(ref.quantiles(0.5)[0]),
+        "current_median": float(cur.quantiles(0.5)[0]),
+    }
+
+
+def _categorical_drift(reference: ColumnProfile, current: ColumnProfile, n_bins: int) -> dict:
+    ref, cur = reference.sketch, current.sketch
+    # The most frequent reference values, whose counts the summaries keep best, plus one
+    # "other" bin: the tail of a column with more values than counters is approximate
+    categories = [value for value, _ in ref.top(n_bins)]
+    ref_shares = np.array([ref.counters[c] for c in categories] + [0.0]) / ref.count
+    cur_shares = np.array([cur.counters.get(c, 0) for c in categories] + [0.0]) / cur.count
+    ref_shares[-1], cur_shares[-1] = 1 - ref_shares[:-1].sum(), 1 - cur_shares[:-1].sum()
+    new = [value for value, _ in cur.top(5) if value not in ref.counters]
+    return {"psi": psi(ref_shares, cur_shares), "new_top_values": new}
+
+
+def drift_report(reference: DatasetProfile, current: DatasetProfile, n_bins: int = 10) -> dict:
+    """
+    Compares the columns of a current profile with the reference (training) profile.
+
+    Numeric columns are binned at n_bins reference quantiles; categorical columns compare
+    the shares of the n_bins most frequent reference values and of all the other values.
+
+    Returns:
+      dict: {column: {"status", "psi", "ks" (numeric), "null_rate", "reference_null_rate",
+      "unparsed_rate", ...}} for the reference columns present in the current profile with
+      at least one row. status is "ok", "moderate" or "drift" by PSI (PSI_MODERATE, PSI_DRIFT)
+      and by the change of the null rate (NULL_RATE_MODERATE, NULL_RATE_DRIFT), or "empty"
+      for a column without any value.
+    """
+    report = {}
+    for col, ref in reference.columns.items():
+        cur = current.columns.get(col)
+        if cur is None or cur.rows == 0 or cur.kind != ref.kind:
+            continue
+        entry = {
+            "null_rate": cur.null_rate,
+            "reference_null_rate": ref.null_rate,
+            "unparsed_rate": cur.unparsed / cur.rows,
+        }
+        null_shift = abs(entry["null_rate"] - entry["reference_null_rate"])
+        level = 2 if null_shift >= NULL_RATE_DRIFT else 1 if null_shift >= NULL_RATE_MODERATE else 0
+        if cur.sketch.count and ref.sketch.count:
+            if ref.kind == "numeric":
+                entry.update(_numeric_drift(ref, cur, n_bins))
+            else:
+                entry.update(_categorical_drift(ref, cur, n_bins))
+            level = max(level, 2 if entry["psi"] >= PSI_DRIFT else 1 if entry["psi"] >= PSI_MODERATE else 0)
+        entry["status"] = "empty" if cur.sketch.count == 0 else _STATUSES[level]
+        report[col] = entry
+    return report
+
+
+def print_drift_report(report: dict, name: str = "data"):
+    """
+    Prints one line per drifting column (and a summary line).
+    """
+    flagged = {col: entry for col, entry in report.items() if entry["status"] in ("moderate", "drift", "empty")}
+    for col, entry in flagged.items():
+        if entry["status"] == "empty":
+            print(f"[WARNING] {name}: '{col}' has no values (null rate {entry['null_rate']:.0%})")
+            continue
+        scores = f"PSI {entry['psi']:.2f}, " if "psi" in entry else ""
+        scores += f"KS {entry['ks']:.2f}, " if "ks" in entry else ""
+        print(f"[WARNING] {name}: '{col}' {entry['status']} ({scores}null rate "
+              f"{entry['reference_null_rate']:.0%} -> {entry['null_rate']:.0%})")
+    print(f"[INFO] {name}: {len(report) - len(flagged)} of {len(report)} column(s) stable")
+
+
+class DriftMonitor:
+    """
+    Profiles the listings scored by a serving process and compares them with a reference.
+
+    observe() only buffers the listings; they are profiled (with the column kinds of the
+    reference) once buffer_size of them are pending, or when the profile is read. With a
+    directory, every process saves its profile there as <dataset>.<pid>.json (on
+    flush() and every flush_every listings) and current() merges the profiles of all
+    processes sharing the directory. The directory is meant for the processes of one
+    host: current() deletes the profiles of processes that no longer run (e.g. workers
+    replaced by a restart), so the report only covers the live ones.
+
+    Attributes:
+      reference (DatasetProfile): Training profile of the dataset.
+      dataset (str): Dataset name, prefix of the saved profile files.
+      directory (str, optional): Folder shared by the serving processes.
+    """
+
+    def __init__(self, reference: DatasetProfile, dataset: str, directory: str = None, buffer_size: int = 256,
+                 flush_every: int = 10000):
+        self.reference = reference
+        self.dataset = dataset
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.flush_every = flush_every
+        self.profile = DatasetProfile(reference.kinds, reference.relative_accuracy, reference.capacity)
+        self._pending = []
+        self._since_flush = 0
+        self._lock = threading.Lock()
+
+    def observe(self, listings):
+        """
+        Records listings (a list of feature dicts or a DataFrame).
+        """
+        rows = listings.to_dict("records") if isinstance(listings, pd.DataFrame) else list(listings)
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.buffer_size:
+                self._profile_pending()
+            if self.directory and self._since_flush >= self.flush_every:
+                self._save()
+
+    def _profile_pending(self):
+        if self._pending:
+            self.profile.update(pd.DataFrame(self._pending))
+            self._since_flush += len(self._pending)
+            self._pending = []
+
+    def _path(self, pid: int = None) -> str:
+        return os.path.join(self.directory, f"{self.dataset}.{pid or os.getpid()}.json")
+
+    def _save(self):
+        self.profile.save(self._path())
+        self._since_flush = 0
+
+    def flush(self):
+        """
+        Profiles the pending listings and saves the profile of this process (with a directory).
+        """
+        with self._lock:
+            self._profile_pending()
+            if self.directory:
+                self._save()
+
+    def current(self) -> DatasetProfile:
+        """
+        Returns the profile of the listings seen by this process, merged with the saved
+        profiles of the other processes.
+        """
+        with self._lock:
+            self._profile_pending()
+            merged = DatasetProfile.from_dict(self.profile.to_dict())
+        if self.directory and os.path.isdir(self.directory):
+            own = os.path.basename(self._path())
+            prefix = f"{self.dataset}."
+            for filename in sorted(os.listdir(self.directory)):
+                if not (filename.startswith(prefix) and filename.endswith(".json")) or filename == own:
+                    continue
+                pid = filename[len(prefix):-len(".json")]
+                path = os.path.join(self.directory, filename)
+                if pid.isdigit() and not _pid_alive(int(pid)):
+                    # Left by a process that exited: expired, or it would be counted forever
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                try:
+                    merged.merge(DatasetProfile.load(path))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[WARNING] Skipping unreadable profile {filename}: {e}")
+        return merged
+
+    def report(self, n_bins: int = 10) -> dict:
+        """
+        Returns the drift report of the listings seen so far against the reference.
+        """
+        return drift_report(self.reference, self.current(), n_bins=n_bins)
+
+
+def _pid_alive(pid: int) -> bool:
+    """
+    Tells whether a process of this host runs with the given pid.
+    """
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows: keep its profile
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Runs under another user
+        return True
+    return True
+
+
+def _add_counts(target: dict, keys: list, counts: list):
+    for key, count in zip(keys, counts):
+        target[key] = target.get(key, 0) + count
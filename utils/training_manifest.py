@@ -0,0 +1,199 @@
+"""
+Training manifest: what every model artifact of a model directory was trained from.
+
+<model_dir>/manifest.json holds one entry per (dataset, model_type) with the fingerprint
+of the inputs of its artifact:
+  data     SHA-256, size and mtime of the raw CSV, and its number of rows
+  mapping  hash of the column mapping (configs/feature_mapping.yaml)
+  config   hash of the training configuration (hyperparameters, encoding, mode, ...)
+  code     hash of the training source files and of the library versions
+
+TrainingManifest.status() compares a fresh fingerprint with the recorded one, so an
+incremental run (DatasetTrainer(incremental=True)) only retrains stale pairs. When the
+only change is rows appended at the end of the CSV, the status is "appended" and
+LightGBM models can continue boosting on the new rows instead of a full refit.
+"""
+
+import hashlib
+import json
+import os
+import time
+from importlib.metadata import version
+
+from utils.constants import MANIFEST_FILE
+from utils.hashing import file_sha256
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Source files whose changes can change a trained artifact
+TRAINING_SOURCES = (
+    "scripts/train_all_datasets.py",
+    "ml_models/model_factory.py",
+    "ml_models/backends.py",
+    "ml_models/incremental.py",
+    "ml_models/artifacts.py",
+    "ml_models/tree_engine.py",
+    "utils/column_mapper.py",
+    "utils/data_loader.py",
+    "utils/preprocessing.py",
+)
+
+# (module, distribution) of the libraries whose version is part of the code version
+_VERSIONED_PACKAGES = (("numpy", "numpy"), ("pandas", "pandas"), ("sklearn", "scikit-learn"), ("lightgbm", "lightgbm"))
+
+
+def code_version(sources=TRAINING_SOURCES) -> str:
+    """
+    Hashes the training source files together with the NumPy, pandas, scikit-learn and
+    LightGBM versions.
+    """
+    h = hashlib.sha256()
+    for relative_path in sources:
+        h.update(relative_path.encode("utf-8"))
+        path = os.path.join(_ROOT, relative_path)
+        if os.path.exists(path):
+            h.update(file_sha256(path).encode("utf-8"))
+    # Versions read from the package metadata: the estimator backends are not imported
+    for module, distribution in _VERSIONED_PACKAGES:
+        h.update(f"{module}=={version(distribution)}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def config_sha256(config: dict) -> str:
+    """
+    Returns a stable hash of a JSON-serializable training configuration.
+    """
+    payload = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def data_fingerprint(path: str, previous: dict = None) -> dict:
+    """
+    Returns the SHA-256, size and mtime of a data file.
+
+    The digest of previous is reused while the size and mtime are unchanged, so an
+    untouched CSV is not read again.
+    """
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        digest = previous["sha256"]
+    else:
+        digest = file_sha256(path)
+    return {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def prefix_sha256(path: str, n_bytes: int, chunk_size: int = 1 << 20) -> str:
+    """
+    Returns the SHA-256 of the first n_bytes of a file.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = n_bytes
+        while remaining > 0:
+            block = f.read(min(chunk_size, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+def is_append(path: str, previous: dict) -> bool:
+    """
+    Tells whether the file at path is the previously fingerprinted file with bytes appended.
+
+    The previous content must end with a newline, so the appended bytes start a new row.
+    """
+    size = os.path.getsize(path)
+    if not previous or size <= previous.get("size", 0):
+        return False
+    with open(path, "rb") as f:
+        f.seek(previous["size"] - 1)
+        if f.read(1) != b"\n":
+            return False
+    return prefix_sha256(path, previous["size"]) == previous["sha256"]
+
+
+class TrainingManifest:
+    """
+    Reads and updates <model_dir>/manifest.json.
+
+    Attributes:
+      model_dir (str): Model directory the artifact paths are relative to.
+      path (str): Manifest file.
+      entries (dict): {"<dataset>/<model_type>": entry}, where an entry holds the artifact
+        path, the input fingerprint ("inputs"), rows, r2, trained_at and the number of
+        continued boosting updates since the last full fit ("continued").
+    """
+
+    def __init__(self, model_dir: str):
+        self.model_dir = model_dir
+        self.path = os.path.join(model_dir, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.entries = json.load(f).get("entries", {})
+            except (OSError, ValueError) as e:
+                # A lost manifest only means the next incremental run retrains everything
+                print(f"[WARNING] Unreadable training manifest {self.path}, ignoring it: {e}")
+
+    @staticmethod
+    def _key(dataset_name: str, model_type: str) -> str:
+        return f"{dataset_name}/{model_type}"
+
+    def get(self, dataset_name: str, model_type: str) -> dict:
+        return self.entries.get(self._key(dataset_name, model_type))
+
+    def data(self, dataset_name: str) -> dict:
+        """
+        Returns the last recorded data fingerprint of a dataset (any model type), or None.
+        """
+        for entry in self.entries.values():
+            if entry["dataset"] == dataset_name:
+                return entry["inputs"]["data"]
+        return None
+
+    def status(self, dataset_name: str, model_type: str, inputs: dict, data_path: str) -> str:
+        """
+        Compares the current inputs of a (dataset, model_type) pair with the manifest.
+
+        Returns:
+          str: "up_to_date" when nothing changed and the artifact exists, "appended" when
+          rows were only appended to the CSV, "stale" otherwise.
+        """
+        entry = self.get(dataset_name, model_type)
+        if entry is None or not os.path.exists(os.path.join(self.model_dir, entry["artifact"])):
+            return "stale"
+        recorded = entry["inputs"]
+        if any(recorded.get(name) != inputs.get(name) for name in ("mapping", "config", "code")):
+            return "stale"
+        if recorded["data"]["sha256"] == inputs["data"]["sha256"]:
+            return "up_to_date"
+        if recorded["data"].get("rows") is not None and is_append(data_path, recorded["data"]):
+            return "appended"
+        return "stale"
+
+    def record(self, dataset_name: str, model_type: str, artifact: str, inputs: dict,
+               rows: int = None, r2: float = None, continued: bool = False):
+        """
+        Records a freshly trained (or continued) artifact; call save() to write the manifest.
+        """
+        previous = self.get(dataset_name, model_type)
+        self.entries[self._key(dataset_name, model_type)] = {
+            "dataset": dataset_name,
+            "model_type": model_type,
+            "artifact": artifact,
+            "inputs": {**inputs, "data": {**inputs["data"], "rows": rows}},
+            "r2": r2,
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "continued": (previous or {}).get("continued", 0) + 1 if continued else 0,
+        }
+
+    def save(self):
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"entries": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)